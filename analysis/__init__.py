@@ -0,0 +1,12 @@
+from utils.lazy import lazy_exports
+
+# The analyzers need pandas, so they are imported on first access
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'WorkoutAnalyzer': 'analysis.workout_analysis',
+    'NutritionAnalyzer': 'analysis.nutrition_analysis',
+    'InsightGenerator': 'analysis.insights',
+    'RuleEngine': 'analysis.rules',
+    'sweep_calorie_scenarios': 'analysis.scenarios',
+    'lagged_correlations': 'analysis.correlation',
+    'forecast_exercises': 'analysis.forecasting',
+})
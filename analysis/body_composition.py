@@ -0,0 +1,126 @@
+import pandas as pd
+import numpy as np
+from datetime import date, timedelta
+from typing import Optional
+
+from utils.formulas import calculate_body_fat_percentage_array
+
+# Half-life of the exponential smoothing, in days
+DEFAULT_HALFLIFE_DAYS = 7
+
+# Smoothed body fat is not carried forward further than this past the last estimate
+MAX_BODY_FAT_AGE_DAYS = 60
+
+# Half-lives of history behind the latest smoothed value; older weigh-ins weigh under 0.1% in it
+SMOOTHING_HALFLIVES = 10
+
+BODY_COMPOSITION_COLUMNS = [
+    'date',
+    'weight',
+    'navy_body_fat',
+    'body_fat',
+    'body_fat_source',
+    'lean_mass',
+    'fat_mass',
+    'smoothed_weight',
+    'smoothed_body_fat',
+    'smoothed_lean_mass',
+    'smoothed_fat_mass',
+]
+
+
+def body_composition_series(weight_df: pd.DataFrame, height_cm: float, sex: str,
+                            halflife_days: float = DEFAULT_HALFLIFE_DAYS,
+                            max_age_days: int = MAX_BODY_FAT_AGE_DAYS) -> pd.DataFrame:
+    """
+    Body fat, lean mass and fat mass at every weigh-in, raw and smoothed
+
+    Body fat comes from the Navy method where the waist and neck (and, for
+    women, hip) circumferences were logged, and otherwise from the logged
+    body fat percentage. Weight and body fat are smoothed with a time-aware
+    exponential moving average, so irregular gaps between weigh-ins are
+    weighted by elapsed days rather than by entry count. The whole history is
+    computed with array operations.
+
+    Args:
+        weight_df: Weigh-ins laid out like NutritionAnalyzer.weight_df, sorted by date
+        height_cm: Height in centimeters
+        sex: 'M' for male, 'F' for female
+        halflife_days: Half-life of the smoothing in days
+        max_age_days: Days past the last body fat estimate for which the
+            smoothed body fat, lean mass and fat mass are still reported
+
+    Returns:
+        DataFrame with BODY_COMPOSITION_COLUMNS, one row per weigh-in.
+        body_fat_source is 'navy', 'logged' or None; masses are in kilograms
+    """
+    if weight_df.empty:
+        return pd.DataFrame(columns=BODY_COMPOSITION_COLUMNS)
+
+    frame = weight_df.reindex(columns=['weight', 'body_fat', 'waist', 'neck', 'hip']).astype(float)
+    dates = pd.to_datetime(weight_df['date']).reset_index(drop=True)
+    weight = frame['weight'].to_numpy()
+
+    navy = calculate_body_fat_percentage_array(frame['waist'], frame['neck'], height_cm, sex, frame['hip'])
+    logged = frame['body_fat'].to_numpy()
+    body_fat = np.where(np.isnan(navy), logged, navy)
+    source = np.where(~np.isnan(navy), 'navy', np.where(~np.isnan(logged), 'logged', None))
+
+    halflife = pd.Timedelta(days=halflife_days)
+    smoothed_weight = pd.Series(weight).ewm(halflife=halflife, times=dates).mean().to_numpy()
+    smoothed_body_fat = pd.Series(body_fat).ewm(halflife=halflife, times=dates).mean().to_numpy()
+
+    # The average holds its last value between estimates; drop it once the last estimate is too old
+    last_estimate = dates.where(~np.isnan(body_fat)).ffill()
+    stale = ((dates - last_estimate).dt.days > max_age_days).to_numpy()
+    smoothed_body_fat = np.where(stale, np.nan, smoothed_body_fat)
+
+    lean_mass = weight * (1 - body_fat / 100)
+    smoothed_lean_mass = smoothed_weight * (1 - smoothed_body_fat / 100)
+    return pd.DataFrame({
+        'date': weight_df['date'].to_numpy(),
+        'weight': weight,
+        'navy_body_fat': navy,
+        'body_fat': body_fat,
+        'body_fat_source': source,
+        'lean_mass': lean_mass,
+        'fat_mass': weight - lean_mass,
+        'smoothed_weight': smoothed_weight,
+        'smoothed_body_fat': smoothed_body_fat,
+        'smoothed_lean_mass': smoothed_lean_mass,
+        'smoothed_fat_mass': smoothed_weight - smoothed_lean_mass
+    })
+
+
+def lean_mass_window_start(latest: date, halflife_days: float = DEFAULT_HALFLIFE_DAYS,
+                           max_age_days: int = MAX_BODY_FAT_AGE_DAYS) -> date:
+    """
+    First date of the weigh-ins needed for the latest smoothed lean body mass
+
+    Args:
+        latest: Date of the latest weigh-in
+        halflife_days: Half-life of the smoothing in days
+        max_age_days: As in body_composition_series
+
+    Returns:
+        Date from which body_composition_series gives the same latest values
+        as over the whole history, to within the smoothing's precision
+    """
+    return latest - timedelta(days=max_age_days + SMOOTHING_HALFLIVES * halflife_days)
+
+
+def latest_lean_body_mass(composition: pd.DataFrame) -> Optional[float]:
+    """
+    Current smoothed lean body mass
+
+    Args:
+        composition: Frame returned by body_composition_series
+
+    Returns:
+        Lean body mass in kilograms at the latest weigh-in, or None if there
+        is no recent enough body fat estimate
+    """
+    if composition.empty:
+        return None
+    lean_mass = composition['smoothed_lean_mass'].iloc[-1]
+    return None if pd.isna(lean_mass) else float(lean_mass)
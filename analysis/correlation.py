@@ -0,0 +1,288 @@
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from analysis.workout_analysis import WorkoutAnalyzer
+from analysis.nutrition_analysis import NutritionAnalyzer
+from analysis.scenarios import KCAL_PER_KG
+
+DEFAULT_MAX_LAG_DAYS = 28
+
+# Lags with fewer paired days than this get no correlation
+DEFAULT_MIN_PAIRS = 10
+
+# Days of intake and weight change behind each day's expenditure estimate, as in estimate_tdee
+EXPENDITURE_WINDOW_DAYS = 14
+
+# Padded series values transformed per batch of exercises
+CHUNK_ELEMENTS = 1 << 15
+
+# (driver, outcome) spectra multiplied for each sum; 0 is the mask, 1 the values, 2 their squares
+SUM_TERMS = ((0, 0), (1, 0), (2, 0), (0, 1), (0, 2), (1, 1))
+
+DEFAULT_DRIVERS = ('calories', 'calorie_surplus', 'protein', 'carbs', 'fat')
+
+
+@dataclass
+class LaggedCorrelations:
+    """
+    Correlations between daily nutrition drivers and per-exercise progress at each lag
+
+    Array axes are (driver, exercise, lag). Lag L pairs the driver on day t - L
+    with the exercise's progress on day t, so positive lags look for intake
+    that precedes progress.
+    """
+    drivers: List[str]
+    exercises: List[str]
+    lags_days: np.ndarray                 # (L,)
+    correlation: np.ndarray               # (D, E, L), NaN where there are too few pairs
+    pairs: np.ndarray                     # (D, E, L), days with both series observed
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Flatten the correlations into a long-form DataFrame
+
+        Returns:
+            DataFrame with one row per (driver, exercise, lag_days)
+        """
+        d, e, l = np.meshgrid(
+            np.arange(len(self.drivers)), np.arange(len(self.exercises)), np.arange(len(self.lags_days)),
+            indexing='ij'
+        )
+        return pd.DataFrame({
+            'driver': np.asarray(self.drivers, dtype=object)[d.ravel()],
+            'exercise': np.asarray(self.exercises, dtype=object)[e.ravel()],
+            'lag_days': self.lags_days[l.ravel()],
+            'correlation': self.correlation.ravel(),
+            'pairs': self.pairs.ravel()
+        })
+
+    def strongest(self, driver: Optional[str] = None) -> pd.DataFrame:
+        """
+        Lag of the strongest correlation, positive or negative, for each driver and exercise
+
+        Args:
+            driver: Optional driver to restrict to
+
+        Returns:
+            DataFrame with driver, exercise, lag_days, correlation and pairs,
+            strongest first; pairs without any valid lag are left out
+        """
+        magnitude = np.abs(self.correlation)
+        valid = ~np.isnan(magnitude).all(axis=2)
+        best = np.argmax(np.nan_to_num(magnitude, nan=-1.0), axis=2)
+        d, e = np.nonzero(valid)
+        lag = best[d, e]
+        frame = pd.DataFrame({
+            'driver': np.asarray(self.drivers, dtype=object)[d],
+            'exercise': np.asarray(self.exercises, dtype=object)[e],
+            'lag_days': self.lags_days[lag],
+            'correlation': self.correlation[d, e, lag],
+            'pairs': self.pairs[d, e, lag]
+        })
+        if driver is not None:
+            frame = frame[frame['driver'] == driver]
+        order = np.argsort(-np.abs(frame['correlation'].to_numpy()), kind='stable')
+        return frame.iloc[order].reset_index(drop=True)
+
+
+def masked_lagged_correlation(x: np.ndarray, y: np.ndarray, max_lag: int,
+                              min_pairs: int = DEFAULT_MIN_PAIRS):
+    """
+    Pearson correlation of x[t - lag] with y[t] for every lag, skipping missing days
+
+    Every sum the correlation needs (pair count, sums, sums of squares and
+    cross products over the days both series are observed) is a cross-
+    correlation of the zero-filled series and their observation masks. All of
+    them come from one FFT of each series, so the cost is O(N log N) per
+    series pair for all lags together. Outcomes are transformed in blocks,
+    so memory stays bounded however many there are.
+
+    Args:
+        x: (D, N) driver series, NaN where missing
+        y: (E, N) outcome series on the same days, NaN where missing
+        max_lag: Largest lag in days
+        min_pairs: Fewest paired days a correlation is reported for
+
+    Returns:
+        Tuple of ((D, E, max_lag + 1) correlations, (D, E, max_lag + 1) pair counts)
+    """
+    x = np.atleast_2d(np.asarray(x, dtype=float))
+    y = np.atleast_2d(np.asarray(y, dtype=float))
+    days = x.shape[1]
+    lags = max_lag + 1
+    size = 1 << int(np.ceil(np.log2(max(days + lags, 2))))
+
+    def spectra(series):
+        mask = ~np.isnan(series)
+        # Centering keeps the sums small, so the FFT's rounding error stays negligible
+        counts = mask.sum(axis=1, keepdims=True)
+        means = np.where(counts > 0, np.nansum(series, axis=1, keepdims=True) / np.maximum(counts, 1), 0.0)
+        values = np.where(mask, series - means, 0.0)
+        stacked = np.stack([mask.astype(float), values, values * values])
+        return np.fft.rfft(stacked, n=size, axis=-1)
+
+    fx = np.conj(spectra(x))     # (3, D, F): mask, values, squares
+    correlation = np.empty((x.shape[0], y.shape[0], lags))
+    pairs = np.empty((x.shape[0], y.shape[0], lags), dtype=int)
+    # Exercises go a block at a time to bound the memory of the full-length transforms
+    block = max(1, CHUNK_ELEMENTS // size)
+    for start in range(0, y.shape[0], block):
+        outcomes = slice(start, start + block)
+        fy = spectra(y[outcomes])
+        for d in range(x.shape[0]):
+            # Pair count, sum x, sum x^2, sum y, sum y^2 and sum xy, each (block, lags)
+            products = np.stack([fx[i, d] * fy[j] for i, j in SUM_TERMS])
+            n, sum_x, sum_xx, sum_y, sum_yy, sum_xy = np.fft.irfft(products, n=size, axis=-1)[..., :lags]
+            correlation[d, outcomes], pairs[d, outcomes] = _pearson(
+                np.rint(n), sum_x, sum_xx, sum_y, sum_yy, sum_xy, min_pairs
+            )
+    return correlation, pairs
+
+
+def _pearson(n, sum_x, sum_xx, sum_y, sum_yy, sum_xy, min_pairs):
+    with np.errstate(divide='ignore', invalid='ignore'):
+        covariance = n * sum_xy - sum_x * sum_y
+        variance = (n * sum_xx - sum_x ** 2) * (n * sum_yy - sum_y ** 2)
+        correlation = covariance / np.sqrt(variance)
+    # Constant series have no correlation; rounding can leave a tiny variance instead of zero
+    degenerate = (n < max(min_pairs, 3)) | ~(variance > 1e-9 * np.maximum(n, 1) ** 4)
+    correlation = np.where(degenerate, np.nan, np.clip(correlation, -1.0, 1.0))
+    return correlation, n.astype(int)
+
+
+def daily_drivers(nutrition_analyzer: NutritionAnalyzer, days: pd.DatetimeIndex,
+                  drivers: Sequence[str] = DEFAULT_DRIVERS) -> np.ndarray:
+    """
+    Daily nutrition series aligned to a calendar
+
+    'calorie_surplus' is the day's intake minus the expenditure estimated as in
+    estimate_tdee (average intake minus the energy of the weight change) over
+    the preceding EXPENDITURE_WINDOW_DAYS. A fixed TDEE would only shift
+    calories by a constant, which does not change a correlation. Other drivers
+    are columns of nutrition_df.
+
+    Args:
+        nutrition_analyzer: NutritionAnalyzer with the logged intake
+        days: Consecutive calendar days
+        drivers: Driver names
+
+    Returns:
+        (D, N) array, NaN on days without the data
+    """
+    nutrition = nutrition_analyzer.nutrition_df
+    daily = pd.DataFrame(index=days)
+    if not nutrition.empty:
+        columns = [column for column in nutrition.columns if column != 'date']
+        logged = nutrition.assign(date=pd.to_datetime(nutrition['date'])).groupby('date')[columns].sum(min_count=1)
+        daily = logged.reindex(days)
+
+    result = []
+    for driver in drivers:
+        if driver == 'calorie_surplus':
+            result.append(_calorie_surplus(daily, nutrition_analyzer.weight_df, days))
+        elif driver in daily.columns:
+            result.append(daily[driver].to_numpy(dtype=float))
+        else:
+            raise ValueError(f"Unknown driver '{driver}'")
+    return np.array(result).reshape(len(result), len(days))
+
+
+def _calorie_surplus(daily: pd.DataFrame, weight_df: pd.DataFrame, days: pd.DatetimeIndex) -> np.ndarray:
+    if 'calories' not in daily.columns or weight_df.empty:
+        return np.full(len(days), np.nan)
+    window = EXPENDITURE_WINDOW_DAYS
+    calories = daily['calories']
+
+    # Weigh-ins interpolated over the days between them, never extrapolated
+    weight = pd.Series(weight_df['weight'].to_numpy(dtype=float), index=pd.to_datetime(weight_df['date']))
+    weight = weight.groupby(level=0).last().reindex(weight.index.union(days))
+    weight = weight.interpolate(method='time', limit_area='inside').reindex(days)
+
+    average_intake = calories.rolling(window, min_periods=window // 2).mean()
+    weight_change = weight - weight.shift(window)
+    expenditure = average_intake - weight_change * KCAL_PER_KG / window
+    return (calories - expenditure).to_numpy(dtype=float)
+
+
+def daily_progress(workout_analyzer: WorkoutAnalyzer, days: pd.DatetimeIndex,
+                   exercises: Sequence[str]) -> np.ndarray:
+    """
+    Per-exercise progress aligned to a calendar
+
+    Progress on a training day is the percentage change of the session's
+    estimated 1RM from the exercise's previous session, divided by the days
+    between them, so sessions after a long break do not dominate.
+
+    Args:
+        workout_analyzer: WorkoutAnalyzer with the sessions
+        days: Consecutive calendar days
+        exercises: Exercise names, one row each
+
+    Returns:
+        (E, N) array of percent per day, NaN on days without a session
+    """
+    sessions = workout_analyzer.sessions_df
+    sessions = sessions[sessions['exercise_name'].isin(exercises)]
+    previous = sessions.groupby('exercise_name', sort=False)[['date', 'estimated_1rm_kg']].shift()
+    gap_days = (sessions['date'] - previous['date']).dt.days
+    rate = (sessions['estimated_1rm_kg'] / previous['estimated_1rm_kg'] - 1) * 100 / gap_days
+
+    progress = np.full((len(exercises), len(days)), np.nan)
+    row = pd.Categorical(sessions['exercise_name'], categories=list(exercises)).codes
+    column = days.get_indexer(sessions['date'].dt.normalize())
+    keep = rate.notna().to_numpy() & (row >= 0) & (column >= 0)
+    progress[row[keep], column[keep]] = rate.to_numpy()[keep]
+    return progress
+
+
+def lagged_correlations(workout_analyzer: WorkoutAnalyzer, nutrition_analyzer: NutritionAnalyzer,
+                        drivers: Sequence[str] = DEFAULT_DRIVERS,
+                        exercises: Optional[Sequence[str]] = None,
+                        max_lag_days: int = DEFAULT_MAX_LAG_DAYS,
+                        min_pairs: int = DEFAULT_MIN_PAIRS) -> LaggedCorrelations:
+    """
+    Correlate nutrition with the strength progress of every exercise at 0 to max_lag_days lags
+
+    Both sides are laid out on one daily calendar; days without a log or a
+    session are missing, not zero, and are left out of each lag's pairs. All
+    drivers, exercises and lags are computed together with FFT cross-
+    correlation, so the cost grows with exercises times days log days.
+
+    Args:
+        workout_analyzer: WorkoutAnalyzer with the training history
+        nutrition_analyzer: NutritionAnalyzer with intake and weigh-ins
+        drivers: Nutrition series to test ('calories', 'calorie_surplus',
+            'protein', 'carbs', 'fat', 'fiber', 'sugar')
+        exercises: Exercises to test; defaults to every exercise with weighted sets;
+            repeated names are tested once
+        max_lag_days: Largest lag in days
+        min_pairs: Fewest paired days a correlation is reported for
+
+    Returns:
+        LaggedCorrelations
+    """
+    if max_lag_days < 0:
+        raise ValueError("max_lag_days must not be negative")
+    exercises = list(dict.fromkeys(workout_analyzer.exercises if exercises is None else exercises))
+    drivers = list(drivers)
+    lags = np.arange(max_lag_days + 1)
+
+    sessions = workout_analyzer.sessions_df
+    nutrition = nutrition_analyzer.nutrition_df
+    if sessions.empty or nutrition.empty or not exercises:
+        shape = (len(drivers), len(exercises), len(lags))
+        return LaggedCorrelations(drivers, exercises, lags, np.full(shape, np.nan), np.zeros(shape, dtype=int))
+
+    nutrition_dates = pd.to_datetime(nutrition['date'])
+    first = min(sessions['date'].min(), nutrition_dates.min()).normalize()
+    last = max(sessions['date'].max(), nutrition_dates.max()).normalize()
+    days = pd.date_range(first, last, freq='D')
+
+    correlation, pairs = masked_lagged_correlation(
+        daily_drivers(nutrition_analyzer, days, drivers),
+        daily_progress(workout_analyzer, days, exercises),
+        max_lag_days, min_pairs
+    )
+    return LaggedCorrelations(drivers, exercises, lags, correlation, pairs)
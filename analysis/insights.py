@@ -6,7 +6,10 @@ from data_models.workout_models import WorkoutData
 from data_models.nutrition_models import DailyNutritionData, WeightData
 from analysis.workout_analysis import WorkoutAnalyzer
 from analysis.nutrition_analysis import NutritionAnalyzer
-from utils.formulas import calculate_bmr, calculate_tdee
+from analysis.rules import RuleEngine, RuleContext
+from analysis.scenarios import ScenarioGrid, sweep_calorie_scenarios
+from utils.formulas import calculate_calorie_target
+from utils.instrumentation import timed
 
 class InsightGenerator:
     """
@@ -24,9 +27,36 @@ class InsightGenerator:
             nutrition_data: List of DailyNutritionData objects
             weight_data: List of WeightData objects
         """
-        self.workout_analyzer = WorkoutAnalyzer(workout_data)
-        self.nutrition_analyzer = NutritionAnalyzer(nutrition_data, weight_data)
+        self._attach(WorkoutAnalyzer(workout_data), NutritionAnalyzer(nutrition_data, weight_data))
     
+    @classmethod
+    def from_analyzers(cls, workout_analyzer: WorkoutAnalyzer,
+                       nutrition_analyzer: NutritionAnalyzer) -> 'InsightGenerator':
+        """
+        Create an insight generator over existing analyzers
+        
+        Args:
+            workout_analyzer: WorkoutAnalyzer instance
+            nutrition_analyzer: NutritionAnalyzer instance
+            
+        Returns:
+            InsightGenerator sharing the given analyzers
+        """
+        generator = cls.__new__(cls)
+        generator._attach(workout_analyzer, nutrition_analyzer)
+        return generator
+    
+    def _attach(self, workout_analyzer: WorkoutAnalyzer, nutrition_analyzer: NutritionAnalyzer):
+        self.workout_analyzer = workout_analyzer
+        self.nutrition_analyzer = nutrition_analyzer
+        self.rule_engine = RuleEngine()
+    
+    def _rule_context(self, height_cm: Optional[float] = None, age_years: Optional[int] = None,
+                      sex: Optional[str] = None) -> RuleContext:
+        return RuleContext(self.workout_analyzer, self.nutrition_analyzer,
+                           height_cm=height_cm, age_years=age_years, sex=sex)
+    
+    @timed('insights.training')
     def get_training_recommendations(self) -> List[Dict[str, Any]]:
         """
         Generate training recommendations based on workout analysis
@@ -34,30 +64,9 @@ class InsightGenerator:
         Returns:
             List of recommendation dictionaries with 'type', 'message', and 'priority'
         """
-        recommendations = []
-        
-        # Check for stalled exercises
-        stalled_exercises = self.workout_analyzer.identify_stalled_exercises(weeks=8)
-        if stalled_exercises:
-            for exercise in stalled_exercises:
-                recommendations.append({
-                    'type': 'training',
-                    'message': f"Progress for {exercise} has stalled. Consider varying rep ranges, adding volume, or applying progressive overload techniques.",
-                    'priority': 'high'
-                })
-        
-        # Check workout frequency
-        workout_frequency = self.workout_analyzer.get_workout_frequency(weeks=4)
-        total_workouts = sum(workout_frequency.values())
-        if total_workouts < 8:  # Less than 2 workouts per week
-            recommendations.append({
-                'type': 'training',
-                'message': f"Your workout frequency is below optimal levels ({total_workouts} workouts in the last 4 weeks). Aim for at least 3-4 workouts per week for better results.",
-                'priority': 'medium'
-            })
-        
-        return recommendations
+        return self.rule_engine.evaluate(self._rule_context(), types=['training'])
     
+    @timed('insights.nutrition')
     def get_nutrition_recommendations(self, height_cm: float, age_years: int, sex: str) -> List[Dict[str, Any]]:
         """
         Generate nutrition recommendations based on nutrition and weight analysis
@@ -70,51 +79,10 @@ class InsightGenerator:
         Returns:
             List of recommendation dictionaries with 'type', 'message', and 'priority'
         """
-        recommendations = []
-        
-        # Get weight trend
-        weight_change, is_losing = self.nutrition_analyzer.get_weight_trend(weeks=4)
-        
-        # Get macronutrient ratios
-        macro_ratios = self.nutrition_analyzer.get_macronutrient_ratios(days=14)
-        
-        # Check protein intake
-        if macro_ratios['protein_pct'] < 25:
-            recommendations.append({
-                'type': 'nutrition',
-                'message': f"Your protein intake is low at {macro_ratios['protein_pct']}% of calories. For optimal muscle growth and recovery, aim for 30-35% of calories from protein.",
-                'priority': 'high'
-            })
-        
-        # Get latest weight
-        latest_weight = None
-        if self.nutrition_analyzer.weight_df is not None and not self.nutrition_analyzer.weight_df.empty:
-            latest_weight = self.nutrition_analyzer.weight_df.iloc[-1]['weight']
-        
-        # Estimate TDEE if we have enough data
-        if latest_weight:
-            estimated_tdee = self.nutrition_analyzer.estimate_tdee(
-                height_cm=height_cm,
-                age_years=age_years,
-                sex=sex
-            )
-            
-            if estimated_tdee:
-                # Calculate theoretical TDEE based on formulas
-                theoretical_bmr = calculate_bmr(latest_weight, height_cm, age_years, sex)
-                theoretical_tdee = calculate_tdee(theoretical_bmr, 1.55)  # Moderate activity level
-                
-                # Compare estimated vs theoretical
-                difference = abs(estimated_tdee - theoretical_tdee)
-                if difference > (theoretical_tdee * 0.15):  # More than 15% difference
-                    recommendations.append({
-                        'type': 'nutrition',
-                        'message': f"Your estimated energy expenditure ({int(estimated_tdee)} kcal) differs significantly from theoretical calculations ({int(theoretical_tdee)} kcal). This could indicate inaccurate calorie tracking or an unusually high/low activity level.",
-                        'priority': 'medium'
-                    })
-        
-        return recommendations
+        context = self._rule_context(height_cm, age_years, sex)
+        return self.rule_engine.evaluate(context, types=['nutrition'])
     
+    @timed('insights.combined')
     def get_combined_insights(self, height_cm: float, age_years: int, sex: str, 
                              goal: str = 'muscle_gain') -> Dict[str, Any]:
         """
@@ -129,43 +97,30 @@ class InsightGenerator:
         Returns:
             Dictionary with insights and recommendations
         """
-        # Get all recommendations
-        training_recommendations = self.get_training_recommendations()
-        nutrition_recommendations = self.get_nutrition_recommendations(height_cm, age_years, sex)
+        context = self._rule_context(height_cm, age_years, sex)
+        
+        # Evaluate every rule in one batch and split by recommendation type
+        recommendations = self.rule_engine.evaluate(context)
+        training_recommendations = [r for r in recommendations if r['type'] == 'training']
+        nutrition_recommendations = [r for r in recommendations if r['type'] == 'nutrition']
         
         # Get weight trend
-        weight_change, is_losing = self.nutrition_analyzer.get_weight_trend(weeks=4)
+        weight_change, is_losing = context.weight_trend(4)
         
         # Get macronutrient ratios
-        macro_ratios = self.nutrition_analyzer.get_macronutrient_ratios(days=14)
+        macro_ratios = context.macro_ratios(14)
         
         # Get calorie target based on goal and current TDEE estimate
-        latest_weight = None
-        estimated_tdee = None
-        
-        if self.nutrition_analyzer.weight_df is not None and not self.nutrition_analyzer.weight_df.empty:
-            latest_weight = self.nutrition_analyzer.weight_df.iloc[-1]['weight']
-            
-            if latest_weight:
-                estimated_tdee = self.nutrition_analyzer.estimate_tdee(
-                    height_cm=height_cm,
-                    age_years=age_years,
-                    sex=sex
-                )
+        latest_weight = context.latest_weight()
+        estimated_tdee = context.estimated_tdee() if latest_weight else None
         
         if not estimated_tdee and latest_weight:
             # Use theoretical calculation if estimation fails
-            bmr = calculate_bmr(latest_weight, height_cm, age_years, sex)
-            estimated_tdee = calculate_tdee(bmr, 1.55)  # Moderate activity level
+            estimated_tdee = context.theoretical_tdee(1.55)  # Moderate activity level
         
         calorie_target = None
         if estimated_tdee:
-            if goal == 'muscle_gain':
-                calorie_target = estimated_tdee + 300  # Slight surplus
-            elif goal == 'fat_loss':
-                calorie_target = estimated_tdee - 500  # Moderate deficit
-            else:  # maintenance
-                calorie_target = estimated_tdee
+            calorie_target = calculate_calorie_target(estimated_tdee, goal)
         
         # Build the insights object
         insights = {
@@ -211,4 +166,23 @@ class InsightGenerator:
             else:
                 insights['goal_alignment']['protein'] = 'low'
         
-        return insights
\ No newline at end of file
+        return insights
+    
+    @timed('insights.scenarios')
+    def get_calorie_scenarios(self, height_cm: float, age_years: int, sex: str,
+                              **sweep_options) -> ScenarioGrid:
+        """
+        Compare calorie targets and projected weight across goals and activity levels
+        
+        Args:
+            height_cm: Height in centimeters
+            age_years: Age in years
+            sex: 'M' for male, 'F' for female
+            **sweep_options: Scenario axes passed to sweep_calorie_scenarios
+                (goals, activity_multipliers, adjustments_kcal, horizons_days, ...)
+            
+        Returns:
+            ScenarioGrid with targets and projected weight curves
+        """
+        return sweep_calorie_scenarios(self.nutrition_analyzer, height_cm, age_years, sex,
+                                       **sweep_options)
\ No newline at end of file
@@ -4,25 +4,103 @@ from typing import List, Dict, Any, Optional, Tuple
 from datetime import date, timedelta
 from collections import defaultdict
 
-from data_models.nutrition_models import DailyNutritionData, WeightData
+from data_models.nutrition_models import DailyNutritionData, MealNutritionData, WeightData
+from data_models.frames import (meals_to_frame, weights_to_frame, upsert_sorted, MEAL_KEYS, WEIGHT_KEYS,
+                                ANALYZER_NUTRITION_COLUMNS)
 from utils.formulas import calculate_bmr, calculate_tdee
+from utils.instrumentation import stage
+from analysis.rollups import create_rollups, aggregate_nutrition, aggregate_weight
+from analysis.body_composition import (body_composition_series, latest_lean_body_mass, lean_mass_window_start,
+                                       DEFAULT_HALFLIFE_DAYS)
 
 class NutritionAnalyzer:
     """
     Analyzes nutrition and weight data to track progress and generate insights
     """
     
-    def __init__(self, nutrition_data: List[DailyNutritionData], weight_data: List[WeightData]):
+    def __init__(self, nutrition_data: List[DailyNutritionData], weight_data: List[WeightData],
+                 meal_data: Optional[List[MealNutritionData]] = None):
         """
         Initialize with lists of nutrition and weight data
         
         Args:
             nutrition_data: List of DailyNutritionData objects
             weight_data: List of WeightData objects
+            meal_data: Optional per-meal breakdown of nutrition_data, needed to
+                merge synced meals into existing days
         """
         self.nutrition_data = sorted(nutrition_data, key=lambda x: x.date)
         self.weight_data = sorted(weight_data, key=lambda x: x.date)
-        self._process_data()
+        with stage('nutrition_analyzer.process', rows=len(self.nutrition_data) + len(self.weight_data)):
+            self._process_data()
+            self.meals_df = meals_to_frame(meal_data or [])
+        self._create_rollups()
+    
+    @classmethod
+    def from_frames(cls, nutrition_df: pd.DataFrame, weight_df: pd.DataFrame,
+                    meals_df: Optional[pd.DataFrame] = None) -> 'NutritionAnalyzer':
+        """
+        Create an analyzer from DataFrames instead of parsed records
+        
+        Args:
+            nutrition_df: Daily totals laid out like nutrition_df, sorted by date
+            weight_df: Weigh-ins laid out like weight_df, sorted by date
+            meals_df: Optional per-meal table with data_models.frames.MEAL_COLUMNS
+            
+        Returns:
+            NutritionAnalyzer over the given frames; its record lists are empty
+        """
+        analyzer = cls.__new__(cls)
+        analyzer.nutrition_data = []
+        analyzer.weight_data = []
+        analyzer.nutrition_df = nutrition_df.reset_index(drop=True)
+        analyzer.weight_df = weight_df.reset_index(drop=True)
+        analyzer.meals_df = meals_df.reset_index(drop=True) if meals_df is not None else meals_to_frame([])
+        analyzer._create_rollups()
+        return analyzer
+    
+    @classmethod
+    def from_store(cls, store, user_id: str = 'default', start: Optional[date] = None,
+                   end: Optional[date] = None, include_meals: bool = False) -> 'NutritionAnalyzer':
+        """
+        Create an analyzer from a date range of a HistoryStore
+        
+        Args:
+            store: storage.history_store.HistoryStore
+            user_id: Owner of the records
+            start: First date to include
+            end: Last date to include
+            include_meals: Also load the per-meal table, needed to sync meals later
+            
+        Returns:
+            NutritionAnalyzer over the selected days and weigh-ins
+        """
+        with stage('history.read_nutrition') as timing:
+            nutrition_df = store.read_nutrition(user_id, start, end)
+            weight_df = store.read_weights(user_id, start, end)
+            meals_df = store.read_meals(user_id, start, end) if include_meals else None
+            timing.rows = len(nutrition_df) + len(weight_df)
+        return cls.from_frames(nutrition_df, weight_df, meals_df)
+    
+    @classmethod
+    def from_files(cls, nutrition_path: str, weight_path: str,
+                   meals_path: Optional[str] = None) -> 'NutritionAnalyzer':
+        """
+        Create an analyzer from Parquet or Arrow files written by storage.columnar
+        
+        Args:
+            nutrition_path: Daily nutrition file
+            weight_path: Weigh-in file
+            meals_path: Optional per-meal file, needed to sync meals later
+            
+        Returns:
+            NutritionAnalyzer over the files' days and weigh-ins
+        """
+        from storage.columnar import read_frame
+        nutrition_df = read_frame(nutrition_path, 'nutrition', columns=ANALYZER_NUTRITION_COLUMNS)
+        weight_df = read_frame(weight_path, 'weights')
+        meals_df = read_frame(meals_path, 'meals') if meals_path else None
+        return cls.from_frames(nutrition_df, weight_df, meals_df)
     
     def _process_data(self):
         """Process the data for analysis"""
@@ -41,15 +119,173 @@ class NutritionAnalyzer:
         ]
         self.nutrition_df = pd.DataFrame(nutrition_records)
         
-        weight_records = [
-            {
-                'date': data.date,
-                'weight': data.weight_kg,
-                'body_fat': data.body_fat_percentage
-            }
-            for data in self.weight_data
-        ]
-        self.weight_df = pd.DataFrame(weight_records)
+        self.weight_df = weights_to_frame(self.weight_data)
+    
+    def _create_rollups(self):
+        """Set up the weekly and monthly rollup tables; they are built on first use"""
+        self.nutrition_rollups = create_rollups('nutrition', aggregate_nutrition)
+        self.weight_rollups = create_rollups('weight', aggregate_weight)
+    
+    def build_rollups(self):
+        """Materialize every rollup table now, e.g. for a dataset that stays resident"""
+        for tables, raw in ((self.nutrition_rollups, self.nutrition_df),
+                            (self.weight_rollups, self.weight_df)):
+            for table in tables.values():
+                if not table.is_built:
+                    table.build(raw)
+    
+    def upsert_meals(self, meal_data: List[MealNutritionData]) -> Dict[str, int]:
+        """
+        Merge new or corrected meals into the analysis
+        
+        Meals are matched on (date, meal); incoming meals replace matching ones.
+        Daily totals are recomputed only for the dates touched by the update.
+        Days loaded without a per-meal breakdown are replaced by the totals of
+        the meals synced for them.
+        
+        Args:
+            meal_data: List of MealNutritionData objects
+            
+        Returns:
+            Dictionary with the number of 'meals' merged, existing meals
+            'replaced' and 'days' recomputed
+        """
+        incoming = meals_to_frame(meal_data)
+        if incoming.empty:
+            return {'meals': 0, 'replaced': 0, 'days': 0}
+        
+        with stage('nutrition_analyzer.upsert_meals', rows=len(incoming)):
+            stored = len(self.meals_df)
+            self.meals_df, replaced = upsert_sorted(self.meals_df, incoming, MEAL_KEYS)
+            merged = len(self.meals_df) - stored + replaced
+            
+            dates = pd.unique(incoming['date'])
+            start = int(self.meals_df['date'].searchsorted(min(dates), side='left'))
+            day_meals = self.meals_df.iloc[start:]
+            day_meals = day_meals[day_meals['date'].isin(dates)]
+            daily = (day_meals.groupby('date', sort=True)
+                     [['calories', 'protein', 'carbs', 'fat', 'fiber', 'sugar']]
+                     .sum()
+                     .reset_index())
+            self.nutrition_df, _ = upsert_sorted(self.nutrition_df, daily, ['date'])
+            for table in self.nutrition_rollups.values():
+                table.refresh(self.nutrition_df, daily['date'])
+        
+        return {'meals': merged, 'replaced': replaced, 'days': len(daily)}
+    
+    def upsert_weights(self, weight_data: List[WeightData]) -> Dict[str, int]:
+        """
+        Merge new or corrected weigh-ins into the analysis, one per date
+        
+        Args:
+            weight_data: List of WeightData objects
+            
+        Returns:
+            Dictionary with the number of 'weights' merged and existing entries 'replaced'
+        """
+        if not weight_data:
+            return {'weights': 0, 'replaced': 0}
+        
+        incoming = weights_to_frame(weight_data)
+        with stage('nutrition_analyzer.upsert_weights', rows=len(incoming)):
+            stored = len(self.weight_df)
+            self.weight_df, replaced = upsert_sorted(self.weight_df, incoming, WEIGHT_KEYS)
+            merged = len(self.weight_df) - stored + replaced
+            for table in self.weight_rollups.values():
+                table.refresh(self.weight_df, incoming['date'])
+        
+        return {'weights': merged, 'replaced': replaced}
+    
+    def get_intake_rollup(self, period: str = 'week', start: Optional[date] = None,
+                          end: Optional[date] = None) -> pd.DataFrame:
+        """
+        Logged days and average daily calories and macros per week or month
+        
+        Complete periods are read from the materialized rollup; only the
+        latest, still open period is aggregated from the daily totals.
+        
+        Args:
+            period: 'week' or 'month'
+            start: Optional first date of the range
+            end: Optional last date of the range
+            
+        Returns:
+            DataFrame with period_start, days, calories, protein, carbs, fat,
+            fiber, sugar and partial (True for the open period)
+        """
+        return self.nutrition_rollups[period].query(self.nutrition_df, start, end)
+    
+    def get_weight_rollup(self, period: str = 'week', start: Optional[date] = None,
+                          end: Optional[date] = None) -> pd.DataFrame:
+        """
+        Weigh-in count and average, range, first and last weight per week or month
+        
+        Args:
+            period: 'week' or 'month'
+            start: Optional first date of the range
+            end: Optional last date of the range
+            
+        Returns:
+            DataFrame with period_start, entries, avg_weight, min_weight,
+            max_weight, first_weight, last_weight, avg_body_fat and partial
+        """
+        return self.weight_rollups[period].query(self.weight_df, start, end)
+    
+    def get_body_composition(self, height_cm: float, sex: str,
+                             halflife_days: float = DEFAULT_HALFLIFE_DAYS) -> pd.DataFrame:
+        """
+        Body fat, lean mass and fat mass over the whole weigh-in history
+        
+        Args:
+            height_cm: Height in centimeters
+            sex: 'M' for male, 'F' for female
+            halflife_days: Half-life of the smoothing in days (default: 7)
+            
+        Returns:
+            DataFrame with analysis.body_composition.BODY_COMPOSITION_COLUMNS
+        """
+        with stage('nutrition_analyzer.body_composition', rows=len(self.weight_df)):
+            return body_composition_series(self.weight_df, height_cm, sex, halflife_days)
+    
+    def get_lean_body_mass(self, height_cm: float, sex: str) -> Optional[float]:
+        """
+        Current smoothed lean body mass
+        
+        Args:
+            height_cm: Height in centimeters
+            sex: 'M' for male, 'F' for female
+            
+        Returns:
+            Lean body mass in kilograms, or None without a recent body fat
+            percentage or waist and neck measurement
+        """
+        if self.weight_df.empty:
+            return None
+        # Only the recent weigh-ins carry weight in the smoothed value
+        start = lean_mass_window_start(self.weight_df['date'].iloc[-1])
+        recent = self.weight_df.iloc[int(self.weight_df['date'].searchsorted(start, side='left')):]
+        return latest_lean_body_mass(body_composition_series(recent, height_cm, sex))
+    
+    def estimate_bmr(self, height_cm: float, age_years: int, sex: str) -> Optional[float]:
+        """
+        BMR at the latest weigh-in, from lean body mass when it is known
+        
+        Uses the Cunningham equation when body composition can be estimated
+        (see get_lean_body_mass) and Mifflin-St Jeor otherwise.
+        
+        Args:
+            height_cm: Height in centimeters
+            age_years: Age in years
+            sex: 'M' for male, 'F' for female
+            
+        Returns:
+            BMR in calories per day, or None without weight data
+        """
+        if self.weight_df.empty:
+            return None
+        weight_kg = float(self.weight_df['weight'].iloc[-1])
+        lean_body_mass = self.get_lean_body_mass(height_cm, sex)
+        return calculate_bmr(weight_kg, height_cm, age_years, sex, lean_body_mass_kg=lean_body_mass)
     
     def get_weight_trend(self, weeks: int = 4) -> Tuple[float, bool]:
         """
@@ -179,11 +415,15 @@ class NutritionAnalyzer:
         """
         Estimate TDEE based on nutrition and weight data
         
+        The intake-based estimate is never taken below BMR (see estimate_bmr,
+        lean-mass aware when body composition is known). Without logged intake
+        in the period, BMR times the activity multiplier is used instead.
+        
         Args:
             height_cm: Height in centimeters
             age_years: Age in years
             sex: 'M' for male, 'F' for female
-            activity_multiplier: Activity level multiplier (default: 1.55 - moderate)
+            activity_multiplier: Activity level multiplier for the fallback (default: 1.55 - moderate)
             days: Number of days to analyze (default: 14)
             
         Returns:
@@ -207,13 +447,13 @@ class NutritionAnalyzer:
         if latest_weight.empty:
             return None
         
-        weight_kg = latest_weight.iloc[-1]['weight']
-        
         # Calculate average calorie intake
         avg_calories = filtered_nutrition['calories'].mean()
         
-        # Calculate BMR
-        bmr = calculate_bmr(weight_kg, height_cm, age_years, sex)
+        # Calculate BMR, from lean body mass when body composition is known
+        bmr = self.estimate_bmr(height_cm, age_years, sex)
+        if pd.isna(avg_calories):
+            return bmr * activity_multiplier
         
         # Get weight change during the period
         weight_change, _ = self.get_weight_trend(weeks=int(days/7))
@@ -224,4 +464,5 @@ class NutritionAnalyzer:
         # Estimated TDEE is the average calorie intake adjusted for weight change
         estimated_tdee = avg_calories - calorie_surplus_per_day
         
-        return max(0, estimated_tdee)  # Ensure positive value
\ No newline at end of file
+        # Under-logged intake or a water-weight swing can't take the estimate below BMR
+        return max(bmr, estimated_tdee)
\ No newline at end of file
@@ -0,0 +1,297 @@
+import pandas as pd
+from typing import List, Dict, Optional, Callable, Iterable
+
+from utils.formulas import estimate_one_rep_max_array
+from utils.instrumentation import stage
+
+# Supported rollup periods; weeks start on Monday, months on the 1st
+PERIODS = ('week', 'month')
+
+
+def period_starts(dates, period: str) -> pd.Series:
+    """
+    Start of the week or month containing each date
+
+    Args:
+        dates: Dates as datetime64 values or datetime.date objects
+        period: 'week' or 'month'
+
+    Returns:
+        Series of datetime64 period starts aligned with `dates`
+    """
+    dates = pd.Series(pd.to_datetime(pd.Series(dates)).dt.normalize().values)
+    if period == 'week':
+        return dates - pd.to_timedelta(dates.dt.dayofweek, unit='D')
+    if period == 'month':
+        return dates - pd.to_timedelta(dates.dt.day - 1, unit='D')
+    raise ValueError(f"Unknown rollup period {period!r}; expected one of {', '.join(PERIODS)}")
+
+
+def aggregate_workouts(sets_df: pd.DataFrame, periods: pd.Series) -> pd.DataFrame:
+    """
+    Workout, training day, set and tonnage totals per period
+
+    Args:
+        sets_df: Per-set rows as built by workouts_to_frame
+        periods: Period start of each row
+
+    Returns:
+        DataFrame with period_start, workouts, training_days, sets and tonnage_kg
+    """
+    valid = sets_df['weight_kg'].notna() & sets_df['reps'].notna()
+    frame = pd.DataFrame({
+        'period_start': periods.values,
+        'date': sets_df['date'].values,
+        'routine_name': sets_df['routine_name'].fillna("Unnamed").values,
+        'tonnage_kg': (sets_df['weight_kg'] * sets_df['reps']).where(valid, 0.0).values
+    })
+    grouped = frame.groupby('period_start', sort=True)
+    workouts = frame.drop_duplicates(['date', 'routine_name']).groupby('period_start', sort=True).size()
+    return pd.DataFrame({
+        'workouts': workouts,
+        'training_days': grouped['date'].nunique(),
+        'sets': grouped.size(),
+        'tonnage_kg': grouped['tonnage_kg'].sum()
+    }).reset_index()
+
+
+def aggregate_exercises(sets_df: pd.DataFrame, periods: pd.Series) -> pd.DataFrame:
+    """
+    Per-exercise totals and bests per period, from sets with both weight and reps
+
+    Args:
+        sets_df: Per-set rows as built by workouts_to_frame
+        periods: Period start of each row
+
+    Returns:
+        DataFrame with period_start, exercise_name, sessions, sets, tonnage_kg,
+        max_weight_kg and best_1rm_kg, sorted by period and exercise
+    """
+    valid = (sets_df['weight_kg'].notna() & sets_df['reps'].notna()).values
+    sets_df = sets_df[valid]
+    frame = pd.DataFrame({
+        'period_start': periods.values[valid],
+        'exercise_name': sets_df['exercise_name'].values,
+        'date': sets_df['date'].values,
+        'weight_kg': sets_df['weight_kg'].values,
+        'tonnage_kg': (sets_df['weight_kg'] * sets_df['reps']).values,
+        'estimated_1rm_kg': estimate_one_rep_max_array(sets_df['weight_kg'], sets_df['reps'])
+    })
+    return frame.groupby(['period_start', 'exercise_name'], sort=True).agg(
+        sessions=('date', 'nunique'),
+        sets=('date', 'size'),
+        tonnage_kg=('tonnage_kg', 'sum'),
+        max_weight_kg=('weight_kg', 'max'),
+        best_1rm_kg=('estimated_1rm_kg', 'max')
+    ).reset_index()
+
+
+def aggregate_nutrition(nutrition_df: pd.DataFrame, periods: pd.Series) -> pd.DataFrame:
+    """
+    Logged days and average daily intake per period
+
+    Args:
+        nutrition_df: Daily totals with calories, protein, carbs, fat, fiber and sugar
+        periods: Period start of each row
+
+    Returns:
+        DataFrame with period_start, days and the daily average of each nutrient
+    """
+    columns = ['calories', 'protein', 'carbs', 'fat', 'fiber', 'sugar']
+    frame = nutrition_df.reindex(columns=columns).astype(float)
+    frame.insert(0, 'period_start', periods.values)
+    grouped = frame.groupby('period_start', sort=True)
+    result = grouped[columns].mean()
+    result.insert(0, 'days', grouped.size())
+    return result.reset_index()
+
+
+def aggregate_weight(weight_df: pd.DataFrame, periods: pd.Series) -> pd.DataFrame:
+    """
+    Weigh-in statistics per period
+
+    Args:
+        weight_df: Weigh-ins with weight and body_fat, sorted by date
+        periods: Period start of each row
+
+    Returns:
+        DataFrame with period_start, entries, avg/min/max/first/last weight
+        and average body fat
+    """
+    frame = weight_df.reindex(columns=['weight', 'body_fat']).astype(float)
+    frame.insert(0, 'period_start', periods.values)
+    return frame.groupby('period_start', sort=True).agg(
+        entries=('weight', 'size'),
+        avg_weight=('weight', 'mean'),
+        min_weight=('weight', 'min'),
+        max_weight=('weight', 'max'),
+        first_weight=('weight', 'first'),
+        last_weight=('weight', 'last'),
+        avg_body_fat=('body_fat', 'mean')
+    ).reset_index()
+
+
+class RollupTable:
+    """
+    Materialized weekly or monthly aggregate of one date-sorted raw table
+
+    Only complete periods are stored. The period containing the latest raw
+    record is still open (a sync may add to it), so queries aggregate it from
+    the raw rows on demand; that costs a tail slice of the raw table, not a
+    scan of the history. After an update, `refresh` recomputes just the
+    periods that contain the updated dates, plus the previously open period
+    if newer data has closed it.
+    """
+
+    def __init__(self, name: str, period: str,
+                 aggregate: Callable[[pd.DataFrame, pd.Series], pd.DataFrame]):
+        """
+        Initialize an empty table
+
+        Args:
+            name: Table name, used in stage timings
+            period: 'week' or 'month'
+            aggregate: Function mapping (raw rows, their period starts) to one
+                or more rows per period with a period_start column
+        """
+        if period not in PERIODS:
+            raise ValueError(f"Unknown rollup period {period!r}; expected one of {', '.join(PERIODS)}")
+        self.name = name
+        self.period = period
+        self.aggregate = aggregate
+        self.frame: Optional[pd.DataFrame] = None
+        self.open_start: Optional[pd.Timestamp] = None
+
+    @property
+    def is_built(self) -> bool:
+        return self.frame is not None
+
+    def build(self, raw: pd.DataFrame):
+        """
+        Materialize every complete period of a raw table
+
+        Args:
+            raw: Raw rows sorted by their 'date' column
+        """
+        with stage(f"rollup.{self.name}.build", rows=len(raw)):
+            self.open_start = self._latest_period(raw)
+            closed = raw.iloc[:self._position(raw, self.open_start)]
+            self.frame = self._aggregate(closed)
+
+    def refresh(self, raw: pd.DataFrame, dates: Iterable):
+        """
+        Recompute the complete periods touched by an update
+
+        Args:
+            raw: Raw rows after the update, sorted by date
+            dates: Dates of the rows that were added or replaced
+        """
+        if self.frame is None:
+            return
+
+        with stage(f"rollup.{self.name}.refresh") as timing:
+            open_start = self._latest_period(raw)
+            affected = set(period_starts(list(dates), self.period))
+            if self.open_start is not None and self.open_start != open_start:
+                affected.add(self.open_start)
+            affected = sorted(start for start in affected
+                              if open_start is None or start < open_start)
+            self.open_start = open_start
+            if not affected:
+                return
+
+            rows = raw.iloc[self._position(raw, affected[0]):self._position(raw, open_start)]
+            rows = rows[period_starts(rows['date'], self.period).isin(affected).values]
+            timing.rows = len(rows)
+
+            kept = self.frame[~self.frame['period_start'].isin(affected)]
+            self.frame = (pd.concat([kept, self._aggregate(rows)], ignore_index=True)
+                          .sort_values('period_start', kind='stable')
+                          .reset_index(drop=True))
+
+    def query(self, raw: pd.DataFrame, start=None, end=None) -> pd.DataFrame:
+        """
+        Rollup rows for the periods overlapping a date range
+
+        Complete periods come from the materialized table (built on first use);
+        the open period is aggregated from the raw rows.
+
+        Args:
+            raw: Raw rows sorted by date
+            start: Optional first date of the range
+            end: Optional last date of the range
+
+        Returns:
+            DataFrame of rollup rows sorted by period, with a boolean `partial`
+            column marking the open period
+        """
+        if self.frame is None:
+            self.build(raw)
+
+        first = period_starts([start], self.period)[0] if start is not None else None
+        last = pd.Timestamp(end) if end is not None else None
+
+        closed = self.frame
+        if first is not None:
+            closed = closed[closed['period_start'] >= first]
+        if last is not None:
+            closed = closed[closed['period_start'] <= last]
+        closed = closed.assign(partial=False)
+
+        if (self.open_start is None or (first is not None and self.open_start < first)
+                or (last is not None and self.open_start > last)):
+            return closed.reset_index(drop=True)
+
+        with stage(f"rollup.{self.name}.open_period"):
+            current = self._aggregate(raw.iloc[self._position(raw, self.open_start):])
+        return pd.concat([closed, current.assign(partial=True)], ignore_index=True)
+
+    def _aggregate(self, rows: pd.DataFrame) -> pd.DataFrame:
+        # Frames built from no records have no columns at all
+        dates = rows['date'] if 'date' in rows else []
+        return self.aggregate(rows, period_starts(dates, self.period))
+
+    def _latest_period(self, raw: pd.DataFrame) -> Optional[pd.Timestamp]:
+        if raw.empty:
+            return None
+        return period_starts([raw['date'].iloc[-1]], self.period)[0]
+
+    @staticmethod
+    def _position(raw: pd.DataFrame, start: Optional[pd.Timestamp]) -> int:
+        # First row on or after `start`; the daily tables hold datetime.date objects
+        if start is None:
+            return len(raw)
+        column = raw['date']
+        value = start if pd.api.types.is_datetime64_any_dtype(column) else start.date()
+        return int(column.searchsorted(value, side='left'))
+
+
+def create_rollups(name: str, aggregate: Callable[[pd.DataFrame, pd.Series], pd.DataFrame],
+                   periods: Iterable[str] = PERIODS) -> Dict[str, RollupTable]:
+    """
+    One unbuilt RollupTable per period for the same raw table and aggregation
+
+    Args:
+        name: Table name
+        aggregate: Aggregation function, e.g. aggregate_workouts
+        periods: Periods to maintain
+
+    Returns:
+        Dictionary of {period: RollupTable}
+    """
+    return {period: RollupTable(name, period, aggregate) for period in periods}
+
+
+def rollup_records(df: pd.DataFrame) -> List[Dict]:
+    """
+    Convert rollup rows to JSON-ready records with ISO period starts and None for NaN
+
+    Args:
+        df: DataFrame returned by RollupTable.query
+
+    Returns:
+        List of dictionaries
+    """
+    df = df.assign(period_start=df['period_start'].dt.strftime('%Y-%m-%d'))
+    df = df.astype(object).where(df.notna(), None)
+    return df.to_dict('records')
@@ -0,0 +1,291 @@
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, Callable, Tuple, Union
+
+from utils.formulas import calculate_tdee
+
+EXERCISE_SCOPE = 'exercise'
+GLOBAL_SCOPE = 'global'
+
+
+class RuleContext:
+    """
+    Memoizing view over the analyzers shared by every rule of one evaluation
+
+    Each analyzer call is made at most once per context, so rules and the
+    insight builder can ask for the same numbers without recomputing them.
+    """
+
+    def __init__(self, workout_analyzer, nutrition_analyzer,
+                 height_cm: Optional[float] = None, age_years: Optional[int] = None,
+                 sex: Optional[str] = None):
+        """
+        Initialize with the analyzers and the user's profile
+
+        Args:
+            workout_analyzer: WorkoutAnalyzer instance
+            nutrition_analyzer: NutritionAnalyzer instance
+            height_cm: Height in centimeters (needed by energy metrics)
+            age_years: Age in years (needed by energy metrics)
+            sex: 'M' for male, 'F' for female (needed by energy metrics)
+        """
+        self.workout_analyzer = workout_analyzer
+        self.nutrition_analyzer = nutrition_analyzer
+        self.height_cm = height_cm
+        self.age_years = age_years
+        self.sex = sex
+        self._cache: Dict[Tuple, Any] = {}
+
+    def _memo(self, key: Tuple, compute: Callable[[], Any]) -> Any:
+        if key not in self._cache:
+            self._cache[key] = compute()
+        return self._cache[key]
+
+    def volume_trends(self, weeks: int) -> pd.DataFrame:
+        return self._memo(('volume_trends', weeks),
+                          lambda: self.workout_analyzer.get_volume_trends(weeks))
+
+    def workout_frequency(self, weeks: int) -> Dict[str, int]:
+        return self._memo(('workout_frequency', weeks),
+                          lambda: self.workout_analyzer.get_workout_frequency(weeks=weeks))
+
+    def weight_trend(self, weeks: int) -> Tuple[float, bool]:
+        return self._memo(('weight_trend', weeks),
+                          lambda: self.nutrition_analyzer.get_weight_trend(weeks=weeks))
+
+    def macro_ratios(self, days: int) -> Dict[str, float]:
+        return self._memo(('macro_ratios', days),
+                          lambda: self.nutrition_analyzer.get_macronutrient_ratios(days=days))
+
+    def latest_weight(self) -> Optional[float]:
+        def compute():
+            weight_df = self.nutrition_analyzer.weight_df
+            if weight_df is None or weight_df.empty:
+                return None
+            return weight_df.iloc[-1]['weight']
+        return self._memo(('latest_weight',), compute)
+
+    def estimated_tdee(self) -> Optional[float]:
+        return self._memo(('estimated_tdee',), lambda: self.nutrition_analyzer.estimate_tdee(
+            height_cm=self.height_cm,
+            age_years=self.age_years,
+            sex=self.sex
+        ))
+
+    def theoretical_tdee(self, activity_multiplier: float = 1.55) -> Optional[float]:
+        def compute():
+            if not self.latest_weight():
+                return None
+            bmr = self.nutrition_analyzer.estimate_bmr(self.height_cm, self.age_years, self.sex)
+            return calculate_tdee(bmr, activity_multiplier)
+        return self._memo(('theoretical_tdee', activity_multiplier), compute)
+
+
+@dataclass
+class Metric:
+    """
+    A named value rules can depend on
+
+    Exercise-scope metrics return a Series indexed by exercise name, global
+    metrics return a scalar (None is stored as NaN).
+    """
+    name: str
+    scope: str
+    compute: Callable[[RuleContext], Any]
+
+
+@dataclass
+class Rule:
+    """
+    A declarative recommendation rule
+
+    The predicate receives a DataFrame with one column per declared metric
+    (one row per exercise for exercise-scope rules, a single row for global
+    rules) and returns a boolean mask. The message is either a format
+    template over the row's metrics (plus 'exercise') or a callable taking
+    the row as a dictionary.
+    """
+    name: str
+    type: str
+    scope: str
+    metrics: Tuple[str, ...]
+    predicate: Callable[[pd.DataFrame], Any]
+    message: Union[str, Callable[[Dict[str, Any]], str]]
+    priority: str = 'medium'
+
+
+def _nan_if_none(value: Any) -> Any:
+    return np.nan if value is None else value
+
+
+DEFAULT_METRICS = [
+    Metric('volume_change_pct_8w', EXERCISE_SCOPE,
+           lambda ctx: ctx.volume_trends(8)['percent_change']),
+    Metric('volume_improving_8w', EXERCISE_SCOPE,
+           lambda ctx: ctx.volume_trends(8)['is_improving']),
+    Metric('workouts_4w', GLOBAL_SCOPE,
+           lambda ctx: sum(ctx.workout_frequency(4).values())),
+    Metric('protein_pct_14d', GLOBAL_SCOPE,
+           lambda ctx: ctx.macro_ratios(14)['protein_pct']),
+    Metric('latest_weight', GLOBAL_SCOPE,
+           lambda ctx: _nan_if_none(ctx.latest_weight())),
+    Metric('estimated_tdee', GLOBAL_SCOPE,
+           lambda ctx: _nan_if_none(ctx.estimated_tdee() if ctx.latest_weight() else None)),
+    Metric('theoretical_tdee', GLOBAL_SCOPE,
+           lambda ctx: _nan_if_none(ctx.theoretical_tdee(1.55))),
+]
+
+
+DEFAULT_RULES = [
+    Rule(
+        name='stalled_exercise',
+        type='training',
+        scope=EXERCISE_SCOPE,
+        metrics=('volume_change_pct_8w', 'volume_improving_8w'),
+        predicate=lambda m: ~m['volume_improving_8w'] | (m['volume_change_pct_8w'] < 5.0),
+        message="Progress for {exercise} has stalled. Consider varying rep ranges, adding volume, or applying progressive overload techniques.",
+        priority='high'
+    ),
+    Rule(
+        name='low_workout_frequency',
+        type='training',
+        scope=GLOBAL_SCOPE,
+        metrics=('workouts_4w',),
+        predicate=lambda m: m['workouts_4w'] < 8,  # Less than 2 workouts per week
+        message="Your workout frequency is below optimal levels ({workouts_4w} workouts in the last 4 weeks). Aim for at least 3-4 workouts per week for better results.",
+        priority='medium'
+    ),
+    Rule(
+        name='low_protein',
+        type='nutrition',
+        scope=GLOBAL_SCOPE,
+        metrics=('protein_pct_14d',),
+        predicate=lambda m: m['protein_pct_14d'] < 25,
+        message="Your protein intake is low at {protein_pct_14d}% of calories. For optimal muscle growth and recovery, aim for 30-35% of calories from protein.",
+        priority='high'
+    ),
+    Rule(
+        name='tdee_mismatch',
+        type='nutrition',
+        scope=GLOBAL_SCOPE,
+        metrics=('estimated_tdee', 'theoretical_tdee'),
+        # More than 15% difference between estimated and theoretical expenditure
+        predicate=lambda m: (m['estimated_tdee'] > 0) &
+                            ((m['estimated_tdee'] - m['theoretical_tdee']).abs() > m['theoretical_tdee'] * 0.15),
+        message=lambda row: f"Your estimated energy expenditure ({int(row['estimated_tdee'])} kcal) differs significantly from theoretical calculations ({int(row['theoretical_tdee'])} kcal). This could indicate inaccurate calorie tracking or an unusually high/low activity level.",
+        priority='medium'
+    ),
+]
+
+
+class RuleEngine:
+    """
+    Evaluates recommendation rules in one batch
+
+    The engine collects the union of metrics required by the selected rules,
+    computes each of them once into an exercise table and a global row, and
+    evaluates every predicate as a vectorized mask over those tables.
+    Messages are only formatted for the rows that matched.
+    """
+
+    def __init__(self, rules: Optional[List[Rule]] = None, metrics: Optional[List[Metric]] = None):
+        """
+        Initialize with rules and metric definitions
+
+        Args:
+            rules: Rules to evaluate, in output order (default: DEFAULT_RULES)
+            metrics: Metric definitions available to rules (default: DEFAULT_METRICS)
+        """
+        self.rules = list(DEFAULT_RULES if rules is None else rules)
+        self.metrics = {m.name: m for m in (DEFAULT_METRICS if metrics is None else metrics)}
+
+        for rule in self.rules:
+            self._check_rule(rule)
+
+    def _check_rule(self, rule: Rule):
+        for name in rule.metrics:
+            if name not in self.metrics:
+                raise ValueError(f"Rule '{rule.name}' depends on unknown metric '{name}'")
+            if self.metrics[name].scope == EXERCISE_SCOPE and rule.scope == GLOBAL_SCOPE:
+                raise ValueError(f"Global rule '{rule.name}' cannot use exercise metric '{name}'")
+
+    def add_rule(self, rule: Rule):
+        """Register an additional rule"""
+        self._check_rule(rule)
+        self.rules.append(rule)
+
+    def add_metric(self, metric: Metric):
+        """Register an additional metric"""
+        self.metrics[metric.name] = metric
+
+    def compute_metrics(self, context: RuleContext,
+                        names: List[str]) -> Tuple[pd.DataFrame, Dict[str, Any]]:
+        """
+        Compute the requested metrics once each
+
+        Args:
+            context: RuleContext to compute from
+            names: Metric names to compute
+
+        Returns:
+            Tuple of (exercise metrics DataFrame, global metrics dictionary)
+        """
+        exercise_columns = {}
+        global_values = {}
+        for name in dict.fromkeys(names):
+            metric = self.metrics[name]
+            if metric.scope == EXERCISE_SCOPE:
+                exercise_columns[name] = metric.compute(context)
+            else:
+                global_values[name] = metric.compute(context)
+
+        exercise_metrics = pd.DataFrame(exercise_columns)
+        exercise_metrics.index.name = 'exercise'
+        return exercise_metrics, global_values
+
+    def evaluate(self, context: RuleContext,
+                 types: Optional[List[str]] = None) -> List[Dict[str, Any]]:
+        """
+        Evaluate the rules and build recommendations
+
+        Args:
+            context: RuleContext to evaluate against
+            types: Only evaluate rules of these recommendation types (default: all)
+
+        Returns:
+            List of recommendation dictionaries with 'type', 'message', and 'priority'
+        """
+        rules = [r for r in self.rules if types is None or r.type in types]
+        needed = [name for rule in rules for name in rule.metrics]
+        exercise_metrics, global_values = self.compute_metrics(context, needed)
+        global_row = pd.DataFrame([global_values])
+
+        # Global metrics are broadcast onto the exercise table
+        for name, value in global_values.items():
+            exercise_metrics[name] = value
+
+        recommendations = []
+        for rule in rules:
+            table = exercise_metrics if rule.scope == EXERCISE_SCOPE else global_row
+            if table.empty:
+                continue
+
+            mask = np.asarray(rule.predicate(table[list(rule.metrics)]), dtype=bool)
+            matched = table[mask]
+            for key, values in zip(matched.index, matched.to_dict('records')):
+                if rule.scope == EXERCISE_SCOPE:
+                    values['exercise'] = key
+                recommendations.append({
+                    'type': rule.type,
+                    'message': self._format(rule, values),
+                    'priority': rule.priority
+                })
+
+        return recommendations
+
+    @staticmethod
+    def _format(rule: Rule, values: Dict[str, Any]) -> str:
+        if callable(rule.message):
+            return rule.message(values)
+        return rule.message.format(**values)
@@ -0,0 +1,142 @@
+import pandas as pd
+import numpy as np
+from dataclasses import dataclass
+from typing import List, Optional, Sequence
+
+from analysis.nutrition_analysis import NutritionAnalyzer
+from utils.formulas import GOAL_CALORIE_ADJUSTMENTS
+
+# Approximate energy content of one kilogram of body weight
+KCAL_PER_KG = 7700
+
+DEFAULT_GOALS = ('muscle_gain', 'maintenance', 'fat_loss')
+DEFAULT_ACTIVITY_MULTIPLIERS = (1.2, 1.375, 1.55, 1.725, 1.9)
+DEFAULT_ADJUSTMENTS_KCAL = (250, 500)
+DEFAULT_HORIZONS_DAYS = (7, 14, 28, 56, 84)
+
+
+@dataclass
+class ScenarioGrid:
+    """
+    Calorie targets and projected weights for every combination of scenario inputs
+
+    Array axes are (goal, tdee source, adjustment[, horizon]). The TDEE sources
+    are the analyzer's own estimate (if requested and available) followed by
+    one theoretical TDEE per activity multiplier.
+    """
+    goals: List[str]
+    tdee_sources: List[str]
+    activity_multipliers: np.ndarray      # (T,), NaN for the estimated source
+    tdee_kcal: np.ndarray                 # (T,)
+    adjustments_kcal: np.ndarray          # (A,)
+    horizons_days: np.ndarray             # (H,)
+    start_weight_kg: float
+    expenditure_kcal: float               # Estimated TDEE the projections assume, NaN if none
+    calorie_targets: np.ndarray           # (G, T, A)
+    projected_weight_kg: np.ndarray       # (G, T, A, H)
+
+    def to_frame(self) -> pd.DataFrame:
+        """
+        Flatten the grid into a long-form DataFrame
+
+        Returns:
+            DataFrame with one row per (goal, tdee_source, adjustment, horizon)
+        """
+        g, t, a, h = np.meshgrid(
+            np.arange(len(self.goals)), np.arange(len(self.tdee_sources)),
+            np.arange(len(self.adjustments_kcal)), np.arange(len(self.horizons_days)),
+            indexing='ij'
+        )
+        g, t, a, h = g.ravel(), t.ravel(), a.ravel(), h.ravel()
+
+        return pd.DataFrame({
+            'goal': np.asarray(self.goals, dtype=object)[g],
+            'tdee_source': np.asarray(self.tdee_sources, dtype=object)[t],
+            'activity_multiplier': self.activity_multipliers[t],
+            'tdee_kcal': self.tdee_kcal[t],
+            'adjustment_kcal': self.adjustments_kcal[a],
+            'calorie_target': self.calorie_targets[g, t, a],
+            'horizon_days': self.horizons_days[h],
+            'projected_weight_kg': self.projected_weight_kg.ravel()
+        })
+
+
+def sweep_calorie_scenarios(nutrition_analyzer: NutritionAnalyzer, height_cm: float,
+                            age_years: int, sex: str,
+                            goals: Sequence[str] = DEFAULT_GOALS,
+                            activity_multipliers: Sequence[float] = DEFAULT_ACTIVITY_MULTIPLIERS,
+                            adjustments_kcal: Sequence[float] = DEFAULT_ADJUSTMENTS_KCAL,
+                            horizons_days: Sequence[int] = DEFAULT_HORIZONS_DAYS,
+                            include_estimated: bool = True,
+                            minimum_calories: Optional[float] = None) -> ScenarioGrid:
+    """
+    Compute calorie targets and weight projections for a grid of scenarios in one call
+
+    Targets are TDEE plus the adjustment in the goal's direction (surplus for
+    muscle gain, deficit for fat loss, none for maintenance). Weight curves
+    project the daily energy balance of each target against the analyzer's
+    estimated TDEE when it exists, otherwise against the target's own TDEE.
+
+    Args:
+        nutrition_analyzer: NutritionAnalyzer with weight data
+        height_cm: Height in centimeters
+        age_years: Age in years
+        sex: 'M' for male, 'F' for female
+        goals: Goals to compare ('muscle_gain', 'fat_loss', 'maintenance')
+        activity_multipliers: Activity multipliers for theoretical TDEE
+        adjustments_kcal: Surplus/deficit sizes in calories per day
+        horizons_days: Projection horizons in days
+        include_estimated: Include the analyzer's TDEE estimate as a TDEE source
+        minimum_calories: Optional floor applied to every target
+
+    Returns:
+        ScenarioGrid with targets and projected weights
+    """
+    if nutrition_analyzer.weight_df.empty:
+        raise ValueError("Weight data is required to sweep calorie scenarios")
+
+    for goal in goals:
+        if goal not in GOAL_CALORIE_ADJUSTMENTS:
+            raise ValueError(f"Unknown goal '{goal}'")
+
+    start_weight = float(nutrition_analyzer.weight_df.iloc[-1]['weight'])
+    bmr = nutrition_analyzer.estimate_bmr(height_cm, age_years, sex)
+
+    multipliers = np.asarray(activity_multipliers, dtype=float)
+    tdee = bmr * multipliers
+    sources = [f"theoretical@{m:g}" for m in multipliers]
+
+    estimated_tdee = None
+    if include_estimated:
+        estimated_tdee = nutrition_analyzer.estimate_tdee(height_cm, age_years, sex)
+    if estimated_tdee:
+        tdee = np.concatenate([[estimated_tdee], tdee])
+        multipliers = np.concatenate([[np.nan], multipliers])
+        sources = ['estimated'] + sources
+
+    directions = np.sign([GOAL_CALORIE_ADJUSTMENTS[goal] for goal in goals]).astype(float)
+    adjustments = np.asarray(adjustments_kcal, dtype=float)
+    horizons = np.asarray(horizons_days, dtype=float)
+
+    # (G, 1, 1) * (1, 1, A) + (1, T, 1) -> (G, T, A)
+    targets = directions[:, None, None] * adjustments[None, None, :] + tdee[None, :, None]
+    if minimum_calories is not None:
+        targets = np.maximum(targets, minimum_calories)
+
+    # Daily balance against the best known expenditure, then (G, T, A, 1) * (H,) -> (G, T, A, H)
+    expenditure = estimated_tdee if estimated_tdee else tdee[None, :, None]
+    daily_balance = targets - expenditure
+    projected = start_weight + (daily_balance[..., None] * horizons) / KCAL_PER_KG
+
+    return ScenarioGrid(
+        goals=list(goals),
+        tdee_sources=sources,
+        activity_multipliers=multipliers,
+        tdee_kcal=tdee,
+        adjustments_kcal=adjustments,
+        horizons_days=horizons,
+        start_weight_kg=start_weight,
+        expenditure_kcal=float(estimated_tdee) if estimated_tdee else float('nan'),
+        calorie_targets=targets,
+        projected_weight_kg=projected
+    )
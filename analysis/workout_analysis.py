@@ -5,7 +5,12 @@ from datetime import date, timedelta
 from collections import defaultdict
 
 from data_models.workout_models import WorkoutData, ExerciseData, SetData
-from utils.formulas import estimate_one_rep_max
+from data_models.frames import workouts_to_frame, upsert_sorted, SET_KEYS
+from utils.exercise_names import default_index
+from utils.formulas import estimate_one_rep_max_array
+from utils.instrumentation import stage
+from analysis.rollups import create_rollups, aggregate_workouts, aggregate_exercises
+from analysis.forecasting import forecast_exercises, ExerciseForecasts, DEFAULT_HORIZONS_DAYS
 
 class WorkoutAnalyzer:
     """
@@ -20,26 +25,215 @@ class WorkoutAnalyzer:
             workout_data: List of WorkoutData objects
         """
         self.workout_data = sorted(workout_data, key=lambda x: x.date)
-        self._process_data()
+        with stage('workout_analyzer.process') as timing:
+            self._process_data()
+            timing.rows = len(self.sets_df)
+        self._create_rollups()
+    
+    @classmethod
+    def from_frame(cls, sets_df: pd.DataFrame) -> 'WorkoutAnalyzer':
+        """
+        Create an analyzer from a per-set DataFrame instead of parsed workouts
+        
+        Args:
+            sets_df: Per-set DataFrame laid out like workouts_to_frame's, sorted by date
+            
+        Returns:
+            WorkoutAnalyzer over the given sets; its workout_data list is empty
+        """
+        analyzer = cls.__new__(cls)
+        analyzer.workout_data = []
+        with stage('workout_analyzer.process', rows=len(sets_df)):
+            analyzer.sets_df = sets_df.reset_index(drop=True)
+            analyzer.workouts_df = pd.DataFrame({
+                'date': sets_df['date'],
+                'routine_name': sets_df['routine_name'].fillna("Unnamed")
+            }).drop_duplicates().reset_index(drop=True)
+            analyzer._build_sessions()
+        analyzer._create_rollups()
+        return analyzer
+    
+    @classmethod
+    def from_store(cls, store, user_id: str = 'default', start: Optional[date] = None,
+                   end: Optional[date] = None, exercises: Optional[List[str]] = None) -> 'WorkoutAnalyzer':
+        """
+        Create an analyzer from a date range of a HistoryStore
+        
+        Args:
+            store: storage.history_store.HistoryStore
+            user_id: Owner of the records
+            start: First date to include
+            end: Last date to include
+            exercises: Optional exercise names to include
+            
+        Returns:
+            WorkoutAnalyzer over the selected sets
+        """
+        with stage('history.read_sets') as timing:
+            sets_df = store.read_sets(user_id, start, end, exercises)
+            timing.rows = len(sets_df)
+        return cls.from_frame(sets_df)
+    
+    @classmethod
+    def from_file(cls, path: str) -> 'WorkoutAnalyzer':
+        """
+        Create an analyzer from a Parquet or Arrow sets file written by storage.columnar
+        
+        Args:
+            path: .parquet or .arrow file
+            
+        Returns:
+            WorkoutAnalyzer over the file's sets
+        """
+        from storage.columnar import read_frame
+        return cls.from_frame(read_frame(path, 'sets'))
     
     def _process_data(self):
         """Process the workout data for analysis"""
-        # Group workouts by exercise name
-        self.exercise_workouts = defaultdict(list)
-        for workout in self.workout_data:
-            for set_data in workout.sets:
-                self.exercise_workouts[set_data.exercise_name].append((workout.date, set_data))
-        
-        # Calculate volume per exercise per workout
-        self.exercise_volumes = defaultdict(lambda: defaultdict(float))
-        for exercise, sets in self.exercise_workouts.items():
-            for workout_date, set_data in sets:
-                # Skip if missing weight or reps
-                if set_data.weight_kg is None or set_data.reps is None:
-                    continue
-                
-                # Add to total volume (weight * reps)
-                self.exercise_volumes[exercise][workout_date] += set_data.weight_kg * set_data.reps
+        # Flat per-set table
+        self.sets_df = workouts_to_frame(self.workout_data)
+        
+        # One row per workout, used for frequency counts
+        self.workouts_df = pd.DataFrame({
+            'date': pd.to_datetime([w.date for w in self.workout_data]),
+            'routine_name': [w.routine_name or "Unnamed" for w in self.workout_data]
+        })
+        
+        self._build_sessions()
+    
+    def _build_sessions(self):
+        """Aggregate valid sets into one row per exercise per workout date"""
+        self.sessions_df, self.exercises = aggregate_sessions(self.sets_df)
+    
+    def _create_rollups(self):
+        """Set up the weekly and monthly rollup tables; they are built on first use"""
+        self.rollups = {
+            'workouts': create_rollups('workouts', aggregate_workouts),
+            'exercises': create_rollups('exercises', aggregate_exercises)
+        }
+    
+    def build_rollups(self):
+        """Materialize every rollup table now, e.g. for a dataset that stays resident"""
+        for tables in self.rollups.values():
+            for table in tables.values():
+                if not table.is_built:
+                    table.build(self.sets_df)
+    
+    def upsert_workouts(self, workout_data: List[WorkoutData]) -> Dict[str, int]:
+        """
+        Merge new or corrected workouts into the analysis
+        
+        Sets are matched on (date, workout name, exercise, set label; see
+        data_models.frames.set_labels); incoming sets replace matching ones.
+        Only the sessions on the dates touched by
+        the new sets are re-aggregated, so the cost follows the size of the
+        update rather than the history.
+        
+        Args:
+            workout_data: List of WorkoutData objects with the new sets
+            
+        Returns:
+            Dictionary with the number of 'sets' merged and existing sets 'replaced'
+        """
+        incoming = workouts_to_frame(sorted(workout_data, key=lambda x: x.date))
+        if incoming.empty:
+            return {'sets': 0, 'replaced': 0}
+        
+        with stage('workout_analyzer.upsert', rows=len(incoming)):
+            stored = len(self.sets_df)
+            self.sets_df, replaced = upsert_sorted(self.sets_df, incoming, SET_KEYS)
+            merged = len(self.sets_df) - stored + replaced
+            
+            workouts = pd.DataFrame({
+                'date': incoming['date'],
+                'routine_name': incoming['routine_name'].fillna("Unnamed")
+            })
+            self.workouts_df, _ = upsert_sorted(self.workouts_df, workouts, ['date', 'routine_name'])
+            
+            # Re-aggregate every session on the affected dates
+            dates = pd.unique(incoming['date'])
+            start = int(self.sets_df['date'].searchsorted(dates.min(), side='left'))
+            affected_sets = self.sets_df.iloc[start:]
+            affected_sets = affected_sets[affected_sets['date'].isin(dates)]
+            sessions, exercises = aggregate_sessions(affected_sets)
+            
+            kept = self.sessions_df[~self.sessions_df['date'].isin(dates)]
+            self.sessions_df = (pd.concat([kept, sessions], ignore_index=True)
+                                .sort_values(['exercise_name', 'date'], kind='stable')
+                                .reset_index(drop=True))
+            self.exercises.extend(name for name in exercises if name not in self.exercises)
+            
+            for tables in self.rollups.values():
+                for table in tables.values():
+                    table.refresh(self.sets_df, dates)
+        
+        return {'sets': merged, 'replaced': replaced}
+    
+    @property
+    def exercise_volumes(self) -> Dict[str, Dict[date, float]]:
+        """Volume per exercise per workout date, as nested dictionaries"""
+        volumes = {exercise: {} for exercise in self.exercises}
+        for exercise, day, volume in zip(self.sessions_df['exercise_name'],
+                                         self.sessions_df['date'].dt.date,
+                                         self.sessions_df['volume_kg']):
+            volumes[exercise][day] = volume
+        return volumes
+    
+    def find_exercise(self, exercise_name: str) -> str:
+        """
+        Name under which an exercise is tracked, for a name as the user spells it
+        
+        Exports are stored under canonical names, so e.g. 'Dumbbell Bench Press'
+        finds 'Bench Press (Dumbbell)'.
+        
+        Args:
+            exercise_name: Exercise name as exported, typed or canonical
+            
+        Returns:
+            The name itself if it is tracked, else its canonical name
+        """
+        if exercise_name in self.exercises:
+            return exercise_name
+        return default_index().resolve(exercise_name).name
+    
+    def get_period_totals(self, period: str = 'week', start: Optional[date] = None,
+                          end: Optional[date] = None) -> pd.DataFrame:
+        """
+        Workouts, training days, sets and tonnage per week or month
+        
+        Complete periods are read from the materialized rollup; only the
+        latest, still open period is aggregated from the raw sets.
+        
+        Args:
+            period: 'week' or 'month'
+            start: Optional first date of the range
+            end: Optional last date of the range
+            
+        Returns:
+            DataFrame with period_start, workouts, training_days, sets,
+            tonnage_kg and partial (True for the open period)
+        """
+        return self.rollups['workouts'][period].query(self.sets_df, start, end)
+    
+    def get_exercise_rollup(self, period: str = 'week', exercise_name: Optional[str] = None,
+                            start: Optional[date] = None, end: Optional[date] = None) -> pd.DataFrame:
+        """
+        Per-exercise sessions, sets, tonnage and bests per week or month
+        
+        Args:
+            period: 'week' or 'month'
+            exercise_name: Optional exercise to select
+            start: Optional first date of the range
+            end: Optional last date of the range
+            
+        Returns:
+            DataFrame with period_start, exercise_name, sessions, sets, tonnage_kg,
+            max_weight_kg, best_1rm_kg and partial
+        """
+        rollup = self.rollups['exercises'][period].query(self.sets_df, start, end)
+        if exercise_name is not None:
+            rollup = rollup[rollup['exercise_name'] == self.find_exercise(exercise_name)].reset_index(drop=True)
+        return rollup
     
     def get_exercise_progress(self, exercise_name: str) -> pd.DataFrame:
         """
@@ -51,49 +245,59 @@ class WorkoutAnalyzer:
         Returns:
             DataFrame with exercise progress metrics (date, max_weight, max_reps, volume, estimated_1rm)
         """
-        if exercise_name not in self.exercise_workouts:
+        progress_df = self.sessions_df[self.sessions_df['exercise_name'] == self.find_exercise(exercise_name)]
+        if progress_df.empty:
             return pd.DataFrame()
         
-        # Prepare data structure
-        progress_data = []
-        
-        # Group sets by workout date
-        sets_by_date = defaultdict(list)
-        for date_obj, set_data in self.exercise_workouts[exercise_name]:
-            sets_by_date[date_obj].append(set_data)
-        
-        # Process each workout date
-        for date_obj, sets in sorted(sets_by_date.items()):
-            # Skip if no weight or reps data
-            valid_sets = [s for s in sets if s.weight_kg is not None and s.reps is not None]
-            if not valid_sets:
-                continue
-            
-            # Calculate metrics
-            max_weight = max([s.weight_kg for s in valid_sets])
-            max_reps = max([s.reps for s in valid_sets])
-            total_volume = sum([s.weight_kg * s.reps for s in valid_sets])
-            
-            # Find the set with the highest estimated 1RM
-            best_1rm = 0
-            for set_data in valid_sets:
-                est_1rm = estimate_one_rep_max(set_data.weight_kg, set_data.reps)
-                best_1rm = max(best_1rm, est_1rm)
-            
-            progress_data.append({
-                'date': date_obj,
-                'max_weight_kg': max_weight,
-                'max_reps': max_reps,
-                'volume_kg': total_volume,
-                'estimated_1rm_kg': best_1rm
-            })
+        progress_df = progress_df[['date', 'max_weight_kg', 'max_reps', 'volume_kg', 'estimated_1rm_kg']]
+        progress_df = progress_df.assign(
+            date=progress_df['date'].dt.date,
+            max_reps=progress_df['max_reps'].astype(int)
+        )
+        return progress_df.reset_index(drop=True)
+    
+    def get_volume_trends(self, weeks: int = 8) -> pd.DataFrame:
+        """
+        Calculate the volume trend of every exercise in one pass
+        
+        Each exercise is compared between its first and last session within
+        `weeks` of its own most recent session.
+        
+        Args:
+            weeks: Number of weeks to analyze (default: 8)
+            
+        Returns:
+            DataFrame indexed by exercise name with percent_change and is_improving
+        """
+        sessions = self.sessions_df
+        last_date = sessions.groupby('exercise_name')['date'].transform('max')
+        in_window = sessions[sessions['date'] >= last_date - pd.Timedelta(weeks=weeks)]
         
-        return pd.DataFrame(progress_data)
+        grouped = in_window.groupby('exercise_name', sort=False)['volume_kg']
+        first_volume = grouped.first().reindex(self.exercises)
+        last_volume = grouped.last().reindex(self.exercises)
+        enough = grouped.size().reindex(self.exercises, fill_value=0) >= 2
+        
+        with np.errstate(divide='ignore', invalid='ignore'):
+            percent_change = (last_volume - first_volume) / first_volume * 100
+        zero_start = first_volume == 0
+        
+        percent_change = percent_change.where(enough & ~zero_start, 0.0)
+        is_improving = np.where(zero_start, last_volume > 0, percent_change > 0) & enough
+        
+        return pd.DataFrame({
+            'percent_change': percent_change.astype(float),
+            'is_improving': is_improving.astype(bool)
+        }, index=pd.Index(self.exercises, name='exercise_name'))
     
     def get_volume_trend(self, exercise_name: str, weeks: int = 8) -> Tuple[float, bool]:
         """
         Calculate the trend in exercise volume over the specified period
         
+        The table of every exercise's trend is computed once per `weeks` and
+        kept until the sessions change, so calling this for each exercise
+        costs one pass over the sessions rather than one per call.
+        
         Args:
             exercise_name: Name of the exercise to analyze
             weeks: Number of weeks to analyze (default: 8)
@@ -101,35 +305,37 @@ class WorkoutAnalyzer:
         Returns:
             Tuple of (percent_change, is_improving)
         """
-        if exercise_name not in self.exercise_volumes:
+        exercise_name = self.find_exercise(exercise_name)
+        if exercise_name not in self.exercises:
             return (0.0, False)
         
-        # Get volume by date for this exercise
-        volumes = self.exercise_volumes[exercise_name]
-        if not volumes:
-            return (0.0, False)
-        
-        # Filter to the specified time period
-        end_date = max(volumes.keys())
-        start_date = end_date - timedelta(weeks=weeks)
-        
-        # Get the earliest and latest workout in this period
-        dates_in_range = [d for d in volumes.keys() if d >= start_date]
-        if len(dates_in_range) < 2:
-            return (0.0, False)
-        
-        first_date = min(dates_in_range)
-        last_date = max(dates_in_range)
-        
-        # Calculate percent change
-        first_volume = volumes[first_date]
-        last_volume = volumes[last_date]
-        
-        if first_volume == 0:
-            return (0.0, last_volume > 0)
+        # Keyed on the sessions table itself: upserts replace it, which drops the cache
+        cache = getattr(self, '_volume_trends', None)
+        if cache is None or cache[0] is not self.sessions_df:
+            cache = self._volume_trends = (self.sessions_df, {})
+        trends = cache[1].get(weeks)
+        if trends is None:
+            trends = cache[1][weeks] = self.get_volume_trends(weeks)
+        row = trends.loc[exercise_name]
+        return (float(row['percent_change']), bool(row['is_improving']))
+    
+    def get_progress_forecasts(self, horizons_days: List[int] = DEFAULT_HORIZONS_DAYS,
+                               targets: Optional[Dict[str, float]] = None,
+                               weeks: int = 16) -> ExerciseForecasts:
+        """
+        Project the estimated 1RM of every exercise from a robust trend fit
         
-        percent_change = ((last_volume - first_volume) / first_volume) * 100
-        return (percent_change, percent_change > 0)
+        Args:
+            horizons_days: Days after the latest session to project to
+            targets: Optional target e1RM in kg, as {exercise: kg} or one value for all
+            weeks: Weeks of each exercise's recent history to fit (default: 16)
+            
+        Returns:
+            ExerciseForecasts with projections, confidence bands and days to each target
+        """
+        if isinstance(targets, dict):
+            targets = {self.find_exercise(name): target for name, target in targets.items()}
+        return forecast_exercises(self.sessions_df, self.exercises, horizons_days, targets, window_weeks=weeks)
     
     def get_workout_frequency(self, weeks: int = 4) -> Dict[str, int]:
         """
@@ -141,21 +347,18 @@ class WorkoutAnalyzer:
         Returns:
             Dictionary of {routine_name: count}
         """
-        if not self.workout_data:
+        if self.workouts_df.empty:
             return {}
         
         # Define time period
-        end_date = max([w.date for w in self.workout_data])
-        start_date = end_date - timedelta(weeks=weeks)
+        end_date = self.workouts_df['date'].max()
+        start_date = end_date - pd.Timedelta(weeks=weeks)
         
         # Count workouts by routine name
-        routine_counts = defaultdict(int)
-        for workout in self.workout_data:
-            if workout.date >= start_date and workout.date <= end_date:
-                routine_name = workout.routine_name or "Unnamed"
-                routine_counts[routine_name] += 1
+        in_range = self.workouts_df[self.workouts_df['date'] >= start_date]
+        routine_counts = in_range.groupby('routine_name', sort=False).size()
         
-        return dict(routine_counts)
+        return {name: int(count) for name, count in routine_counts.items()}
     
     def identify_stalled_exercises(self, weeks: int = 8, threshold: float = 5.0) -> List[str]:
         """
@@ -168,11 +371,36 @@ class WorkoutAnalyzer:
         Returns:
             List of exercise names that have stalled
         """
-        stalled = []
-        
-        for exercise in self.exercise_volumes.keys():
-            percent_change, is_improving = self.get_volume_trend(exercise, weeks)
-            if not is_improving or percent_change < threshold:
-                stalled.append(exercise)
+        trends = self.get_volume_trends(weeks)
+        stalled = ~trends['is_improving'] | (trends['percent_change'] < threshold)
+        return list(trends.index[stalled])
+
+
+def aggregate_sessions(sets_df: pd.DataFrame) -> Tuple[pd.DataFrame, List[str]]:
+    """
+    Aggregate sets with both weight and reps into one row per exercise per workout date
+    
+    Args:
+        sets_df: Per-set DataFrame as built by workouts_to_frame
         
-        return stalled
\ No newline at end of file
+    Returns:
+        Tuple of (sessions DataFrame sorted by exercise and date,
+        exercise names in order of their first valid set)
+    """
+    valid = sets_df[sets_df['weight_kg'].notna() & sets_df['reps'].notna()]
+    valid = valid.assign(
+        volume_kg=valid['weight_kg'] * valid['reps'],
+        estimated_1rm_kg=estimate_one_rep_max_array(valid['weight_kg'], valid['reps'])
+    )
+    
+    # Exercises in order of their first valid set
+    exercises = list(pd.unique(valid['exercise_name']))
+    
+    sessions = valid.groupby(['exercise_name', 'date'], sort=True).agg(
+        max_weight_kg=('weight_kg', 'max'),
+        max_reps=('reps', 'max'),
+        volume_kg=('volume_kg', 'sum'),
+        estimated_1rm_kg=('estimated_1rm_kg', 'max'),
+        set_count=('reps', 'size')
+    )
+    return sessions.reset_index(), exercises
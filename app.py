@@ -1,26 +1,571 @@
 #!/usr/bin/env python3
 # Flask API server for SynergyFit Insights
 
-from flask import Flask, request, jsonify
+from flask import Flask, Request, request, jsonify, url_for, g
+from werkzeug.exceptions import RequestEntityTooLarge
 from flask_cors import CORS
 import os
 import json
+import atexit
+import time
 import tempfile
 from datetime import datetime, timedelta
-import random
+from typing import List, Dict, Any, Optional, Tuple, TYPE_CHECKING
+
+# Import our analysis modules. The parsers, analyzers and history store (and
+# pandas/numpy with them) load on first use or during the startup warm-up, so
+# importing the app for health checks, tooling and worker boot stays fast.
+import parsers
+import analysis
+import storage
+from utils.lazy import lazy_import
+from utils.formulas import calculate_tdee, calculate_calorie_target
+from utils.instrumentation import stage, timed, start_trace, end_trace, add_listener, server_timing_header
+from server.jobs import JobManager, QueueFullError
+from server.cache import ResponseCache, digest_uploads
+from server.sessions import Dataset, DatasetStore
+from server.serialization import dumps, negotiate_encoding, compress
+from server.metrics import MetricsRegistry
+from server.validation import ValidatingUploadStream, UploadValidationError, check_upload
+from server.sync import load_sync_files, parse_sync_json
+
+np = lazy_import('numpy')
+pd = lazy_import('pandas')
+rollups = lazy_import('analysis.rollups')
+downsampling = lazy_import('utils.downsampling')
+
+if TYPE_CHECKING:
+    from analysis.workout_analysis import WorkoutAnalyzer
+    from analysis.nutrition_analysis import NutritionAnalyzer
+    from storage.history_store import HistoryStore
+
+
+
+class UploadRequest(Request):
+    """Request whose file uploads are validated while they stream in"""
+    
+    def _get_file_stream(self, total_content_length, content_type, filename=None, content_length=None):
+        return ValidatingUploadStream(max_bytes=app.config['MAX_UPLOAD_BYTES'],
+                                      max_rows=app.config['MAX_UPLOAD_ROWS'],
+                                      filename=filename)
 
-# Import our analysis modules
-from parsers.strong_parser import parse_strong_csv
-from parsers.mfp_parser import parse_mfp_csv_nutrition, parse_mfp_csv_weight
-from analysis.workout_analysis import WorkoutAnalyzer
-from analysis.nutrition_analysis import NutritionAnalyzer
-from analysis.insights import InsightGenerator
-from utils.formulas import calculate_bmr, calculate_tdee
 
 # Create Flask app
 app = Flask(__name__)
+app.request_class = UploadRequest
 CORS(app)  # Enable CORS for all routes
 
+# Upload limits: per-file size and row count, and the whole request's size
+# (three files plus the preferences form field)
+app.config.update(
+    MAX_UPLOAD_BYTES=int(os.environ.get('SYNERGYFIT_MAX_UPLOAD_BYTES', 64 * 1024 * 1024)),
+    MAX_UPLOAD_ROWS=int(os.environ.get('SYNERGYFIT_MAX_UPLOAD_ROWS', 1000000))
+)
+app.config['MAX_CONTENT_LENGTH'] = 3 * app.config['MAX_UPLOAD_BYTES'] + 1024 * 1024
+
+# Background analysis jobs: concurrency limit, queue size for admission control,
+# how long finished jobs are kept, and the longest allowed long-poll
+app.config.update(
+    ANALYSIS_JOB_WORKERS=int(os.environ.get('SYNERGYFIT_JOB_WORKERS', 2)),
+    ANALYSIS_JOB_QUEUE_SIZE=int(os.environ.get('SYNERGYFIT_JOB_QUEUE_SIZE', 16)),
+    ANALYSIS_JOB_RETENTION_SECONDS=int(os.environ.get('SYNERGYFIT_JOB_RETENTION_SECONDS', 3600)),
+    ANALYSIS_JOB_MAX_WAIT_SECONDS=30
+)
+
+# /analyze response cache: in-memory entries, expiry, and optional on-disk tier
+app.config.update(
+    RESPONSE_CACHE_ENTRIES=int(os.environ.get('SYNERGYFIT_CACHE_ENTRIES', 128)),
+    RESPONSE_CACHE_TTL_SECONDS=int(os.environ.get('SYNERGYFIT_CACHE_TTL_SECONDS', 3600)),
+    RESPONSE_CACHE_DIR=os.environ.get('SYNERGYFIT_CACHE_DIR') or None
+)
+
+# Resident datasets: total memory budget and idle expiry
+app.config.update(
+    DATASET_STORE_MAX_BYTES=int(os.environ.get('SYNERGYFIT_DATASET_MAX_BYTES', 512 * 1024 * 1024)),
+    DATASET_IDLE_SECONDS=int(os.environ.get('SYNERGYFIT_DATASET_IDLE_SECONDS', 3600))
+)
+
+# Persistent per-user history (SQLite file); the /history endpoints are disabled when unset
+app.config.update(
+    HISTORY_DB=os.environ.get('SYNERGYFIT_HISTORY_DB') or None
+)
+
+# Per-stage timing: Server-Timing response headers and the /metrics endpoint
+app.config.update(
+    INSTRUMENTATION_ENABLED=os.environ.get('SYNERGYFIT_INSTRUMENTATION', '1') != '0'
+)
+
+# Production serving: run one warm-up analysis at startup
+app.config.update(
+    WARM_UP_ON_START=os.environ.get('SYNERGYFIT_WARM_UP', '1') != '0'
+)
+
+UPLOAD_FIELDS = ('strong_file', 'nutrition_file', 'weight_file')
+
+DAY_NS = 24 * 60 * 60 * 10**9
+
+
+def validate_uploads(require_all: bool = True):
+    """
+    Receive the request's uploads, validating them as they stream in
+    
+    Args:
+        require_all: Require all three uploads rather than at least one
+        
+    Returns:
+        An error response tuple, or None if the uploads are valid
+    """
+    try:
+        with stage('upload.receive') as timing:
+            files = request.files
+            timing.nbytes = request.content_length
+        
+        present = [field for field in UPLOAD_FIELDS if field in files]
+        if not present or (require_all and len(present) < len(UPLOAD_FIELDS)):
+            return missing_files_response()
+        
+        with stage('upload.validate') as timing:
+            timing.rows = 0
+            for field in present:
+                _, rows = check_upload(field, files[field].stream)
+                timing.rows += rows
+    except UploadValidationError as e:
+        return jsonify(e.to_dict()), e.status_code
+    except RequestEntityTooLarge:
+        return jsonify({
+            'error': f"Request is larger than the {app.config['MAX_CONTENT_LENGTH']} byte limit"
+        }), 413
+    return None
+
+
+def save_uploads(files, fields=UPLOAD_FIELDS) -> Dict[str, str]:
+    """
+    Save uploaded CSV files to temporary files
+    
+    Args:
+        files: The request's uploaded files
+        fields: Upload fields to save
+        
+    Returns:
+        Dictionary of {field_name: temporary_file_path}
+    """
+    paths = {}
+    with stage('upload.save') as timing:
+        try:
+            for field in fields:
+                with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as temp_file:
+                    paths[field] = temp_file.name
+                    files[field].save(temp_file)
+        except Exception:
+            remove_files(paths.values())
+            raise
+        timing.nbytes = sum(os.path.getsize(path) for path in paths.values())
+    return paths
+
+
+def remove_files(paths):
+    """Delete temporary files, ignoring ones that are already gone"""
+    for path in paths:
+        try:
+            os.unlink(path)
+        except OSError:
+            pass
+
+
+# Preferences that affect the analysis, with their defaults
+PREFERENCE_DEFAULTS = {
+    'height': 175,
+    'age': 30,
+    'sex': 'M',
+    'activityMultiplier': 1.55,
+    'goal': 'muscle_gain',
+    'targetExercises': [],
+    'maxChartPoints': None,         # Downsample chart series to about this many points
+    'chartDownsampling': 'lttb',    # 'lttb' or 'minmax'
+    'chartLayout': 'rows',          # 'rows' of {date, value} or 'columnar' {dates, values} arrays
+    'chartDateFormat': 'iso'        # 'iso' strings or 'epochDays' integers
+}
+
+
+def normalize_preferences(user_preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Keep only the preferences that affect the analysis, filling in defaults
+    
+    Args:
+        user_preferences: Raw preferences sent by the client
+        
+    Returns:
+        Preferences dictionary with every key of PREFERENCE_DEFAULTS
+    """
+    normalized = {}
+    for key, default in PREFERENCE_DEFAULTS.items():
+        value = user_preferences.get(key)
+        normalized[key] = default if value is None else value
+    return normalized
+
+
+def default_target_exercises(workout_analyzer: 'WorkoutAnalyzer', count: int = 3) -> List[str]:
+    """
+    Pick the most frequently trained exercises, breaking ties by name
+    
+    The choice is deterministic so identical uploads give identical responses.
+    """
+    session_counts = workout_analyzer.sessions_df['exercise_name'].value_counts()
+    ranked = sorted(session_counts.items(), key=lambda item: (-item[1], item[0]))
+    return [name for name, _ in ranked[:count]]
+
+
+def build_analysis_response(strong_path: str, nutrition_path: str, weight_path: str,
+                            user_preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Parse the exports and build the /analyze response payload
+    
+    Args:
+        strong_path: Path to the Strong CSV export
+        nutrition_path: Path to the MyFitnessPal nutrition CSV export
+        weight_path: Path to the MyFitnessPal weight CSV export
+        user_preferences: Parsed user preferences
+        
+    Returns:
+        Response payload dictionary
+    """
+    workout_analyzer, nutrition_analyzer = load_analyzers(strong_path, nutrition_path, weight_path)
+    return build_analysis_payload(workout_analyzer, nutrition_analyzer, user_preferences)
+
+
+def load_analyzers(strong_path: str, nutrition_path: str, weight_path: str,
+                   keep_meals: bool = False) -> Tuple['WorkoutAnalyzer', 'NutritionAnalyzer']:
+    """
+    Parse the three exports and build the analyzers
+    
+    Args:
+        strong_path: Path to the Strong CSV export
+        nutrition_path: Path to the MyFitnessPal nutrition CSV export
+        weight_path: Path to the MyFitnessPal weight CSV export
+        keep_meals: Keep the per-meal breakdown so meals can be synced in later
+        
+    Returns:
+        Tuple of (WorkoutAnalyzer, NutritionAnalyzer)
+    """
+    # Parse the data files
+    workout_data = parsers.parse_strong_csv(strong_path)
+    meal_data = None
+    if keep_meals:
+        meal_data = parsers.parse_mfp_csv_meals(nutrition_path)
+        nutrition_data = parsers.meals_to_daily_totals(meal_data)
+    else:
+        nutrition_data = parsers.parse_mfp_csv_nutrition(nutrition_path)
+    weight_data = parsers.parse_mfp_csv_weight(weight_path)
+    
+    # Create analyzers
+    workout_analyzer = analysis.WorkoutAnalyzer(workout_data)
+    nutrition_analyzer = analysis.NutritionAnalyzer(nutrition_data, weight_data, meal_data)
+    return workout_analyzer, nutrition_analyzer
+
+
+def build_chart_series(dates, values, max_points: Optional[int] = None, method: str = 'lttb',
+                       decimals: Optional[int] = None, layout: str = 'rows',
+                       date_format: str = 'iso'):
+    """
+    Build a chart series, downsampled to at most max_points
+    
+    Args:
+        dates: Datetime-like Series of point dates, in ascending order
+        values: Point values
+        max_points: Target number of points (None keeps every point)
+        method: Downsampling method, 'lttb' or 'minmax'
+        decimals: Round values to this many decimals (None keeps them as-is)
+        layout: 'rows' for a list of {'date', 'value'} points, 'columnar' for
+            {'dates': [...], 'values': [...]}
+        date_format: 'iso' for YYYY-MM-DD strings, 'epochDays' for days since 1970-01-01
+        
+    Returns:
+        List of point dictionaries, or a dictionary of parallel arrays
+    """
+    days = pd.DatetimeIndex(dates).values.astype('datetime64[D]')
+    values = np.asarray(values, dtype=float)
+    
+    if max_points:
+        keep = downsampling.downsample_indices(days.astype(np.int64), values, int(max_points), method)
+        days = days[keep]
+        values = values[keep]
+    
+    # Convert every date at once rather than per point
+    if date_format == 'epochDays':
+        date_values = days.astype(np.int64).tolist()
+    else:
+        date_values = np.datetime_as_string(days, unit='D').tolist()
+    
+    values = values.tolist()
+    if decimals is not None:
+        # Python's round() is correctly rounded, unlike np.round's scale-and-round
+        values = [round(value, decimals) for value in values]
+    
+    if layout == 'columnar':
+        return {'dates': date_values, 'values': values}
+    return [{'date': date_value, 'value': value} for date_value, value in zip(date_values, values)]
+
+
+def build_exercise_progression(workout_analyzer: 'WorkoutAnalyzer', exercise_name: str,
+                               max_points: Optional[int] = None, method: str = 'lttb',
+                               layout: str = 'rows',
+                               date_format: str = 'iso') -> Optional[Dict[str, Any]]:
+    """
+    Build the chart data and stagnation info for one exercise
+    
+    Args:
+        workout_analyzer: WorkoutAnalyzer for the user's workouts
+        exercise_name: Name of the exercise, as tracked or as the user spells it
+        max_points: Downsample each chart series to about this many points (None keeps all)
+        method: Downsampling method, 'lttb' or 'minmax'
+        layout: Chart series layout, 'rows' or 'columnar'
+        date_format: Chart date format, 'iso' or 'epochDays'
+        
+    Returns:
+        Workout progression dictionary, or None if the exercise has no weighted sets
+    """
+    # Requests may spell the exercise as the user logged it; reply under the tracked name
+    exercise_name = workout_analyzer.find_exercise(exercise_name)
+    progress_df = workout_analyzer.get_exercise_progress(exercise_name)
+    if progress_df.empty:
+        return None
+    
+    # Extract data points for the charts
+    dates = pd.to_datetime(progress_df['date'])
+    e1rm_data = build_chart_series(dates, progress_df['estimated_1rm_kg'], max_points, method,
+                                   decimals=1, layout=layout, date_format=date_format)
+    volume_data = build_chart_series(dates, progress_df['volume_kg'], max_points, method,
+                                     decimals=1, layout=layout, date_format=date_format)
+    
+    # Get stagnation info
+    percent_change, is_improving = workout_analyzer.get_volume_trend(exercise_name)
+    stagnation_info = None
+    progression_suggestion = None
+    
+    if not is_improving:
+        stagnation_info = f"Your progress on {exercise_name} has stalled. Volume has decreased by {abs(round(percent_change, 1))}% over the past 8 weeks."
+        progression_suggestion = f"Try varying your rep ranges, add an extra set, or increase frequency for {exercise_name}."
+    elif percent_change < 5:
+        stagnation_info = f"Your progress on {exercise_name} is minimal. Volume has only increased by {round(percent_change, 1)}% over the past 8 weeks."
+        progression_suggestion = f"Consider adding 5-10% more volume to your {exercise_name} workouts."
+    
+    # Get last performance
+    last_row = progress_df.iloc[-1]
+    last_performance = {
+        'date': last_row['date'].strftime('%Y-%m-%d'),
+        'weight': float(last_row['max_weight_kg']),
+        'reps': int(last_row['max_reps']),
+        'estimatedOneRepMax': round(float(last_row['estimated_1rm_kg']), 1)
+    }
+    
+    return {
+        'exerciseName': exercise_name,
+        'e1rmTrendData': e1rm_data,
+        'volumeTrendData': volume_data,
+        'stagnationInfo': stagnation_info,
+        'progressionSuggestion': progression_suggestion,
+        'lastPerformance': last_performance
+    }
+
+
+@timed('payload.build')
+def build_analysis_payload(workout_analyzer: 'WorkoutAnalyzer', nutrition_analyzer: 'NutritionAnalyzer',
+                           user_preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Build the /analyze response payload from analyzers
+    
+    Args:
+        workout_analyzer: WorkoutAnalyzer for the user's workouts
+        nutrition_analyzer: NutritionAnalyzer for the user's nutrition and weight
+        user_preferences: Parsed user preferences
+        
+    Returns:
+        Response payload dictionary
+    """
+    # Get user physical data from preferences
+    user_preferences = normalize_preferences(user_preferences)
+    height_cm = user_preferences['height']
+    age_years = user_preferences['age']
+    sex = user_preferences['sex']
+    activity_multiplier = user_preferences['activityMultiplier']
+    goal = user_preferences['goal']
+    target_exercises = user_preferences['targetExercises']
+    max_points = user_preferences['maxChartPoints']
+    chart_method = user_preferences['chartDownsampling']
+    chart_layout = user_preferences['chartLayout']
+    chart_dates = user_preferences['chartDateFormat']
+    
+    # If no target exercises are specified, use the most frequently trained ones
+    if not target_exercises:
+        target_exercises = default_target_exercises(workout_analyzer)
+    
+    # Get basic insights
+    insight_generator = analysis.InsightGenerator.from_analyzers(workout_analyzer, nutrition_analyzer)
+    insights = insight_generator.get_combined_insights(
+        height_cm=height_cm,
+        age_years=age_years,
+        sex=sex,
+        goal=goal
+    )
+    
+    # Get weight and nutrition data
+    weight_change, is_losing = nutrition_analyzer.get_weight_trend(weeks=4)
+    macro_ratios = nutrition_analyzer.get_macronutrient_ratios(days=14)
+    
+    # Get latest weight
+    latest_weight = None
+    if not nutrition_analyzer.weight_df.empty:
+        latest_weight = float(nutrition_analyzer.weight_df['weight'].iloc[-1])
+    
+    # Calculate BMR/TDEE
+    bmr = None
+    tdee = None
+    suggested_calories = None
+    
+    if latest_weight:
+        # Cunningham from lean body mass when body fat or circumferences are logged
+        bmr = nutrition_analyzer.estimate_bmr(height_cm, age_years, sex)
+        tdee = calculate_tdee(bmr, activity_multiplier)
+        
+        # Adjust calories based on goal (never below 1200 kcal)
+        suggested_calories = calculate_calorie_target(tdee, goal, minimum_calories=1200)
+    
+    # Build the response payload
+    response = {
+        'summary': {
+            'estimatedTDEE': round(tdee) if tdee else 2000,
+            'currentBMR': round(bmr) if bmr else 1500,
+            'suggestedCalorieTarget': round(suggested_calories) if suggested_calories else 2000,
+            'keyRecommendation': insights['recommendations']['nutrition'][0]['message'] 
+                if insights.get('recommendations', {}).get('nutrition') else 
+                "Focus on progressive overload and consistent nutrition tracking."
+        },
+        'workoutProgression': [],
+        'nutritionWeightTrends': {
+            'weightTrendData': [],
+            'currentWeight': latest_weight or 70,
+            'totalWeightChange': 0,
+            'recentWeightChange': round(weight_change, 1) if weight_change is not None else 0,
+            'avgDailyCalories': 0,
+            'macroBreakdown': {
+                'protein': {
+                    'grams': 0,
+                    'percentage': macro_ratios.get('protein_pct', 25)
+                },
+                'carbs': {
+                    'grams': 0,
+                    'percentage': macro_ratios.get('carbs_pct', 50)
+                },
+                'fat': {
+                    'grams': 0,
+                    'percentage': macro_ratios.get('fat_pct', 25)
+                }
+            },
+            'suggestedCalories': round(suggested_calories) if suggested_calories else 2000
+        },
+        'generalRecommendations': []
+    }
+    
+    # Get general recommendations from insights
+    for rec_type, recommendations in insights.get('recommendations', {}).items():
+        for rec in recommendations:
+            response['generalRecommendations'].append(rec['message'])
+    
+    # Process workout progression for target exercises
+    for exercise_name in target_exercises:
+        progression = build_exercise_progression(workout_analyzer, exercise_name,
+                                                 max_points, chart_method, chart_layout, chart_dates)
+        if progression is not None:
+            response['workoutProgression'].append(progression)
+    
+    # Process nutrition and weight data for charts
+    weight_df = nutrition_analyzer.weight_df
+    if not weight_df.empty:
+        # Calculate total weight change
+        if len(weight_df) >= 2:
+            total_change = weight_df['weight'].iloc[-1] - weight_df['weight'].iloc[0]
+            response['nutritionWeightTrends']['totalWeightChange'] = round(float(total_change), 1)
+        
+        # Generate weight trend data points
+        weight_trend_data = build_chart_series(pd.to_datetime(weight_df['date']), weight_df['weight'],
+                                               max_points, chart_method, layout=chart_layout,
+                                               date_format=chart_dates)
+        
+        response['nutritionWeightTrends']['weightTrendData'] = weight_trend_data
+    
+    # Process nutrition data for average calories and macros
+    nutrition_df = nutrition_analyzer.nutrition_df
+    if not nutrition_df.empty:
+        averages = nutrition_df[['calories', 'protein', 'carbs', 'fat']].mean()
+        response['nutritionWeightTrends']['avgDailyCalories'] = round(float(averages['calories']))
+        
+        # Average macros in grams
+        macro_breakdown = response['nutritionWeightTrends']['macroBreakdown']
+        macro_breakdown['protein']['grams'] = round(float(averages['protein']))
+        macro_breakdown['carbs']['grams'] = round(float(averages['carbs']))
+        macro_breakdown['fat']['grams'] = round(float(averages['fat']))
+    
+    return response
+
+
+def json_response(payload: Any, status: int = 200, headers: Optional[Dict[str, str]] = None):
+    """
+    Serialize a payload with the fast encoder and compress it if the client accepts it
+    
+    Args:
+        payload: JSON-compatible payload
+        status: HTTP status code
+        headers: Extra response headers
+        
+    Returns:
+        Flask response
+    """
+    return encoded_json_response(dumps(payload), status, headers)
+
+
+def encoded_json_response(body: bytes, status: int = 200, headers: Optional[Dict[str, str]] = None,
+                          compressed: Optional[Dict[str, bytes]] = None):
+    """
+    Build a JSON response from an already serialized body, applying Accept-Encoding
+    
+    Args:
+        body: Serialized JSON body
+        status: HTTP status code
+        headers: Extra response headers
+        compressed: Optional {encoding: body} of precompressed variants
+        
+    Returns:
+        Flask response
+    """
+    headers = dict(headers or {})
+    headers['Vary'] = 'Accept-Encoding'
+    
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+    if compressed and encoding in compressed:
+        body, applied = compressed[encoding], encoding
+    else:
+        body, applied = compress(body, encoding)
+    if applied:
+        headers['Content-Encoding'] = applied
+    
+    return app.response_class(body, status=status, mimetype='application/json', headers=headers)
+
+
+def run_analysis_job(paths: Dict[str, str], user_preferences: Dict[str, Any]) -> Dict[str, Any]:
+    """Background job body: analyze saved uploads and delete them afterwards"""
+    try:
+        return build_analysis_response(paths['strong_file'], paths['nutrition_file'],
+                                       paths['weight_file'], user_preferences)
+    finally:
+        remove_files(paths.values())
+
+
+def missing_files_response():
+    return jsonify({
+        'error': 'Missing one or more required files'
+    }), 400
+
+
 @app.route('/analyze', methods=['POST'])
 def analyze():
     """
@@ -28,238 +573,645 @@ def analyze():
     """
     try:
         # Check if all files are present
-        if 'strong_file' not in request.files or \
-           'nutrition_file' not in request.files or \
-           'weight_file' not in request.files:
-            return jsonify({
-                'error': 'Missing one or more required files'
-            }), 400
-        
-        # Get the files
-        strong_file = request.files['strong_file']
-        nutrition_file = request.files['nutrition_file']
-        weight_file = request.files['weight_file']
+        error = validate_uploads()
+        if error:
+            return error
         
         # Parse user preferences
         user_preferences_json = request.form.get('user_preferences_json', '{}')
-        user_preferences = json.loads(user_preferences_json)
+        user_preferences = normalize_preferences(json.loads(user_preferences_json))
         
-        # Create temporary files to save the uploaded data
-        with tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as temp_strong, \
-             tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as temp_nutrition, \
-             tempfile.NamedTemporaryFile(delete=False, suffix='.csv') as temp_weight:
-            
-            strong_file.save(temp_strong.name)
-            nutrition_file.save(temp_nutrition.name)
-            weight_file.save(temp_weight.name)
-            
-            # Parse the data files
-            workout_data = parse_strong_csv(temp_strong.name)
-            nutrition_data = parse_mfp_csv_nutrition(temp_nutrition.name)
-            weight_data = parse_mfp_csv_weight(temp_weight.name)
-            
-            # Create analyzers
-            workout_analyzer = WorkoutAnalyzer(workout_data)
-            nutrition_analyzer = NutritionAnalyzer(nutrition_data, weight_data)
-            
-            # Get user physical data from preferences
-            height_cm = user_preferences.get('height', 175)
-            age_years = user_preferences.get('age', 30)
-            sex = user_preferences.get('sex', 'M')
-            activity_multiplier = user_preferences.get('activityMultiplier', 1.55)
-            goal = user_preferences.get('goal', 'muscle_gain')
-            target_exercises = user_preferences.get('targetExercises', [])
-            
-            # For demo purposes, if no target exercises are specified, use some common ones
-            if not target_exercises:
-                all_exercises = set()
-                for workout in workout_data:
-                    for exercise in workout.exercises:
-                        all_exercises.add(exercise.name)
-                
-                # Take up to 3 random exercises for analysis
-                exercise_list = list(all_exercises)
-                target_exercises = random.sample(exercise_list, min(3, len(exercise_list)))
-            
-            # Get basic insights
-            insight_generator = InsightGenerator(workout_data, nutrition_data, weight_data)
-            insights = insight_generator.get_combined_insights(
-                height_cm=height_cm,
-                age_years=age_years,
-                sex=sex,
-                goal=goal
-            )
-            
-            # Get weight and nutrition data
-            weight_change, is_losing = nutrition_analyzer.get_weight_trend(weeks=4)
-            macro_ratios = nutrition_analyzer.get_macronutrient_ratios(days=14)
-            
-            # Get latest weight
-            latest_weight = None
-            if weight_data:
-                latest_weight = sorted(weight_data, key=lambda x: x.date)[-1].weight_kg
+        # Identical uploads and preferences give identical responses
+        cache = get_response_cache()
+        with stage('upload.digest'):
+            cache_key = digest_uploads(request.files, UPLOAD_FIELDS, user_preferences)
+        etag = f'"{cache_key}"'
+        cache_headers = {'ETag': etag, 'Cache-Control': 'private, no-cache'}
+        
+        # If-None-Match compares entity tags weakly (RFC 9110), each tag as a whole
+        if request.if_none_match.contains_weak(cache_key):
+            if cache.get(cache_key) is not None:
+                return '', 304, cache_headers
+        
+        body = cache.get(cache_key)
+        cache_headers['X-Cache'] = 'HIT' if body is not None else 'MISS'
+        
+        if body is None:
+            # Save the uploaded data to temporary files
+            paths = save_uploads(request.files)
+            try:
+                response = build_analysis_response(paths['strong_file'], paths['nutrition_file'],
+                                                   paths['weight_file'], user_preferences)
+            finally:
+                # Clean up temporary files
+                remove_files(paths.values())
             
-            # Calculate BMR/TDEE
-            bmr = None
-            tdee = None
-            suggested_calories = None
+            body = dumps(response)
+            cache.set(cache_key, body)
+        
+        # Compressed variants are cached alongside the plain body
+        compressed = {}
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding'))
+        if encoding:
+            variant_key = f"{cache_key}.{encoding}"
+            variant = cache.get(variant_key)
+            if variant is None:
+                variant, applied = compress(body, encoding)
+                if applied:
+                    cache.set(variant_key, variant)
+            if variant is not body:
+                compressed[encoding] = variant
+        
+        return encoded_json_response(body, headers=cache_headers, compressed=compressed)
             
-            if latest_weight:
-                bmr = calculate_bmr(latest_weight, height_cm, age_years, sex)
-                tdee = calculate_tdee(bmr, activity_multiplier)
-                
-                # Adjust calories based on goal
-                if goal == 'muscle_gain':
-                    suggested_calories = tdee + 300  # Surplus for muscle gain
-                elif goal == 'fat_loss':
-                    suggested_calories = max(tdee - 500, 1200)  # Deficit for fat loss (min 1200)
-                else:
-                    suggested_calories = tdee  # Maintenance
+    except Exception as e:
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+
+def get_metrics_registry() -> MetricsRegistry:
+    """Return the app's metrics registry, creating it and subscribing it to stage timings on first use"""
+    registry = app.extensions.get('metrics')
+    if registry is None:
+        registry = MetricsRegistry()
+        add_listener(registry.observe_stage)
+        app.extensions['metrics'] = registry
+    return registry
+
+
+@app.before_request
+def start_request_timing():
+    if not app.config['INSTRUMENTATION_ENABLED']:
+        return
+    get_metrics_registry()
+    g.request_started = time.perf_counter()
+    g.trace_token = start_trace()
+
+
+@app.after_request
+def finish_request_timing(response):
+    token = g.pop('trace_token', None)
+    if token is None:
+        return response
+    
+    records = end_trace(token)
+    if records:
+        response.headers['Server-Timing'] = server_timing_header(records)
+    
+    endpoint = request.url_rule.rule if request.url_rule is not None else 'unmatched'
+    get_metrics_registry().observe_request(endpoint, request.method, response.status_code,
+                                           time.perf_counter() - g.request_started)
+    return response
+
+
+@app.teardown_request
+def discard_request_timing(exc):
+    # after_request is skipped when a request fails with an unhandled error
+    token = g.pop('trace_token', None)
+    if token is not None:
+        end_trace(token)
+
+
+@app.route('/metrics', methods=['GET'])
+def metrics():
+    """
+    Stage latency histograms, row and byte counts, and job, cache and dataset metrics
+    in the Prometheus text format
+    """
+    job_manager = app.extensions.get('analysis_jobs')
+    cache = app.extensions.get('response_cache')
+    dataset_store = app.extensions.get('dataset_store')
+    
+    body = get_metrics_registry().render(
+        job_metrics=job_manager.metrics() if job_manager is not None else None,
+        cache_stats=dict(cache.stats) if cache is not None else None,
+        dataset_stats=dataset_store.stats() if dataset_store is not None else None
+    )
+    return app.response_class(body, mimetype='text/plain; version=0.0.4')
+
+
+def get_response_cache() -> ResponseCache:
+    """Return the app's /analyze response cache, creating it on first use"""
+    cache = app.extensions.get('response_cache')
+    if cache is None:
+        cache = ResponseCache(
+            max_entries=app.config['RESPONSE_CACHE_ENTRIES'],
+            ttl_seconds=app.config['RESPONSE_CACHE_TTL_SECONDS'],
+            disk_dir=app.config['RESPONSE_CACHE_DIR']
+        )
+        app.extensions['response_cache'] = cache
+    return cache
+
+
+def get_job_manager() -> JobManager:
+    """Return the app's analysis job manager, creating it on first use"""
+    manager = app.extensions.get('analysis_jobs')
+    if manager is None:
+        manager = JobManager(
+            max_workers=app.config['ANALYSIS_JOB_WORKERS'],
+            max_queue=app.config['ANALYSIS_JOB_QUEUE_SIZE'],
+            retention_seconds=app.config['ANALYSIS_JOB_RETENTION_SECONDS']
+        )
+        app.extensions['analysis_jobs'] = manager
+    return manager
+
+
+@app.route('/analyze/jobs', methods=['POST'])
+def submit_analysis_job():
+    """
+    Accept the same uploads as /analyze and queue the analysis as a background job
+    """
+    try:
+        error = validate_uploads()
+        if error:
+            return error
+        
+        user_preferences = json.loads(request.form.get('user_preferences_json', '{}'))
+        
+        if app.extensions.get('shutting_down'):
+            return jsonify({'error': 'Server is shutting down, try again shortly'}), 503, \
+                {'Retry-After': '5'}
+        
+        manager = get_job_manager()
+        if manager.is_full():
+            return jsonify({'error': 'Too many queued analyses, try again later'}), 429, \
+                {'Retry-After': '5'}
+        
+        paths = save_uploads(request.files)
+        try:
+            job = manager.submit(run_analysis_job, paths, user_preferences)
+        except QueueFullError:
+            remove_files(paths.values())
+            return jsonify({'error': 'Too many queued analyses, try again later'}), 429, \
+                {'Retry-After': '5'}
+        
+        status_url = url_for('get_analysis_job', job_id=job.id)
+        body = {'jobId': job.id, 'status': job.status, 'statusUrl': status_url}
+        return jsonify(body), 202, {'Location': status_url}
+    
+    except Exception as e:
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+
+@app.route('/analyze/jobs/<job_id>', methods=['GET'])
+def get_analysis_job(job_id):
+    """
+    Report a job's status, including its result once finished
+    
+    Pass ?wait=<seconds> to long-poll until the job finishes or the wait expires.
+    """
+    manager = get_job_manager()
+    wait = min(request.args.get('wait', 0, type=float), app.config['ANALYSIS_JOB_MAX_WAIT_SECONDS'])
+    
+    job = manager.wait(job_id, timeout=wait) if wait > 0 else manager.get(job_id)
+    if job is None:
+        return jsonify({'error': f'Unknown job {job_id}'}), 404
+    
+    return json_response(job.to_dict())
+
+
+@app.route('/analyze/jobs/metrics', methods=['GET'])
+def analysis_job_metrics():
+    """
+    Report queue depth, concurrency and job duration statistics
+    """
+    return jsonify(get_job_manager().metrics())
+
+
+def get_dataset_store() -> DatasetStore:
+    """Return the app's resident dataset store, creating it on first use"""
+    store = app.extensions.get('dataset_store')
+    if store is None:
+        store = DatasetStore(
+            max_bytes=app.config['DATASET_STORE_MAX_BYTES'],
+            ttl_seconds=app.config['DATASET_IDLE_SECONDS']
+        )
+        app.extensions['dataset_store'] = store
+    return store
+
+
+def dataset_or_404(dataset_id: str):
+    """Look up a resident dataset, returning (dataset, None) or (None, error response)"""
+    dataset = get_dataset_store().get(dataset_id)
+    if dataset is None:
+        return None, (jsonify({'error': f'Unknown or expired dataset {dataset_id}'}), 404)
+    return dataset, None
+
+
+@app.route('/datasets', methods=['POST'])
+def create_dataset():
+    """
+    Parse uploaded files once and keep the analyzers resident for later queries
+    """
+    try:
+        error = validate_uploads()
+        if error:
+            return error
+        
+        paths = save_uploads(request.files)
+        try:
+            workout_analyzer, nutrition_analyzer = load_analyzers(
+                paths['strong_file'], paths['nutrition_file'], paths['weight_file'], keep_meals=True)
+        finally:
+            remove_files(paths.values())
+        
+        dataset = Dataset(workout_analyzer, nutrition_analyzer)
+        try:
+            get_dataset_store().add(dataset)
+        except MemoryError as e:
+            return jsonify({'error': str(e)}), 413
+        
+        location = url_for('get_dataset', dataset_id=dataset.id)
+        return jsonify(dataset.describe()), 201, {'Location': location}
+    
+    except Exception as e:
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+
+@app.route('/datasets/<dataset_id>/sync', methods=['POST'])
+def sync_dataset(dataset_id):
+    """
+    Merge new sets, meals or weigh-ins into a resident dataset
+    
+    Accepts any of the three uploads as CSV in the export formats, or a JSON
+    body with 'sets', 'meals' and 'weights' lists.
+    """
+    dataset, error = dataset_or_404(dataset_id)
+    if error:
+        return error
+    
+    try:
+        if request.is_json:
+            delta = parse_sync_json(request.get_json())
+        else:
+            error = validate_uploads(require_all=False)
+            if error:
+                return error
             
-            # Build the response payload
-            response = {
-                'summary': {
-                    'estimatedTDEE': round(tdee) if tdee else 2000,
-                    'currentBMR': round(bmr) if bmr else 1500,
-                    'suggestedCalorieTarget': round(suggested_calories) if suggested_calories else 2000,
-                    'keyRecommendation': insights['recommendations']['nutrition'][0]['message'] 
-                        if insights.get('recommendations', {}).get('nutrition') else 
-                        "Focus on progressive overload and consistent nutrition tracking."
-                },
-                'workoutProgression': [],
-                'nutritionWeightTrends': {
-                    'weightTrendData': [],
-                    'currentWeight': latest_weight or 70,
-                    'totalWeightChange': 0,
-                    'recentWeightChange': round(weight_change, 1) if weight_change is not None else 0,
-                    'avgDailyCalories': 0,
-                    'macroBreakdown': {
-                        'protein': {
-                            'grams': 0,
-                            'percentage': macro_ratios.get('protein_pct', 25)
-                        },
-                        'carbs': {
-                            'grams': 0,
-                            'percentage': macro_ratios.get('carbs_pct', 50)
-                        },
-                        'fat': {
-                            'grams': 0,
-                            'percentage': macro_ratios.get('fat_pct', 25)
-                        }
-                    },
-                    'suggestedCalories': round(suggested_calories) if suggested_calories else 2000
-                },
-                'generalRecommendations': []
+            paths = save_uploads(request.files, [field for field in UPLOAD_FIELDS if field in request.files])
+            try:
+                delta = load_sync_files(paths)
+            finally:
+                remove_files(paths.values())
+        
+        if delta.is_empty():
+            return jsonify({'error': 'No records to sync'}), 400
+        
+        old_size_bytes = dataset.size_bytes
+        result = dataset.sync(delta.workouts, delta.meals, delta.weights)
+        
+        # Datasets opened from the history store write their updates through
+        store = get_history_store()
+        if dataset.user_id is not None and store is not None:
+            store.write_workouts(delta.workouts, dataset.user_id)
+            store.write_meals(delta.meals, dataset.user_id)
+            store.write_weights(delta.weights, dataset.user_id)
+        try:
+            get_dataset_store().resize(dataset.id, old_size_bytes)
+        except MemoryError as e:
+            return jsonify({'error': str(e)}), 413
+        
+        result['dataset'] = dataset.describe()
+        return jsonify(result)
+    
+    except UploadValidationError as e:
+        return jsonify(e.to_dict()), e.status_code
+    except Exception as e:
+        return jsonify({
+            'error': str(e)
+        }), 500
+
+
+def get_history_store() -> Optional['HistoryStore']:
+    """Return the app's history store, opening it on first use, or None if not configured"""
+    if not app.config['HISTORY_DB']:
+        return None
+    store = app.extensions.get('history_store')
+    if store is None:
+        store = storage.HistoryStore(app.config['HISTORY_DB'])
+        app.extensions['history_store'] = store
+    return store
+
+
+def history_store_or_404():
+    """Return (store, None), or (None, error response) when no history store is configured"""
+    store = get_history_store()
+    if store is None:
+        return None, (jsonify({'error': 'History store is not configured'}), 404)
+    return store, None
+
+
+def parse_date_arg(name: str):
+    """Parse an optional YYYY-MM-DD query argument"""
+    value = request.args.get(name)
+    return datetime.strptime(value, '%Y-%m-%d').date() if value else None
+
+
+@app.route('/history/<user_id>', methods=['GET'])
+def get_history(user_id):
+    """Record counts and date ranges stored for a user"""
+    store, error = history_store_or_404()
+    if error:
+        return error
+    return jsonify(store.summary(user_id))
+
+
+@app.route('/history/<user_id>/import', methods=['POST'])
+def import_history(user_id):
+    """
+    Merge any of the three exports into a user's stored history
+    """
+    store, error = history_store_or_404()
+    if error:
+        return error
+    
+    try:
+        error = validate_uploads(require_all=False)
+        if error:
+            return error
+        
+        paths = save_uploads(request.files, [field for field in UPLOAD_FIELDS if field in request.files])
+        try:
+            delta = load_sync_files(paths)
+        finally:
+            remove_files(paths.values())
+        
+        with stage('history.write', rows=sum(len(w.sets) for w in delta.workouts)
+                   + len(delta.meals) + len(delta.weights)):
+            counts = {
+                'sets': store.write_workouts(delta.workouts, user_id),
+                'meals': store.write_meals(delta.meals, user_id),
+                'weights': store.write_weights(delta.weights, user_id)
             }
-            
-            # Get general recommendations from insights
-            for rec_type, recommendations in insights.get('recommendations', {}).items():
-                for rec in recommendations:
-                    response['generalRecommendations'].append(rec['message'])
-            
-            # Process workout progression for target exercises
-            for exercise_name in target_exercises:
-                progress_df = workout_analyzer.get_exercise_progress(exercise_name)
-                
-                if not progress_df.empty:
-                    # Extract data points for the charts
-                    e1rm_data = []
-                    volume_data = []
-                    
-                    for _, row in progress_df.iterrows():
-                        date_str = row['date'].strftime('%Y-%m-%d')
-                        
-                        e1rm_data.append({
-                            'date': date_str,
-                            'value': round(float(row['estimated_1rm_kg']), 1)
-                        })
-                        
-                        volume_data.append({
-                            'date': date_str,
-                            'value': round(float(row['volume_kg']), 1)
-                        })
-                    
-                    # Get stagnation info
-                    percent_change, is_improving = workout_analyzer.get_volume_trend(exercise_name)
-                    stagnation_info = None
-                    progression_suggestion = None
-                    
-                    if not is_improving:
-                        stagnation_info = f"Your progress on {exercise_name} has stalled. Volume has decreased by {abs(round(percent_change, 1))}% over the past 8 weeks."
-                        progression_suggestion = f"Try varying your rep ranges, add an extra set, or increase frequency for {exercise_name}."
-                    elif percent_change < 5:
-                        stagnation_info = f"Your progress on {exercise_name} is minimal. Volume has only increased by {round(percent_change, 1)}% over the past 8 weeks."
-                        progression_suggestion = f"Consider adding 5-10% more volume to your {exercise_name} workouts."
-                    
-                    # Get last performance
-                    last_row = progress_df.iloc[-1]
-                    last_performance = {
-                        'date': last_row['date'].strftime('%Y-%m-%d'),
-                        'weight': float(last_row['max_weight_kg']),
-                        'reps': int(last_row['max_reps']),
-                        'estimatedOneRepMax': round(float(last_row['estimated_1rm_kg']), 1)
-                    }
-                    
-                    # Add exercise data to response
-                    response['workoutProgression'].append({
-                        'exerciseName': exercise_name,
-                        'e1rmTrendData': e1rm_data,
-                        'volumeTrendData': volume_data,
-                        'stagnationInfo': stagnation_info,
-                        'progressionSuggestion': progression_suggestion,
-                        'lastPerformance': last_performance
-                    })
-            
-            # Process nutrition and weight data for charts
-            if weight_data:
-                weight_trend_data = []
-                sorted_weight_data = sorted(weight_data, key=lambda x: x.date)
-                
-                # Calculate total weight change
-                if len(sorted_weight_data) >= 2:
-                    first_weight = sorted_weight_data[0].weight_kg
-                    last_weight = sorted_weight_data[-1].weight_kg
-                    response['nutritionWeightTrends']['totalWeightChange'] = round(last_weight - first_weight, 1)
-                
-                # Generate weight trend data points
-                for weight_entry in sorted_weight_data:
-                    weight_trend_data.append({
-                        'date': weight_entry.date.strftime('%Y-%m-%d'),
-                        'value': weight_entry.weight_kg
-                    })
-                
-                response['nutritionWeightTrends']['weightTrendData'] = weight_trend_data
-            
-            # Process nutrition data for average calories and macros
-            if nutrition_data:
-                total_calories = sum(n.calories_kcal for n in nutrition_data)
-                avg_calories = total_calories / len(nutrition_data)
-                response['nutritionWeightTrends']['avgDailyCalories'] = round(avg_calories)
-                
-                # Calculate average macros in grams
-                total_protein = sum(n.protein_g for n in nutrition_data)
-                total_carbs = sum(n.carbs_g for n in nutrition_data)
-                total_fat = sum(n.fat_g for n in nutrition_data)
-                
-                avg_protein = total_protein / len(nutrition_data)
-                avg_carbs = total_carbs / len(nutrition_data)
-                avg_fat = total_fat / len(nutrition_data)
-                
-                response['nutritionWeightTrends']['macroBreakdown']['protein']['grams'] = round(avg_protein)
-                response['nutritionWeightTrends']['macroBreakdown']['carbs']['grams'] = round(avg_carbs)
-                response['nutritionWeightTrends']['macroBreakdown']['fat']['grams'] = round(avg_fat)
-            
-            # Clean up temporary files
-            os.unlink(temp_strong.name)
-            os.unlink(temp_nutrition.name)
-            os.unlink(temp_weight.name)
-            
-            return jsonify(response)
-            
+        return jsonify({'imported': counts, 'history': store.summary(user_id)})
+    
     except Exception as e:
         return jsonify({
             'error': str(e)
         }), 500
 
+
+@app.route('/history/<user_id>/datasets', methods=['POST'])
+def open_history_dataset(user_id):
+    """
+    Load a date range of a user's stored history as a resident dataset
+    
+    Query arguments `start` and `end` (YYYY-MM-DD) bound the range; only the
+    rows inside it are read.
+    """
+    store, error = history_store_or_404()
+    if error:
+        return error
+    
+    try:
+        start, end = parse_date_arg('start'), parse_date_arg('end')
+    except ValueError:
+        return jsonify({'error': 'start and end must be YYYY-MM-DD dates'}), 400
+    
+    workout_analyzer = analysis.WorkoutAnalyzer.from_store(store, user_id, start, end)
+    nutrition_analyzer = analysis.NutritionAnalyzer.from_store(store, user_id, start, end, include_meals=True)
+    
+    dataset = Dataset(workout_analyzer, nutrition_analyzer, user_id=user_id)
+    try:
+        get_dataset_store().add(dataset)
+    except MemoryError as e:
+        return jsonify({'error': str(e)}), 413
+    
+    location = url_for('get_dataset', dataset_id=dataset.id)
+    return jsonify(dataset.describe()), 201, {'Location': location}
+
+
+@app.route('/datasets/<dataset_id>', methods=['GET'])
+def get_dataset(dataset_id):
+    """Describe a resident dataset"""
+    dataset, error = dataset_or_404(dataset_id)
+    if error:
+        return error
+    return jsonify(dataset.describe())
+
+
+@app.route('/datasets/<dataset_id>', methods=['DELETE'])
+def delete_dataset(dataset_id):
+    """Drop a resident dataset"""
+    if not get_dataset_store().remove(dataset_id):
+        return jsonify({'error': f'Unknown or expired dataset {dataset_id}'}), 404
+    return '', 204
+
+
+@app.route('/datasets/<dataset_id>/exercises', methods=['GET'])
+def list_dataset_exercises(dataset_id):
+    """List the dataset's exercises with their session counts"""
+    dataset, error = dataset_or_404(dataset_id)
+    if error:
+        return error
+    
+    session_counts = dataset.workout_analyzer.sessions_df['exercise_name'].value_counts()
+    exercises = [
+        {'exerciseName': name, 'sessions': int(session_counts.get(name, 0))}
+        for name in dataset.workout_analyzer.exercises
+    ]
+    return jsonify({'exercises': exercises})
+
+
+@app.route('/datasets/<dataset_id>/exercises/<path:exercise_name>/progress', methods=['GET'])
+def get_dataset_exercise_progress(dataset_id, exercise_name):
+    """Chart data and stagnation info for one exercise"""
+    dataset, error = dataset_or_404(dataset_id)
+    if error:
+        return error
+    
+    progression = build_exercise_progression(
+        dataset.workout_analyzer, exercise_name,
+        max_points=request.args.get('maxPoints', type=int),
+        method=request.args.get('method', PREFERENCE_DEFAULTS['chartDownsampling'])
+    )
+    if progression is None:
+        return jsonify({'error': f'No weighted sets for {exercise_name}'}), 404
+    return json_response(progression)
+
+
+@app.route('/datasets/<dataset_id>/summary', methods=['GET'])
+def get_dataset_summary(dataset_id):
+    """
+    Window summaries: ?weeks= for weight trend and workout frequency,
+    ?days= for macronutrients, ?stalledWeeks= for stalled exercises
+    """
+    dataset, error = dataset_or_404(dataset_id)
+    if error:
+        return error
+    
+    weeks = request.args.get('weeks', 4, type=int)
+    days = request.args.get('days', 14, type=int)
+    stalled_weeks = request.args.get('stalledWeeks', 8, type=int)
+    
+    weight_change, is_losing = dataset.nutrition_analyzer.get_weight_trend(weeks=weeks)
+    return jsonify({
+        'weeks': weeks,
+        'days': days,
+        'weightChange': round(float(weight_change), 1),
+        'isLosing': bool(is_losing),
+        'macroRatios': dataset.nutrition_analyzer.get_macronutrient_ratios(days=days),
+        'workoutFrequency': dataset.workout_analyzer.get_workout_frequency(weeks=weeks),
+        'stalledExercises': dataset.workout_analyzer.identify_stalled_exercises(weeks=stalled_weeks)
+    })
+
+
+@app.route('/datasets/<dataset_id>/rollups', methods=['GET'])
+def get_dataset_rollups(dataset_id):
+    """
+    Weekly or monthly aggregates: ?period=week|month, optional ?start= and ?end=
+    (YYYY-MM-DD) and ?exercise= to select one exercise's rows
+    """
+    dataset, error = dataset_or_404(dataset_id)
+    if error:
+        return error
+    
+    period = request.args.get('period', 'week')
+    if period not in rollups.PERIODS:
+        return jsonify({'error': f"period must be one of {', '.join(rollups.PERIODS)}"}), 400
+    try:
+        start, end = parse_date_arg('start'), parse_date_arg('end')
+    except ValueError:
+        return jsonify({'error': 'start and end must be YYYY-MM-DD dates'}), 400
+    
+    workout_analyzer = dataset.workout_analyzer
+    nutrition_analyzer = dataset.nutrition_analyzer
+    return json_response({
+        'period': period,
+        'workouts': rollups.rollup_records(workout_analyzer.get_period_totals(period, start, end)),
+        'exercises': rollups.rollup_records(workout_analyzer.get_exercise_rollup(
+            period, request.args.get('exercise'), start, end)),
+        'nutrition': rollups.rollup_records(nutrition_analyzer.get_intake_rollup(period, start, end)),
+        'weight': rollups.rollup_records(nutrition_analyzer.get_weight_rollup(period, start, end))
+    })
+
+
+@app.route('/datasets/<dataset_id>/recommendations', methods=['GET'])
+def get_dataset_recommendations(dataset_id):
+    """Combined insights for ?height=&age=&sex=&goal="""
+    dataset, error = dataset_or_404(dataset_id)
+    if error:
+        return error
+    
+    insights = dataset.insight_generator.get_combined_insights(
+        height_cm=request.args.get('height', PREFERENCE_DEFAULTS['height'], type=float),
+        age_years=request.args.get('age', PREFERENCE_DEFAULTS['age'], type=int),
+        sex=request.args.get('sex', PREFERENCE_DEFAULTS['sex']),
+        goal=request.args.get('goal', PREFERENCE_DEFAULTS['goal'])
+    )
+    return jsonify(insights)
+
+
+@app.route('/datasets/<dataset_id>/analyze', methods=['POST'])
+def analyze_dataset(dataset_id):
+    """Full /analyze payload for a resident dataset; the JSON body holds the preferences"""
+    dataset, error = dataset_or_404(dataset_id)
+    if error:
+        return error
+    
+    user_preferences = request.get_json(silent=True) or {}
+    return json_response(build_analysis_payload(dataset.workout_analyzer, dataset.nutrition_analyzer,
+                                                user_preferences))
+
+
+# Minimal exports used to exercise the whole pipeline once at startup
+WARM_UP_EXPORTS = {
+    'strong_file': (
+        "Date,Workout Name,Duration,Exercise Name,Set Order,Weight,Reps,Distance,Seconds,Notes,Workout Notes,RPE\n"
+        "2025-01-01 08:00:00,Warm-up,30m,Squat (Barbell),1,60,5,,,,,\n"
+        "2025-01-03 08:00:00,Warm-up,30m,Squat (Barbell),1,62.5,5,,,,,\n"
+    ),
+    'nutrition_file': (
+        "Date,Meal,Calories,Fat (g),Carbohydrates (g),Protein (g),Fiber,Sugar,Sodium (mg),Cholesterol\n"
+        "2025-01-01,Breakfast,600,20,60,40,5,10,500,100\n"
+        "2025-01-02,Breakfast,650,22,65,42,5,10,500,100\n"
+    ),
+    'weight_file': (
+        "Date,Weight,Body Fat %\n"
+        "2025-01-01,80.0,18\n"
+        "2025-01-03,79.8,18\n"
+    )
+}
+
+
+def warm_up():
+    """
+    Run the analysis pipeline once on a tiny built-in export
+    
+    With a preloading WSGI server this runs in the master process before
+    workers fork, so pandas' and numpy's lazily loaded internals and the
+    analysis code paths are already initialized and shared copy-on-write.
+    """
+    paths = {}
+    try:
+        for field, content in WARM_UP_EXPORTS.items():
+            with tempfile.NamedTemporaryFile('w', delete=False, suffix='.csv') as temp_file:
+                paths[field] = temp_file.name
+                temp_file.write(content)
+        response = build_analysis_response(paths['strong_file'], paths['nutrition_file'],
+                                           paths['weight_file'], normalize_preferences({}))
+        dumps(response)
+    finally:
+        remove_files(paths.values())
+
+
+@app.route('/health', methods=['GET'])
+def health():
+    """
+    Liveness and readiness check; returns 503 once the worker is shutting down
+    """
+    if app.extensions.get('shutting_down'):
+        return jsonify({'status': 'shutting_down'}), 503
+    
+    status = {'status': 'ok', 'pid': os.getpid()}
+    job_manager = app.extensions.get('analysis_jobs')
+    if job_manager is not None:
+        job_metrics = job_manager.metrics()
+        status['jobs'] = {'queueDepth': job_metrics['queueDepth'], 'running': job_metrics['running']}
+    return jsonify(status)
+
+
+def shutdown_app(wait: bool = True):
+    """
+    Stop accepting analysis jobs and let running ones finish
+    
+    Called by the WSGI server when a worker exits, and at interpreter exit.
+    
+    Args:
+        wait: Whether to block until running jobs have finished
+    """
+    if app.extensions.get('shutting_down'):
+        return
+    app.extensions['shutting_down'] = True
+    
+    job_manager = app.extensions.get('analysis_jobs')
+    if job_manager is not None:
+        job_manager.shutdown(wait=wait)
+
+
+def create_app(warm_up_on_start: Optional[bool] = None) -> Flask:
+    """
+    Prepare the app for a production WSGI server
+    
+    Args:
+        warm_up_on_start: Run warm_up() now; defaults to the WARM_UP_ON_START setting
+        
+    Returns:
+        The Flask application
+    """
+    if warm_up_on_start is None:
+        warm_up_on_start = app.config['WARM_UP_ON_START']
+    if warm_up_on_start:
+        warm_up()
+    
+    atexit.register(shutdown_app)
+    return app
+
+
 if __name__ == '__main__':
     app.run(debug=True, port=5000)
\ No newline at end of file
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+# Batch insights runner for many users
+
+import os
+import sys
+import json
+import time
+import argparse
+import traceback
+from multiprocessing import Pool
+from typing import List, Dict, Any, Iterator, Optional, TextIO
+
+from parsers.strong_parser import parse_strong_csv
+from parsers.mfp_parser import parse_mfp_csv_nutrition, parse_mfp_csv_weight
+from analysis.insights import InsightGenerator
+from storage.columnar import load_analyzers, save_dataset
+
+# Profile values used when a manifest entry leaves them out
+DEFAULT_PROFILE = {
+    'height': 175,
+    'age': 30,
+    'sex': 'M',
+    'goal': 'muscle_gain'
+}
+
+FILE_KEYS = ('strong_file', 'nutrition_file', 'weight_file')
+
+
+def load_manifest(manifest_path: str) -> List[Dict[str, Any]]:
+    """
+    Load a JSON Lines manifest of per-user export files and profiles
+
+    Each line looks like:
+        {"user_id": "u1", "strong_file": "u1/strong.csv",
+         "nutrition_file": "u1/nutrition.csv", "weight_file": "u1/weight.csv",
+         "profile": {"height": 180, "age": 35, "sex": "M", "goal": "fat_loss"}}
+
+    Instead of the three exports, an entry may name a directory of Parquet or
+    Arrow files saved by storage.columnar with {"dataset": "u1/dataset"}.
+
+    Relative file paths are resolved against the manifest's directory.
+
+    Args:
+        manifest_path: Path to the manifest file
+
+    Returns:
+        List of manifest entries
+    """
+    base_dir = os.path.dirname(os.path.abspath(manifest_path))
+    entries = []
+
+    with open(manifest_path) as f:
+        for line_number, line in enumerate(f, 1):
+            line = line.strip()
+            if not line or line.startswith('#'):
+                continue
+
+            entry = json.loads(line)
+            entry.setdefault('user_id', f"line-{line_number}")
+            if 'dataset' in entry:
+                entry['dataset'] = os.path.join(base_dir, entry['dataset'])
+                entries.append(entry)
+                continue
+            for key in FILE_KEYS:
+                if key not in entry:
+                    raise ValueError(f"Manifest line {line_number} is missing '{key}'")
+                entry[key] = os.path.join(base_dir, entry[key])
+            entries.append(entry)
+
+    return entries
+
+
+def analyze_user(entry: Dict[str, Any]) -> Dict[str, Any]:
+    """
+    Run parse -> analyze -> insights for one manifest entry
+
+    Failures are caught and reported in the result so one bad export does
+    not stop the batch.
+
+    Args:
+        entry: Manifest entry
+
+    Returns:
+        Result dictionary with 'user_id', 'status' and either 'insights' or 'error'
+    """
+    start = time.perf_counter()
+    profile = {**DEFAULT_PROFILE, **entry.get('profile', {})}
+
+    try:
+        if 'dataset' in entry:
+            insight_generator = InsightGenerator.from_analyzers(*load_analyzers(entry['dataset']))
+        else:
+            workout_data = parse_strong_csv(entry['strong_file'])
+            nutrition_data = parse_mfp_csv_nutrition(entry['nutrition_file'])
+            weight_data = parse_mfp_csv_weight(entry['weight_file'])
+            if entry.get('save_dir'):
+                save_dataset(os.path.join(entry['save_dir'], entry['user_id']),
+                             workout_data, nutrition_data, weight_data)
+
+            insight_generator = InsightGenerator(workout_data, nutrition_data, weight_data)
+        insights = insight_generator.get_combined_insights(
+            height_cm=profile['height'],
+            age_years=profile['age'],
+            sex=profile['sex'],
+            goal=profile['goal']
+        )
+        result = {
+            'user_id': entry['user_id'],
+            'status': 'ok',
+            'goal': profile['goal'],
+            'insights': insights
+        }
+    except Exception as e:
+        result = {
+            'user_id': entry['user_id'],
+            'status': 'error',
+            'error': f"{type(e).__name__}: {e}",
+            'traceback': traceback.format_exc()
+        }
+
+    result['elapsed_s'] = round(time.perf_counter() - start, 4)
+    return result
+
+
+def run_batch(entries: List[Dict[str, Any]], workers: Optional[int] = None,
+              chunksize: int = 1) -> Iterator[Dict[str, Any]]:
+    """
+    Analyze many users across a process pool
+
+    Results are yielded as soon as they are ready, in completion order.
+
+    Args:
+        entries: Manifest entries
+        workers: Number of worker processes (default: CPU count, 1 runs in-process)
+        chunksize: Number of entries handed to a worker at a time
+
+    Yields:
+        Result dictionaries from analyze_user
+    """
+    workers = workers or os.cpu_count() or 1
+
+    if workers == 1:
+        for entry in entries:
+            yield analyze_user(entry)
+        return
+
+    with Pool(processes=workers) as pool:
+        for result in pool.imap_unordered(analyze_user, entries, chunksize=chunksize):
+            yield result
+
+
+def write_results(results: Iterator[Dict[str, Any]], output: TextIO, total: int,
+                  progress_every: int = 100, log: TextIO = sys.stderr) -> Dict[str, Any]:
+    """
+    Stream results as JSON Lines and report throughput
+
+    Args:
+        results: Result dictionaries
+        output: Writable text stream for the JSON Lines output
+        total: Number of users in the batch
+        progress_every: Report progress every N users (0 disables progress lines)
+        log: Stream for throughput reporting
+
+    Returns:
+        Summary dictionary with counts and throughput
+    """
+    start = time.perf_counter()
+    done = failed = 0
+
+    for result in results:
+        output.write(json.dumps(result, default=str) + '\n')
+        done += 1
+        if result['status'] != 'ok':
+            failed += 1
+
+        if progress_every and done % progress_every == 0:
+            elapsed = time.perf_counter() - start
+            log.write(f"[{done}/{total}] {done / elapsed:.1f} users/s, {failed} failed\n")
+            log.flush()
+
+    elapsed = time.perf_counter() - start
+    summary = {
+        'users': done,
+        'failed': failed,
+        'elapsed_s': round(elapsed, 3),
+        'users_per_s': round(done / elapsed, 2) if elapsed > 0 else None
+    }
+    log.write(f"Processed {done} users ({failed} failed) in {elapsed:.2f}s "
+              f"({summary['users_per_s']} users/s)\n")
+    return summary
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = argparse.ArgumentParser(description="Generate insights for many users from a manifest")
+    parser.add_argument('manifest', help="JSON Lines manifest of per-user exports and profiles")
+    parser.add_argument('-o', '--output', help="Output JSON Lines file (default: stdout)")
+    parser.add_argument('-w', '--workers', type=int, default=None,
+                        help="Number of worker processes (default: CPU count)")
+    parser.add_argument('-c', '--chunksize', type=int, default=4,
+                        help="Users handed to a worker at a time (default: 4)")
+    parser.add_argument('--progress-every', type=int, default=100,
+                        help="Report throughput every N users (default: 100, 0 to disable)")
+    parser.add_argument('--save-datasets', metavar='DIR',
+                        help="Also save each user's parsed CSV exports as Parquet under DIR/<user_id>")
+    args = parser.parse_args(argv)
+
+    entries = load_manifest(args.manifest)
+    if args.save_datasets:
+        for entry in entries:
+            entry['save_dir'] = args.save_datasets
+    results = run_batch(entries, workers=args.workers, chunksize=args.chunksize)
+
+    if args.output:
+        with open(args.output, 'w') as output:
+            summary = write_results(results, output, len(entries), args.progress_every)
+    else:
+        summary = write_results(results, sys.stdout, len(entries), args.progress_every)
+
+    return 1 if summary['failed'] else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,143 @@
+#!/usr/bin/env python3
+# Import-time benchmark for the CLI, API and library entry points
+
+import os
+import sys
+import json
+import time
+import argparse
+import statistics
+import subprocess
+from typing import List, Dict, Any, Tuple
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Modules whose import cost is measured by default
+DEFAULT_TARGETS = ['utils.formulas', 'parsers', 'analysis', 'storage', 'main', 'app', 'batch']
+
+# Packages reported as loaded or not after each import
+HEAVY_MODULES = ('pandas', 'numpy', 'pyarrow', 'flask')
+
+
+def parse_importtime(stderr: str) -> List[Tuple[str, int, int]]:
+    """
+    Parse the report written by `python -X importtime`
+
+    Args:
+        stderr: Captured standard error of the child interpreter
+
+    Returns:
+        List of (module, self microseconds, cumulative microseconds) in import order
+    """
+    rows = []
+    for line in stderr.splitlines():
+        if not line.startswith('import time:'):
+            continue
+        fields = line[len('import time:'):].split('|')
+        if len(fields) != 3 or not fields[0].strip().isdigit():
+            continue  # header line
+        rows.append((fields[2].strip(), int(fields[0]), int(fields[1])))
+    return rows
+
+
+def measure(target: str) -> Dict[str, Any]:
+    """
+    Import a module in a fresh interpreter and time it
+
+    Args:
+        target: Module name to import
+
+    Returns:
+        Dictionary with wall time, the module's cumulative import time, the
+        per-module rows and which heavy packages ended up loaded
+    """
+    code = (f"import sys; import {target}; "
+            f"print(','.join(m for m in {HEAVY_MODULES!r} if m in sys.modules))")
+    start = time.perf_counter()
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', code],
+                            cwd=ROOT, capture_output=True, text=True)
+    wall = time.perf_counter() - start
+    if result.returncode != 0:
+        raise RuntimeError(f"Importing {target} failed:\n{result.stderr[-2000:]}")
+
+    rows = parse_importtime(result.stderr)
+    cumulative = next((total for name, _, total in reversed(rows) if name == target), 0)
+    loaded = result.stdout.strip().splitlines()[-1] if result.stdout.strip() else ''
+    return {
+        'wall': wall,
+        'import': cumulative / 1e6,
+        'rows': rows,
+        'loaded': [name for name in loaded.split(',') if name]
+    }
+
+
+def benchmark(target: str, repeat: int) -> Dict[str, Any]:
+    """
+    Median import cost of a module over several cold interpreters
+
+    Args:
+        target: Module name to import
+        repeat: Number of interpreters to start
+
+    Returns:
+        Dictionary of summary statistics and the slowest run's module rows
+    """
+    runs = [measure(target) for _ in range(repeat)]
+    return {
+        'target': target,
+        'runs': repeat,
+        'importSeconds': statistics.median(run['import'] for run in runs),
+        'wallSeconds': statistics.median(run['wall'] for run in runs),
+        'minWallSeconds': min(run['wall'] for run in runs),
+        'heavyModules': runs[-1]['loaded'],
+        'rows': max(runs, key=lambda run: run['import'])['rows']
+    }
+
+
+def slowest_modules(rows: List[Tuple[str, int, int]], count: int) -> List[Tuple[str, int]]:
+    """
+    Modules with the largest self import time
+
+    Args:
+        rows: Rows returned by parse_importtime
+        count: Number of modules to return
+
+    Returns:
+        List of (module, self microseconds)
+    """
+    return [(name, own) for name, own, _ in sorted(rows, key=lambda row: row[1], reverse=True)[:count]]
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Measure cold import time of the project's entry points with -X importtime")
+    parser.add_argument('targets', nargs='*', default=DEFAULT_TARGETS,
+                        help=f"Modules to import (default: {' '.join(DEFAULT_TARGETS)})")
+    parser.add_argument('-n', '--repeat', type=int, default=5,
+                        help="Fresh interpreters per target; the median is reported (default: 5)")
+    parser.add_argument('--top', type=int, default=0, metavar='N',
+                        help="Also list the N modules with the largest self time per target")
+    parser.add_argument('--json', action='store_true', help="Write results as JSON")
+    args = parser.parse_args(argv)
+
+    results = [benchmark(target, args.repeat) for target in args.targets]
+
+    if args.json:
+        for result in results:
+            result['slowest'] = slowest_modules(result['rows'], args.top) if args.top else []
+            del result['rows']
+        json.dump(results, sys.stdout, indent=2)
+        print()
+        return 0
+
+    print(f"{'target':<16} {'import ms':>10} {'wall ms':>10}  heavy modules loaded")
+    for result in results:
+        print(f"{result['target']:<16} {result['importSeconds'] * 1000:>10.1f} "
+              f"{result['wallSeconds'] * 1000:>10.1f}  {', '.join(result['heavyModules']) or '-'}")
+        for name, own in slowest_modules(result['rows'], args.top):
+            print(f"    {own / 1000:>8.1f} ms  {name}")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,293 @@
+#!/usr/bin/env python3
+# Performance regression gate: compare the parse -> analyze -> insights path against stored baselines
+
+import io
+import os
+import sys
+import json
+import time
+import argparse
+import platform
+import tempfile
+from typing import List, Dict, Any, Callable, Tuple, Optional
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_exports
+from benchmarks.suite import Context, PROFILE, measure
+
+DEFAULT_BASELINES = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'baselines.json')
+
+# Fixed datasets the gate runs on; changing them invalidates the stored baselines
+DATASETS = {
+    'medium': {'months': 24, 'exercises': 40, 'meals_per_day': 4, 'seed': 7},
+    'large': {'months': 120, 'exercises': 150, 'meals_per_day': 4, 'seed': 7},
+}
+
+# Allowed growth over the baseline, as a fraction
+DEFAULT_TIME_TOLERANCE = 0.25
+DEFAULT_MEMORY_TOLERANCE = 0.10
+
+# Smaller absolute changes are within timer and allocator noise and never fail the gate
+MIN_DELTA = {'seconds': 0.002, 'peakBytes': 256 * 1024, 'blocks': 200}
+
+METRICS = ('seconds', 'peakBytes', 'blocks')
+
+# Timed calls per stage; the fastest counts
+DEFAULT_REPEAT = 5
+
+
+def _stages() -> List[Tuple[str, Callable[[Context], Any]]]:
+    """(name, function of a Context) of each gated stage, in pipeline order"""
+    from parsers.strong_parser import StrongParser
+    from analysis.workout_analysis import WorkoutAnalyzer
+    from analysis.nutrition_analysis import NutritionAnalyzer
+
+    return [
+        ('StrongParser.parse', lambda c: StrongParser().parse(c.paths['strong_file'])),
+        ('WorkoutAnalyzer()', lambda c: WorkoutAnalyzer(c.workouts)),
+        ('WorkoutAnalyzer.get_exercise_progress', lambda c: c.workout_analyzer.get_exercise_progress(c.top_exercise)),
+        ('NutritionAnalyzer()', lambda c: NutritionAnalyzer(c.nutrition, c.weights)),
+        ('InsightGenerator.get_combined_insights', lambda c: c.insight_generator.get_combined_insights(**PROFILE)),
+        ('POST /analyze', lambda c: c.post_analyze()),
+    ]
+
+
+def _calibration_work():
+    """Fixed CSV parse and grouping, a stand-in for the gated path's mix of Python and pandas work"""
+    import pandas as pd
+
+    rows = '\n'.join(f"2024-01-{row % 28 + 1:02d},Exercise {row % 50},{row % 7},{row * 0.5}" for row in range(50_000))
+    frame = pd.read_csv(io.StringIO('date,name,set,weight\n' + rows), parse_dates=['date'])
+    frame.groupby(['name', 'date'])['weight'].agg(['max', 'sum'])
+
+
+def calibrate(repeat: int) -> float:
+    """Fastest time of the fixed calibration workload, in seconds"""
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        _calibration_work()
+        times.append(time.perf_counter() - started)
+    return min(times)
+
+
+def machine_slowdown(baseline_calibration: Optional[float], calibration: Optional[float]) -> float:
+    """
+    How much slower the machine ran a stage than when its baseline was recorded
+
+    Never below 1, so a quiet machine does not tighten the gate; 1 for
+    baselines recorded without a calibration.
+    """
+    if not baseline_calibration or not calibration:
+        return 1.0
+    return max(1.0, calibration / baseline_calibration)
+
+
+def adjust_for_load(baselines: Dict[str, Dict[str, float]], measured: Dict[str, Dict[str, float]]):
+    """
+    Scale measured times to the machine speed their baselines were recorded at
+
+    Load on a shared machine comes in bursts, so each stage is judged by the
+    calibration workload timed right before it rather than once per run.
+    """
+    for key, values in measured.items():
+        baseline = baselines.get(key) or {}
+        values['seconds'] /= machine_slowdown(baseline.get('calibrationSeconds'), values.get('calibrationSeconds'))
+
+
+def generate_contexts(workdir: str, log=sys.stderr) -> Dict[str, Context]:
+    """Write each fixed dataset's exports and build its Context"""
+    contexts = {}
+    for dataset, scale in DATASETS.items():
+        print(f"Generating {dataset} ({', '.join(f'{key}={value}' for key, value in scale.items())})...", file=log)
+        contexts[dataset] = Context(generate_exports(os.path.join(workdir, dataset), **scale))
+    return contexts
+
+
+def run_stages(contexts: Dict[str, Context], repeat: int, keys: List[str] = None,
+               only: List[str] = None) -> Dict[str, Dict[str, float]]:
+    """
+    Measure stages on the fixed datasets
+
+    Args:
+        contexts: Context of each dataset, from generate_contexts
+        repeat: Timed calls per stage
+        keys: 'dataset/stage' keys to measure; defaults to every stage on every dataset
+        only: Substrings selecting stages by name; empty selects all
+
+    Returns:
+        Dictionary of {'dataset/stage': {metric: value}}, with the calibration
+        workload's time right before each stage as 'calibrationSeconds'
+    """
+    measured = {}
+    for dataset, context in contexts.items():
+        for name, func in _stages():
+            key = f"{dataset}/{name}"
+            if (keys is not None and key not in keys) or (only and not any(text in name for text in only)):
+                continue
+            calibration = calibrate(repeat)
+            result = measure(lambda: func(context), repeat)
+            measured[key] = {metric: result[metric] for metric in METRICS}
+            measured[key]['calibrationSeconds'] = calibration
+    return measured
+
+
+def compare(baselines: Dict[str, Dict[str, float]], measured: Dict[str, Dict[str, float]],
+            time_tolerance: float, memory_tolerance: float) -> List[Dict[str, Any]]:
+    """
+    Compare measured stages against their baselines
+
+    A metric regresses when it grew by more than its tolerance and by more
+    than MIN_DELTA, so sub-millisecond jitter on fast stages is ignored.
+
+    Args:
+        baselines: Stored {'dataset/stage': {metric: value}}
+        measured: Current measurements in the same shape
+        time_tolerance: Allowed relative growth of seconds
+        memory_tolerance: Allowed relative growth of peak bytes and retained blocks
+
+    Returns:
+        One row per stage and metric: {'stage', 'metric', 'baseline', 'current', 'change', 'status'}
+    """
+    rows = []
+    for key, current in measured.items():
+        baseline = baselines.get(key)
+        for metric in METRICS:
+            if baseline is None or metric not in baseline:
+                rows.append({'stage': key, 'metric': metric, 'baseline': None, 'current': current[metric],
+                             'change': None, 'status': 'new'})
+                continue
+            before, after = baseline[metric], current[metric]
+            change = (after - before) / before if before else 0.0
+            tolerance = time_tolerance if metric == 'seconds' else memory_tolerance
+            if change > tolerance and after - before > MIN_DELTA[metric]:
+                status = 'SLOWER' if metric == 'seconds' else 'HUNGRIER'
+            elif change < -tolerance and before - after > MIN_DELTA[metric]:
+                status = 'improved'
+            else:
+                status = 'ok'
+            rows.append({'stage': key, 'metric': metric, 'baseline': before, 'current': after,
+                         'change': change, 'status': status})
+    return rows
+
+
+def _format(metric: str, value: float) -> str:
+    if value is None:
+        return '-'
+    if metric == 'seconds':
+        return f"{value * 1000:.2f} ms"
+    if metric == 'peakBytes':
+        return f"{value / 2**20:.2f} MiB"
+    return f"{value:.0f}"
+
+
+def report(rows: List[Dict[str, Any]], output=sys.stdout):
+    """Print the per-stage diff, regressions first"""
+    order = {'SLOWER': 0, 'HUNGRIER': 0, 'new': 1, 'improved': 2, 'ok': 3}
+    width = max((len(row['stage']) for row in rows), default=5)
+    print(f"{'stage':<{width}} {'metric':<9} {'baseline':>12} {'current':>12} {'change':>8}  status", file=output)
+    for row in sorted(rows, key=lambda row: order[row['status']]):
+        change = f"{row['change'] * 100:+.1f}%" if row['change'] is not None else '-'
+        print(f"{row['stage']:<{width}} {row['metric']:<9} {_format(row['metric'], row['baseline']):>12} "
+              f"{_format(row['metric'], row['current']):>12} {change:>8}  {row['status']}", file=output)
+
+
+def load_baselines(path: str) -> Dict[str, Dict[str, float]]:
+    """
+    Read stored baselines
+
+    Raises:
+        FileNotFoundError: If the file does not exist
+        ValueError: If they were recorded on different datasets
+    """
+    with open(path) as f:
+        stored = json.load(f)
+    if stored.get('datasets') != DATASETS:
+        raise ValueError(f"{path} was recorded on different datasets; record new baselines with --update")
+    return stored['stages']
+
+
+def save_baselines(path: str, measured: Dict[str, Dict[str, float]]):
+    """Write baselines, keeping stored stages that were not measured this time"""
+    stages = {}
+    try:
+        stages = load_baselines(path)
+    except (FileNotFoundError, ValueError):
+        pass
+    stages.update(measured)
+    with open(path, 'w') as f:
+        json.dump({
+            'datasets': DATASETS,
+            'python': platform.python_version(),
+            'machine': platform.machine(),
+            'stages': dict(sorted(stages.items()))
+        }, f, indent=2)
+        f.write('\n')
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Fail when the parse -> analyze -> insights path got slower or allocates more "
+                    "than its stored baselines")
+    parser.add_argument('--baselines', default=DEFAULT_BASELINES,
+                        help="Baselines file (default: benchmarks/baselines.json)")
+    parser.add_argument('--update', action='store_true', help="Record the measurements as the new baselines")
+    parser.add_argument('--tolerance', type=float, default=DEFAULT_TIME_TOLERANCE,
+                        help=f"Allowed relative slowdown (default: {DEFAULT_TIME_TOLERANCE})")
+    parser.add_argument('--memory-tolerance', type=float, default=DEFAULT_MEMORY_TOLERANCE,
+                        help=f"Allowed relative growth of peak memory and retained blocks "
+                             f"(default: {DEFAULT_MEMORY_TOLERANCE})")
+    parser.add_argument('-n', '--repeat', type=int, default=DEFAULT_REPEAT,
+                        help=f"Timed calls per stage; the fastest counts (default: {DEFAULT_REPEAT})")
+    parser.add_argument('-k', '--only', action='append', default=[], metavar='TEXT',
+                        help="Only run stages whose name contains TEXT (repeatable)")
+    parser.add_argument('--json', metavar='FILE', help="Also write the comparison as JSON")
+    args = parser.parse_args(argv)
+
+    baselines = None
+    if not args.update:
+        try:
+            baselines = load_baselines(args.baselines)
+        except FileNotFoundError:
+            print(f"No baselines at {args.baselines}; record them with --update", file=sys.stderr)
+            return 2
+        except ValueError as e:
+            print(e, file=sys.stderr)
+            return 2
+
+    with tempfile.TemporaryDirectory(prefix='synergyfit-regression-') as workdir:
+        contexts = generate_contexts(workdir)
+        measured = run_stages(contexts, args.repeat, only=args.only)
+
+        if args.update:
+            save_baselines(args.baselines, measured)
+            print(f"Recorded {len(measured)} stage baselines in {args.baselines}")
+            return 0
+
+        adjust_for_load(baselines, measured)
+        rows = compare(baselines, measured, args.tolerance, args.memory_tolerance)
+        # A slowdown must survive a second round of runs, so a burst of load on the machine does not fail the gate
+        slower = [row['stage'] for row in rows if row['status'] == 'SLOWER']
+        if slower:
+            print(f"Re-measuring {len(slower)} slower stage(s)...", file=sys.stderr)
+            remeasured = run_stages(contexts, args.repeat, keys=slower)
+            adjust_for_load(baselines, remeasured)
+            for key, again in remeasured.items():
+                measured[key]['seconds'] = min(measured[key]['seconds'], again['seconds'])
+            rows = compare(baselines, measured, args.tolerance, args.memory_tolerance)
+
+    report(rows)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(rows, f, indent=2)
+
+    regressions = [row for row in rows if row['status'] in ('SLOWER', 'HUNGRIER')]
+    if regressions:
+        print(f"\n{len(regressions)} regression(s) beyond tolerance", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
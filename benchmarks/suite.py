@@ -0,0 +1,275 @@
+#!/usr/bin/env python3
+# End-to-end benchmark suite: time and peak memory of each pipeline path across data sizes
+
+import gc
+import io
+import os
+import sys
+import json
+import math
+import time
+import argparse
+import tempfile
+import statistics
+import tracemalloc
+from typing import List, Dict, Any, Callable, Tuple
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from benchmarks.synthetic import generate_exports
+
+# History lengths (months) of the default size sweep
+DEFAULT_MONTHS = [1, 12, 60, 240]
+
+# Exercise counts of the --vary exercises sweep
+DEFAULT_EXERCISES = [10, 50, 150, 500]
+
+# Scaling exponents above this are reported as superlinear
+SUPERLINEAR_EXPONENT = 1.2
+
+PROFILE = {'height_cm': 180, 'age_years': 35, 'sex': 'M'}
+
+
+class Context:
+    """Exports of one size with everything built from them, shared by the benchmark targets"""
+
+    def __init__(self, paths: Dict[str, str]):
+        from parsers.strong_parser import parse_strong_csv
+        from parsers.mfp_parser import parse_mfp_csv_nutrition, parse_mfp_csv_weight
+        from analysis.workout_analysis import WorkoutAnalyzer
+        from analysis.nutrition_analysis import NutritionAnalyzer
+        from analysis.insights import InsightGenerator
+
+        self.paths = paths
+        self.workouts = parse_strong_csv(paths['strong_file'])
+        self.nutrition = parse_mfp_csv_nutrition(paths['nutrition_file'])
+        self.weights = parse_mfp_csv_weight(paths['weight_file'])
+        self.workout_analyzer = WorkoutAnalyzer(self.workouts)
+        self.nutrition_analyzer = NutritionAnalyzer(self.nutrition, self.weights)
+        self.insight_generator = InsightGenerator.from_analyzers(self.workout_analyzer, self.nutrition_analyzer)
+
+        sessions = self.workout_analyzer.sessions_df['exercise_name'].value_counts()
+        self.top_exercise = sessions.index[0] if len(sessions) else ''
+        self.sizes = {
+            'sets': len(self.workout_analyzer.sets_df),
+            'days': len(self.nutrition_analyzer.nutrition_df),
+            'weights': len(self.nutrition_analyzer.weight_df)
+        }
+        self.sizes['rows'] = sum(self.sizes.values())
+        self.sizes['exercises'] = len(self.workout_analyzer.exercises)
+        self.uploads = {}
+        for field, path in paths.items():
+            with open(path, 'rb') as f:
+                self.uploads[field] = f.read()
+        self._client = None
+
+    def post_analyze(self):
+        if self._client is None:
+            from app import app
+            # Every request must run the analysis rather than hit the response cache
+            app.config.update(RESPONSE_CACHE_ENTRIES=0, RESPONSE_CACHE_DIR=None)
+            app.extensions.pop('response_cache', None)
+            self._client = app.test_client()
+        data = {field: (io.BytesIO(content), os.path.basename(self.paths[field]))
+                for field, content in self.uploads.items()}
+        response = self._client.post('/analyze', data=data, content_type='multipart/form-data')
+        if response.status_code != 200:
+            raise RuntimeError(f"/analyze returned {response.status_code}: {response.get_data(as_text=True)[:200]}")
+
+
+def _targets() -> List[Tuple[str, str, Callable[[Context], Any]]]:
+    """(name, size key, function of a Context) of every benchmarked path"""
+    from parsers.strong_parser import parse_strong_csv
+    from parsers.mfp_parser import parse_mfp_csv_nutrition, parse_mfp_csv_meals, parse_mfp_csv_weight
+    from analysis.workout_analysis import WorkoutAnalyzer
+    from analysis.nutrition_analysis import NutritionAnalyzer
+
+    return [
+        ('parse_strong_csv', 'sets', lambda c: parse_strong_csv(c.paths['strong_file'])),
+        ('parse_mfp_csv_nutrition', 'days', lambda c: parse_mfp_csv_nutrition(c.paths['nutrition_file'])),
+        ('parse_mfp_csv_meals', 'days', lambda c: parse_mfp_csv_meals(c.paths['nutrition_file'])),
+        ('parse_mfp_csv_weight', 'weights', lambda c: parse_mfp_csv_weight(c.paths['weight_file'])),
+
+        ('WorkoutAnalyzer()', 'sets', lambda c: WorkoutAnalyzer(c.workouts)),
+        ('WorkoutAnalyzer.get_exercise_progress', 'sets',
+         lambda c: c.workout_analyzer.get_exercise_progress(c.top_exercise)),
+        ('WorkoutAnalyzer.get_volume_trends', 'sets', lambda c: c.workout_analyzer.get_volume_trends()),
+        ('WorkoutAnalyzer.get_volume_trend', 'sets',
+         lambda c: c.workout_analyzer.get_volume_trend(c.top_exercise)),
+        ('WorkoutAnalyzer.get_workout_frequency', 'sets', lambda c: c.workout_analyzer.get_workout_frequency()),
+        ('WorkoutAnalyzer.identify_stalled_exercises', 'sets',
+         lambda c: c.workout_analyzer.identify_stalled_exercises()),
+        ('WorkoutAnalyzer.exercise_volumes', 'sets', lambda c: c.workout_analyzer.exercise_volumes),
+        ('WorkoutAnalyzer.get_period_totals', 'sets', lambda c: c.workout_analyzer.get_period_totals('week')),
+        ('WorkoutAnalyzer.get_exercise_rollup', 'sets',
+         lambda c: c.workout_analyzer.get_exercise_rollup('month')),
+
+        ('NutritionAnalyzer()', 'days', lambda c: NutritionAnalyzer(c.nutrition, c.weights)),
+        ('NutritionAnalyzer.get_weight_trend', 'weights', lambda c: c.nutrition_analyzer.get_weight_trend()),
+        ('NutritionAnalyzer.get_calorie_adherence', 'days',
+         lambda c: c.nutrition_analyzer.get_calorie_adherence(2500)),
+        ('NutritionAnalyzer.get_macronutrient_ratios', 'days',
+         lambda c: c.nutrition_analyzer.get_macronutrient_ratios()),
+        ('NutritionAnalyzer.estimate_tdee', 'days', lambda c: c.nutrition_analyzer.estimate_tdee(**PROFILE)),
+        ('NutritionAnalyzer.get_intake_rollup', 'days', lambda c: c.nutrition_analyzer.get_intake_rollup('week')),
+        ('NutritionAnalyzer.get_weight_rollup', 'weights',
+         lambda c: c.nutrition_analyzer.get_weight_rollup('week')),
+
+        ('InsightGenerator.get_combined_insights', 'rows',
+         lambda c: c.insight_generator.get_combined_insights(**PROFILE)),
+        ('POST /analyze', 'rows', lambda c: c.post_analyze()),
+    ]
+
+
+def measure(func: Callable[[], Any], repeat: int) -> Dict[str, float]:
+    """
+    Time a function and trace its peak memory
+
+    Timed runs and the traced run are separate, since tracemalloc slows
+    allocation-heavy code down several times. The traced run also counts
+    the memory blocks the call allocated and still holds when it returns,
+    i.e. its result and anything it cached.
+
+    Args:
+        func: Function to call
+        repeat: Number of timed calls
+
+    Returns:
+        Dictionary with the fastest and median seconds, the peak traced bytes
+        and the number of blocks retained
+    """
+    times = []
+    for _ in range(repeat):
+        started = time.perf_counter()
+        func()
+        times.append(time.perf_counter() - started)
+
+    tracemalloc.start()
+    result = func()
+    _, peak = tracemalloc.get_traced_memory()
+    # Count what the call keeps alive, not garbage that the next collection would free
+    gc.collect()
+    blocks = sum(stat.count for stat in tracemalloc.take_snapshot().statistics('filename'))
+    tracemalloc.stop()
+    del result
+    return {'seconds': min(times), 'medianSeconds': statistics.median(times), 'peakBytes': peak,
+            'blocks': blocks}
+
+
+def scaling_exponent(sizes: List[int], seconds: List[float]) -> float:
+    """
+    Least-squares slope of log(time) against log(size)
+
+    1 means time grows linearly with the input, 2 quadratically. Fixed costs
+    pull the slope below 1 at small sizes, so compare sweeps whose largest
+    size is well past them.
+
+    Returns:
+        Exponent, or NaN with fewer than two distinct sizes
+    """
+    points = [(math.log(size), math.log(max(elapsed, 1e-9))) for size, elapsed in zip(sizes, seconds) if size > 0]
+    if len({x for x, _ in points}) < 2:
+        return float('nan')
+    mean_x = statistics.fmean(x for x, _ in points)
+    mean_y = statistics.fmean(y for _, y in points)
+    covariance = sum((x - mean_x) * (y - mean_y) for x, y in points)
+    variance = sum((x - mean_x) ** 2 for x, _ in points)
+    return covariance / variance
+
+
+def run_suite(scales: List[Dict[str, Any]], repeat: int, only: List[str], workdir: str,
+              vary: str = 'months', log=sys.stderr) -> List[Dict[str, Any]]:
+    """
+    Generate exports for each scale and measure every target on them
+
+    Args:
+        scales: generate_exports keyword arguments of each scale
+        repeat: Timed calls per target and scale
+        only: Substrings selecting targets by name; empty selects all
+        workdir: Directory for the generated exports
+        vary: Swept dimension; with 'exercises', sizes are exercise counts
+        log: Stream for progress messages
+
+    Returns:
+        One result per target and scale: {'target', 'scale', 'size', 'sizes', and measure()'s keys}
+    """
+    targets = [target for target in _targets() if not only or any(text in target[0] for text in only)]
+    results = []
+    for index, scale in enumerate(scales):
+        label = ', '.join(f"{key}={value}" for key, value in scale.items())
+        print(f"Generating {label}...", file=log)
+        paths = generate_exports(os.path.join(workdir, str(index)), **scale)
+        context = Context(paths)
+        print(f"  {context.sizes['sets']} sets, {context.sizes['days']} days, "
+              f"{context.sizes['weights']} weigh-ins", file=log)
+
+        for name, size_key, target in targets:
+            measured = measure(lambda: target(context), repeat)
+            size = context.sizes['exercises'] if vary == 'exercises' else context.sizes[size_key]
+            results.append({'target': name, 'scale': scale, 'size': size,
+                            'sizes': context.sizes, **measured})
+    return results
+
+
+def report(results: List[Dict[str, Any]], output=sys.stdout):
+    """Print one scaling curve per target with its exponent"""
+    by_target: Dict[str, List[Dict[str, Any]]] = {}
+    for result in results:
+        by_target.setdefault(result['target'], []).append(result)
+
+    for name, points in by_target.items():
+        sizes = [point['size'] for point in points]
+        seconds = [point['seconds'] for point in points]
+        exponent = scaling_exponent(sizes, seconds)
+        # The step between the two largest sizes is least affected by fixed costs
+        last_step = scaling_exponent(sizes[-2:], seconds[-2:])
+        flag = '  SUPERLINEAR' if last_step > SUPERLINEAR_EXPONENT else ''
+        print(f"\n{name}  (exponent {exponent:.2f} overall, {last_step:.2f} at the largest sizes){flag}",
+              file=output)
+        print(f"  {'size':>10} {'ms':>10} {'median ms':>10} {'peak MiB':>10} {'us/row':>10}", file=output)
+        for point in points:
+            per_row = point['seconds'] / point['size'] * 1e6 if point['size'] else float('nan')
+            print(f"  {point['size']:>10} {point['seconds'] * 1000:>10.2f} {point['medianSeconds'] * 1000:>10.2f} "
+                  f"{point['peakBytes'] / 2**20:>10.2f} {per_row:>10.2f}", file=output)
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(
+        description="Time and trace the memory of the parsers, analyzers, insights and /analyze "
+                    "on synthetic exports of growing size")
+    parser.add_argument('--vary', choices=('months', 'exercises'), default='months',
+                        help="Dimension to sweep (default: months)")
+    parser.add_argument('--sizes', type=float, nargs='+',
+                        help=f"Values of the swept dimension (default: {DEFAULT_MONTHS} months "
+                             f"or {DEFAULT_EXERCISES} exercises)")
+    parser.add_argument('--months', type=float, default=24, help="History length when sweeping exercises")
+    parser.add_argument('--exercises', type=int, default=40, help="Exercise count when sweeping months")
+    parser.add_argument('--meals', type=int, default=4, help="Meals per day (default: 4)")
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('-n', '--repeat', type=int, default=3, help="Timed calls per target (default: 3)")
+    parser.add_argument('-k', '--only', action='append', default=[], metavar='TEXT',
+                        help="Only run targets whose name contains TEXT (repeatable)")
+    parser.add_argument('--json', metavar='FILE', help="Also write the raw results as JSON")
+    args = parser.parse_args(argv)
+
+    if args.vary == 'months':
+        sizes = args.sizes or DEFAULT_MONTHS
+        scales = [{'months': size, 'exercises': args.exercises} for size in sizes]
+    else:
+        sizes = args.sizes or DEFAULT_EXERCISES
+        scales = [{'months': args.months, 'exercises': int(size)} for size in sizes]
+    for scale in scales:
+        scale.update(meals_per_day=args.meals, seed=args.seed)
+
+    with tempfile.TemporaryDirectory(prefix='synergyfit-bench-') as workdir:
+        results = run_suite(scales, args.repeat, args.only, workdir, args.vary)
+
+    report(results)
+    if args.json:
+        with open(args.json, 'w') as f:
+            json.dump(results, f, indent=2)
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+# Seeded generator of realistic Strong and MyFitnessPal exports for benchmarks
+
+import os
+import csv
+import sys
+import random
+import argparse
+from datetime import date, datetime, timedelta
+from typing import List, Dict, Optional
+
+STRONG_COLUMNS = ['Date', 'Workout Name', 'Duration', 'Exercise Name', 'Set Order', 'Weight', 'Reps',
+                  'Distance', 'Seconds', 'Notes', 'Workout Notes', 'RPE']
+NUTRITION_COLUMNS = ['Date', 'Meal', 'Time', 'Calories', 'Fat (g)', 'Cholesterol', 'Sodium (mg)',
+                     'Carbohydrates (g)', 'Fiber', 'Sugar', 'Protein (g)', 'Note']
+MEASUREMENT_COLUMNS = ['Date', 'Weight', 'Body Fat %']
+
+MOVEMENTS = [
+    'Bench Press', 'Incline Bench Press', 'Decline Bench Press', 'Squat', 'Front Squat', 'Deadlift',
+    'Romanian Deadlift', 'Overhead Press', 'Bent Over Row', 'Pull Up', 'Chin Up', 'Lat Pulldown',
+    'Seated Row', 'Bicep Curl', 'Hammer Curl', 'Preacher Curl', 'Triceps Extension', 'Skullcrusher',
+    'Triceps Pushdown', 'Lateral Raise', 'Front Raise', 'Reverse Fly', 'Chest Fly', 'Leg Press',
+    'Leg Extension', 'Lying Leg Curl', 'Seated Leg Curl', 'Standing Calf Raise', 'Seated Calf Raise',
+    'Hip Thrust', 'Lunge', 'Bulgarian Split Squat', 'Shrug', 'Face Pull', 'Upright Row', 'Dip',
+    'Push Up', 'Good Morning', 'Hack Squat', 'Glute Kickback', 'Ab Wheel', 'Cable Crunch',
+    'Hanging Leg Raise', 'Back Extension', 'Farmers Walk', 'Pendlay Row', 'T Bar Row', 'Pullover',
+    'Arnold Press', 'Step Up',
+]
+EQUIPMENT = ['Barbell', 'Dumbbell', 'Machine', 'Cable', 'Smith Machine', 'Kettlebell', 'Band',
+             'Bodyweight', 'EZ Bar', 'Trap Bar']
+CARDIO = ['Running', 'Cycling (Indoor)', 'Rowing (Machine)', 'Elliptical Trainer']
+ROUTINES = ['Push', 'Pull', 'Legs', 'Upper', 'Lower', 'Full Body']
+MEALS = ['Breakfast', 'Lunch', 'Dinner', 'Snacks', 'Meal 5', 'Meal 6']
+
+
+def exercise_names(count: int) -> List[str]:
+    """
+    Distinct exercise names in Strong's 'Movement (Equipment)' style
+
+    Args:
+        count: Number of names; a few are cardio when count is large enough
+
+    Returns:
+        List of names, the most common movements first
+    """
+    cardio = CARDIO[:max(0, min(len(CARDIO), count // 10))]
+    names = [f"{movement} ({equipment})" for equipment in EQUIPMENT for movement in MOVEMENTS]
+    names = names[:count - len(cardio)]
+    # Beyond movements x equipment, number the variations
+    names += [f"{MOVEMENTS[i % len(MOVEMENTS)]} Variation {i // len(MOVEMENTS) + 1}"
+              for i in range(count - len(cardio) - len(names))]
+    return names + cardio
+
+
+def _write_csv(path: str, columns: List[str], rows: List[list]):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        writer.writerow(columns)
+        writer.writerows(rows)
+
+
+def strong_rows(rng: random.Random, start: date, days: int, exercises: List[str]) -> List[list]:
+    """Workouts on three to five days a week, with progressive loading and occasional warm-up sets"""
+    routines = ROUTINES[:3] if len(exercises) < 30 else ROUTINES
+    pools = {routine: exercises[i::len(routines)] or exercises for i, routine in enumerate(routines)}
+    strength = {name: rng.uniform(20, 120) for name in exercises}
+    training_days = rng.choice([3, 4, 5])
+
+    rows = []
+    routine_index = 0
+    for offset in range(days):
+        day = start + timedelta(days=offset)
+        if rng.random() > training_days / 7:
+            continue
+        routine = routines[routine_index % len(routines)]
+        routine_index += 1
+        started = datetime.combine(day, datetime.min.time()) + timedelta(hours=rng.choice([6, 7, 12, 17, 18, 19]),
+                                                                           minutes=rng.randrange(0, 60, 5))
+        stamp = started.strftime('%Y-%m-%d %H:%M:%S')
+        duration = f"{rng.randint(45, 95)}m"
+        pool = pools[routine]
+
+        for name in rng.sample(pool, min(len(pool), rng.randint(4, 7))):
+            if name in CARDIO:
+                rows.append([stamp, routine, duration, name, 1, '', '', round(rng.uniform(2, 10), 2),
+                             rng.randint(900, 3600), '', '', ''])
+                continue
+            # Slow progression with deloads and noise
+            strength[name] *= rng.choice([1.0, 1.0, 1.01, 1.02, 0.97])
+            if rng.random() < 0.3:
+                rows.append([stamp, routine, duration, name, 'W', round(strength[name] * 0.5, 1),
+                             rng.randint(8, 12), '', '', '', '', ''])
+            for set_order in range(1, rng.randint(3, 5) + 1):
+                weight = round(strength[name] * rng.uniform(0.9, 1.05) / 2.5) * 2.5
+                rpe = rng.choice(['', '', 7, 8, 8.5, 9])
+                rows.append([stamp, routine, duration, name, set_order, weight, rng.randint(4, 12),
+                             '', '', '', '', rpe])
+    return rows
+
+
+def nutrition_rows(rng: random.Random, start: date, days: int, meals_per_day: int) -> List[list]:
+    """Logged meals on about nine days in ten, with macros consistent with the calories"""
+    target = rng.uniform(2000, 3200)
+    meals = MEALS[:meals_per_day]
+    rows = []
+    for offset in range(days):
+        if rng.random() < 0.1:
+            continue
+        day = (start + timedelta(days=offset)).isoformat()
+        for meal in meals:
+            if meal == 'Snacks' and rng.random() < 0.3:
+                continue
+            calories = max(50.0, rng.gauss(target / len(meals), 150))
+            protein = calories * rng.uniform(0.2, 0.35) / 4
+            fat = calories * rng.uniform(0.2, 0.35) / 9
+            carbs = max(0.0, (calories - protein * 4 - fat * 9) / 4)
+            rows.append([day, meal, '', round(calories), round(fat, 1), rng.randint(0, 150),
+                         rng.randint(200, 1200), round(carbs, 1), round(carbs * rng.uniform(0.05, 0.15), 1),
+                         round(carbs * rng.uniform(0.1, 0.3), 1), round(protein, 1), ''])
+    return rows
+
+
+def measurement_rows(rng: random.Random, start: date, days: int) -> List[list]:
+    """Weigh-ins on most days following a slow random walk; body fat on some of them"""
+    weight = rng.uniform(60, 100)
+    trend = rng.uniform(-0.03, 0.03)
+    body_fat = rng.uniform(10, 28)
+    rows = []
+    for offset in range(days):
+        weight += trend + rng.gauss(0, 0.15)
+        if rng.random() < 0.4:
+            continue
+        fat = round(body_fat + rng.gauss(0, 0.5), 1) if rng.random() < 0.3 else ''
+        rows.append([(start + timedelta(days=offset)).isoformat(), round(weight, 1), fat])
+    return rows
+
+
+def generate_exports(directory: str, months: float = 12, exercises: int = 40, meals_per_day: int = 4,
+                     seed: int = 0, start: Optional[date] = None) -> Dict[str, str]:
+    """
+    Write a Strong export and MyFitnessPal nutrition and measurement exports
+
+    The same arguments always produce byte-identical files.
+
+    Args:
+        directory: Destination directory, created if needed
+        months: History length in months (1 to 240)
+        exercises: Number of distinct exercises (10 to 500)
+        meals_per_day: Meals logged per day (1 to 6)
+        seed: Random seed
+        start: First day of the history; defaults to 2005-01-01
+
+    Returns:
+        Dictionary of {upload field: path}
+    """
+    if not 1 <= meals_per_day <= len(MEALS):
+        raise ValueError(f"meals_per_day must be between 1 and {len(MEALS)}")
+    rng = random.Random(seed)
+    start = start or date(2005, 1, 1)
+    days = max(1, round(months * 30.44))
+    end = start + timedelta(days=days - 1)
+    os.makedirs(directory, exist_ok=True)
+
+    paths = {
+        'strong_file': os.path.join(directory, 'strong.csv'),
+        'nutrition_file': os.path.join(directory, f"Nutrition-Summary-{start}-to-{end}.csv"),
+        'weight_file': os.path.join(directory, f"Measurement-Summary-{start}-to-{end}.csv")
+    }
+    _write_csv(paths['strong_file'], STRONG_COLUMNS, strong_rows(rng, start, days, exercise_names(exercises)))
+    _write_csv(paths['nutrition_file'], NUTRITION_COLUMNS, nutrition_rows(rng, start, days, meals_per_day))
+    _write_csv(paths['weight_file'], MEASUREMENT_COLUMNS, measurement_rows(rng, start, days))
+    return paths
+
+
+def main(argv: List[str] = None) -> int:
+    parser = argparse.ArgumentParser(description="Write seeded synthetic Strong and MyFitnessPal exports")
+    parser.add_argument('directory', help="Destination directory")
+    parser.add_argument('--months', type=float, default=12, help="History length in months (default: 12)")
+    parser.add_argument('--exercises', type=int, default=40, help="Distinct exercises (default: 40)")
+    parser.add_argument('--meals', type=int, default=4, help="Meals per day (default: 4)")
+    parser.add_argument('--seed', type=int, default=0, help="Random seed (default: 0)")
+    args = parser.parse_args(argv)
+
+    paths = generate_exports(args.directory, args.months, args.exercises, args.meals, args.seed)
+    for path in paths.values():
+        print(f"{path} ({os.path.getsize(path) / 1024:.0f} KiB)")
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,349 @@
+import pandas as pd
+import numpy as np
+from typing import List, Tuple, Optional
+
+from data_models.workout_models import WorkoutData, ExerciseData, SetData
+from data_models.nutrition_models import DailyNutritionData, MealNutritionData, WeightData
+from utils.exercise_names import default_index
+
+# Column layout of the flat per-set table used by the analyzers
+SET_COLUMNS = [
+    'date',
+    'routine_name',
+    'exercise_name',
+    'set_order',
+    'weight_kg',
+    'reps',
+    'distance_km',
+    'duration_seconds',
+    'set_type',
+]
+
+
+def workouts_to_frame(workout_data: List[WorkoutData]) -> pd.DataFrame:
+    """
+    Flatten workouts into a DataFrame with one row per set
+
+    Args:
+        workout_data: List of WorkoutData objects
+
+    Returns:
+        DataFrame with SET_COLUMNS, dates as datetime64 and numeric columns as floats
+    """
+    columns = {name: [] for name in SET_COLUMNS}
+    for workout in workout_data:
+        for set_data in workout.sets:
+            columns['date'].append(workout.date)
+            columns['routine_name'].append(workout.routine_name)
+            columns['exercise_name'].append(set_data.exercise_name)
+            columns['set_order'].append(set_data.set_order)
+            columns['weight_kg'].append(set_data.weight_kg)
+            columns['reps'].append(set_data.reps)
+            columns['distance_km'].append(set_data.distance_km)
+            columns['duration_seconds'].append(set_data.duration_seconds)
+            columns['set_type'].append(set_data.set_type)
+
+    df = pd.DataFrame(columns, columns=SET_COLUMNS)
+    df['date'] = pd.to_datetime(df['date'])
+    for name in ('set_order', 'weight_kg', 'reps', 'distance_km', 'duration_seconds'):
+        df[name] = pd.to_numeric(df[name], errors='coerce').astype(float)
+    return df
+
+
+# Columns that identify one set, one meal and one weigh-in when merging new data;
+# 'set_label' is derived by set_labels
+SET_KEYS = ['date', 'routine_name', 'exercise_name', 'set_label']
+MEAL_KEYS = ['date', 'meal']
+WEIGHT_KEYS = ['date']
+
+# Column layout of the per-meal nutrition table
+MEAL_COLUMNS = [
+    'date',
+    'meal',
+    'calories',
+    'protein',
+    'carbs',
+    'fat',
+    'fiber',
+    'sugar',
+    'sodium',
+    'cholesterol',
+]
+
+
+def meals_to_frame(meal_data: List[MealNutritionData]) -> pd.DataFrame:
+    """
+    Build a DataFrame with one row per meal, sorted by date
+
+    Args:
+        meal_data: List of MealNutritionData objects
+
+    Returns:
+        DataFrame with MEAL_COLUMNS; dates are datetime.date objects like the
+        analyzers' daily nutrition table
+    """
+    records = [
+        (meal.date, meal.meal, meal.calories_kcal, meal.protein_g, meal.carbs_g, meal.fat_g,
+         meal.fiber_g, meal.sugar_g, meal.sodium_mg, meal.cholesterol_mg)
+        for meal in sorted(meal_data, key=lambda x: x.date)
+    ]
+    df = pd.DataFrame.from_records(records, columns=MEAL_COLUMNS)
+    for name in MEAL_COLUMNS[2:]:
+        df[name] = df[name].astype(float)
+    return df
+
+
+# Column layout of the full daily nutrition table; NutritionAnalyzer.nutrition_df
+# keeps the first seven
+NUTRITION_COLUMNS = [
+    'date',
+    'calories',
+    'protein',
+    'carbs',
+    'fat',
+    'fiber',
+    'sugar',
+    'sodium',
+    'cholesterol',
+]
+ANALYZER_NUTRITION_COLUMNS = NUTRITION_COLUMNS[:7]
+
+# Column layout of the weigh-in table
+WEIGHT_COLUMNS = ['date', 'weight', 'body_fat', 'waist', 'neck', 'hip']
+
+
+def nutrition_to_frame(nutrition_data: List[DailyNutritionData]) -> pd.DataFrame:
+    """
+    Build a DataFrame with one row per day, sorted by date
+
+    Args:
+        nutrition_data: List of DailyNutritionData objects
+
+    Returns:
+        DataFrame with NUTRITION_COLUMNS; dates are datetime.date objects
+    """
+    records = [
+        (day.date, day.calories_kcal, day.protein_g, day.carbs_g, day.fat_g,
+         day.fiber_g, day.sugar_g, day.sodium_mg, day.cholesterol_mg)
+        for day in sorted(nutrition_data, key=lambda x: x.date)
+    ]
+    df = pd.DataFrame.from_records(records, columns=NUTRITION_COLUMNS)
+    for name in NUTRITION_COLUMNS[1:]:
+        df[name] = df[name].astype(float)
+    return df
+
+
+def weights_to_frame(weight_data: List[WeightData]) -> pd.DataFrame:
+    """
+    Build a DataFrame with one row per weigh-in, sorted by date
+
+    Args:
+        weight_data: List of WeightData objects
+
+    Returns:
+        DataFrame with WEIGHT_COLUMNS; dates are datetime.date objects
+    """
+    records = [(entry.date, entry.weight_kg, entry.body_fat_percentage,
+                entry.waist_cm, entry.neck_cm, entry.hip_cm)
+               for entry in sorted(weight_data, key=lambda x: x.date)]
+    df = pd.DataFrame.from_records(records, columns=WEIGHT_COLUMNS)
+    for name in WEIGHT_COLUMNS[1:]:
+        df[name] = df[name].astype(float)
+    return df
+
+
+def frame_to_workouts(sets_df: pd.DataFrame) -> List[WorkoutData]:
+    """
+    Group a per-set DataFrame back into WorkoutData objects
+
+    Sets are grouped by date and workout name in order of appearance, as the
+    Strong parser groups export rows.
+
+    Args:
+        sets_df: Per-set DataFrame laid out like workouts_to_frame's
+
+    Returns:
+        List of WorkoutData objects
+    """
+    workouts = {}
+    set_types = sets_df['set_type'] if 'set_type' in sets_df else [None] * len(sets_df)
+    for day, routine_name, exercise_name, set_order, weight, reps, distance, seconds, set_type in zip(
+            sets_df['date'].dt.date, sets_df['routine_name'], sets_df['exercise_name'],
+            sets_df['set_order'], sets_df['weight_kg'], sets_df['reps'],
+            sets_df['distance_km'], sets_df['duration_seconds'], set_types):
+        routine_name = None if pd.isna(routine_name) else routine_name
+        workout = workouts.get((day, routine_name))
+        if workout is None:
+            workout = workouts[(day, routine_name)] = WorkoutData(date=day, routine_name=routine_name)
+        if all(exercise.name != exercise_name for exercise in workout.exercises):
+            category = default_index().resolve(exercise_name).category
+            workout.exercises.append(ExerciseData(name=exercise_name, category=category))
+        workout.sets.append(SetData(
+            exercise_name=exercise_name,
+            weight_kg=_optional(weight, float),
+            reps=_optional(reps, int),
+            distance_km=_optional(distance, float),
+            duration_seconds=_optional(seconds, int),
+            set_order=_optional(set_order, int),
+            set_type=None if pd.isna(set_type) else set_type
+        ))
+    return list(workouts.values())
+
+
+def frame_to_nutrition(nutrition_df: pd.DataFrame) -> List[DailyNutritionData]:
+    """
+    Convert a daily nutrition DataFrame back into DailyNutritionData objects
+
+    Args:
+        nutrition_df: DataFrame with NUTRITION_COLUMNS (sodium and cholesterol may be absent)
+
+    Returns:
+        List of DailyNutritionData objects
+    """
+    df = nutrition_df.reindex(columns=NUTRITION_COLUMNS)
+    return [
+        DailyNutritionData(
+            date=day, calories_kcal=float(calories), protein_g=float(protein),
+            carbs_g=float(carbs), fat_g=float(fat), fiber_g=_optional(fiber, float),
+            sugar_g=_optional(sugar, float), sodium_mg=_optional(sodium, float),
+            cholesterol_mg=_optional(cholesterol, float)
+        )
+        for day, calories, protein, carbs, fat, fiber, sugar, sodium, cholesterol
+        in df.itertuples(index=False, name=None)
+    ]
+
+
+def frame_to_weights(weight_df: pd.DataFrame) -> List[WeightData]:
+    """
+    Convert a weigh-in DataFrame back into WeightData objects
+
+    Args:
+        weight_df: DataFrame with WEIGHT_COLUMNS (the circumferences may be absent)
+
+    Returns:
+        List of WeightData objects
+    """
+    return [
+        WeightData(date=day, weight_kg=float(weight), body_fat_percentage=_optional(body_fat, float),
+                   waist_cm=_optional(waist, float), neck_cm=_optional(neck, float), hip_cm=_optional(hip, float))
+        for day, weight, body_fat, waist, neck, hip
+        in weight_df.reindex(columns=WEIGHT_COLUMNS).itertuples(index=False, name=None)
+    ]
+
+
+def _optional(value, convert) -> Optional[float]:
+    return None if pd.isna(value) else convert(value)
+
+
+def set_labels(sets_df: pd.DataFrame) -> pd.Series:
+    """
+    Identity of each set within its exercise in a workout
+
+    Numbered sets are labelled with their number. Unnumbered sets (Strong's
+    warm-up, drop and failure sets) are labelled with their type letter and
+    their position among the sets of that type, e.g. 'W1', 'W2', 'D1', or
+    '-1' for an unnumbered set without a type, so they never collide with
+    numbered sets or with each other.
+
+    Args:
+        sets_df: Per-set DataFrame laid out like workouts_to_frame's, with
+            each workout's sets in their original order
+
+    Returns:
+        Series of string labels aligned with sets_df
+    """
+    numbered = sets_df['set_order'].notna()
+    labels = sets_df['set_order'].where(numbered, 0).astype(int).astype(str)
+    unnumbered = sets_df[~numbered]
+    if unnumbered.empty:
+        return labels
+
+    kinds = (unnumbered['set_type'] if 'set_type' in unnumbered else pd.Series(None, index=unnumbered.index))
+    kinds = kinds.fillna('-').astype(str)
+    position = unnumbered.assign(kind=kinds).groupby(
+        ['date', 'routine_name', 'exercise_name', 'kind'], sort=False, dropna=False).cumcount() + 1
+    labels[~numbered] = kinds + position.astype(str)
+    return labels
+
+
+def canonical_exercise_names(names: pd.Series, workouts: Optional[List[pd.Series]] = None) -> pd.Series:
+    """
+    Exercise names resolved to the catalogue's canonical spelling
+
+    Each distinct name is resolved once. Names that resolve alike but are
+    both logged in one workout are different exercises to the user, and
+    merging them would make their sets collide, so both are kept as written.
+
+    Args:
+        names: Exercise name column of a per-set DataFrame or export
+        workouts: Columns aligned with names that identify the workout, e.g.
+            [date, routine_name]; without them every name is resolved
+
+    Returns:
+        Series of canonical names aligned with names
+    """
+    matches = default_index().resolve_many(names.dropna().unique())
+    resolved = {raw_name: match.name for raw_name, match in matches.items()}
+    canonical = names.map(resolved).fillna(names)
+    # Only names sharing a canonical name can collide
+    if workouts and len(set(resolved.values())) < len(resolved):
+        spellings = names.groupby(list(workouts) + [canonical], sort=False, dropna=False).transform('nunique')
+        canonical = canonical.where(spellings <= 1, names)
+    return canonical
+
+
+# Key columns computed from a frame instead of stored in it
+DERIVED_KEYS = {'set_label': set_labels}
+
+
+def _key_index(frame: pd.DataFrame, keys: List[str]) -> pd.MultiIndex:
+    # Compared as strings so missing values (e.g. no workout name) match each other
+    columns = {key: DERIVED_KEYS[key](frame) if key in DERIVED_KEYS else frame[key] for key in keys}
+    return pd.MultiIndex.from_frame(pd.DataFrame(columns, index=frame.index).astype(str))
+
+
+def upsert_sorted(existing: pd.DataFrame, incoming: pd.DataFrame,
+                  keys: List[str]) -> Tuple[pd.DataFrame, int]:
+    """
+    Merge rows into a date-sorted frame, replacing rows that have the same key
+
+    Only the part of `existing` dated on or after the earliest incoming date is
+    examined and re-sorted, so appending recent data costs time proportional to
+    the new data rather than to the whole history.
+
+    Args:
+        existing: Frame sorted by its 'date' column
+        incoming: New rows with the same columns
+        keys: Columns identifying a row, or names in DERIVED_KEYS; incoming rows win on conflicts
+
+    Returns:
+        Tuple of (merged frame sorted by date, number of existing rows replaced)
+    """
+    incoming_keys = _key_index(incoming, keys)
+    duplicated = incoming_keys.duplicated(keep='last')
+    incoming, incoming_keys = incoming[~duplicated], incoming_keys[~duplicated]
+    if existing.empty:
+        return incoming.sort_values('date', kind='stable').reset_index(drop=True), 0
+    if incoming.empty:
+        return existing, 0
+
+    # Whole days from the earliest incoming date, so derived keys see complete workouts
+    start = int(existing['date'].searchsorted(incoming['date'].min(), side='left'))
+    head, tail = existing.iloc[:start], existing.iloc[start:]
+    tail_keys = _key_index(tail, keys)
+    replaced = tail_keys.isin(incoming_keys)
+
+    # An incoming row takes the place of the row it replaces and new rows go after
+    # their day's rows, so the order within a day, and the labels derived from it, stay put
+    first_position = pd.Series(np.arange(len(tail)), index=tail_keys)
+    first_position = first_position[~first_position.index.duplicated()]
+    incoming_position = first_position.reindex(incoming_keys).to_numpy(dtype=float)
+    incoming_position = np.where(np.isnan(incoming_position), len(tail) + np.arange(len(incoming)),
+                                 incoming_position)
+    position = np.concatenate([np.flatnonzero(~replaced), incoming_position])
+
+    tail = pd.concat([tail[~replaced], incoming[existing.columns]], ignore_index=True)
+    order = pd.DataFrame({'date': tail['date'], 'position': position}).sort_values(['date', 'position'])
+    tail = tail.iloc[order.index]
+    merged = pd.concat([head, tail], ignore_index=True)
+    return merged, int(replaced.sum())
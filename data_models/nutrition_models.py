@@ -15,8 +15,25 @@ class DailyNutritionData:
     sodium_mg: Optional[float] = None
     cholesterol_mg: Optional[float] = None
 
+@dataclass
+class MealNutritionData:
+    date: date
+    meal: str
+    calories_kcal: float
+    protein_g: float
+    carbs_g: float
+    fat_g: float
+    fiber_g: Optional[float] = None
+    sugar_g: Optional[float] = None
+    sodium_mg: Optional[float] = None
+    cholesterol_mg: Optional[float] = None
+
 @dataclass
 class WeightData:
     date: date
     weight_kg: float
-    body_fat_percentage: Optional[float] = None
\ No newline at end of file
+    body_fat_percentage: Optional[float] = None
+    # Optional circumferences in centimeters, for the Navy body fat method
+    waist_cm: Optional[float] = None
+    neck_cm: Optional[float] = None
+    hip_cm: Optional[float] = None
\ No newline at end of file
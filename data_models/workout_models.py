@@ -15,6 +15,8 @@ class SetData:
     distance_km: Optional[float] = None
     duration_seconds: Optional[int] = None
     is_completed: bool = True
+    set_order: Optional[int] = None
+    set_type: Optional[str] = None  # Letter of an unnumbered set, e.g. 'W' warm-up, 'D' drop, 'F' failure
 
 @dataclass
 class WorkoutData:
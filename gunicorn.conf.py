@@ -0,0 +1,49 @@
+# Gunicorn configuration for the SynergyFit Insights API
+#
+#   gunicorn -c gunicorn.conf.py wsgi:application
+#
+# Every setting can be overridden with the environment variables below.
+
+import os
+import multiprocessing
+
+bind = f"{os.environ.get('SYNERGYFIT_HOST', '0.0.0.0')}:{os.environ.get('SYNERGYFIT_PORT', 5000)}"
+
+# Analysis is CPU-bound pandas work that holds the GIL, so scale with processes:
+# one worker per core. A few threads per worker overlap upload I/O, cache hits
+# and job polling with running analyses.
+workers = int(os.environ.get('SYNERGYFIT_WORKERS', multiprocessing.cpu_count()))
+threads = int(os.environ.get('SYNERGYFIT_THREADS', 4))
+worker_class = 'gthread'
+
+# Import pandas, numpy and the analysis modules and run the warm-up analysis
+# once in the master; workers inherit the initialized modules copy-on-write.
+preload_app = True
+
+# Large uploads can take a while to analyze synchronously
+timeout = int(os.environ.get('SYNERGYFIT_TIMEOUT', 120))
+
+# On SIGTERM, stop accepting connections and give in-flight requests and
+# running analysis jobs this long to finish
+graceful_timeout = int(os.environ.get('SYNERGYFIT_GRACEFUL_TIMEOUT', 30))
+keepalive = 5
+
+# Recycle workers periodically to return memory fragmented by large DataFrames
+max_requests = int(os.environ.get('SYNERGYFIT_MAX_REQUESTS', 1000))
+max_requests_jitter = max_requests // 10
+
+accesslog = '-'
+errorlog = '-'
+loglevel = os.environ.get('SYNERGYFIT_LOG_LEVEL', 'info')
+
+
+def worker_int(worker):
+    """Worker received SIGINT/SIGQUIT: stop taking jobs without waiting"""
+    from app import shutdown_app
+    shutdown_app(wait=False)
+
+
+def worker_exit(server, worker):
+    """Worker is exiting: mark it unhealthy and let running analysis jobs finish"""
+    from app import shutdown_app
+    shutdown_app(wait=True)
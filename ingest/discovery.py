@@ -0,0 +1,111 @@
+import os
+import re
+import glob
+from dataclasses import dataclass
+from datetime import date
+from typing import List, Dict, Optional, Tuple
+
+from server.validation import parse_header, matching_schemas
+
+# MyFitnessPal names its exports after the kind and the date range they cover
+MFP_EXPORT_NAME = re.compile(
+    r'^(?:Nutrition|Measurement|Exercise)-Summary-(\d{4}-\d{2}-\d{2})-to-(\d{4}-\d{2}-\d{2})(?: ?\(\d+\))?\.csv$',
+    re.IGNORECASE)
+
+
+@dataclass
+class ExportFile:
+    """One export found in a directory"""
+    path: str
+    kind: str
+    start: Optional[date] = None
+    end: Optional[date] = None
+    mtime: float = 0.0
+
+    @property
+    def priority(self) -> Tuple[date, float, str]:
+        """
+        Sort key putting the most recent export last
+
+        Exports are ranked by the last day they cover, then by modification
+        time. An export whose name has no date range is taken to end on the
+        day it was last modified, as it cannot cover later days.
+        """
+        end = self.end if self.end is not None else date.fromtimestamp(self.mtime)
+        return end, self.mtime, os.path.basename(self.path)
+
+
+def identify_export(path: str) -> Optional[str]:
+    """
+    Tell which export a CSV file is from its header row
+
+    Args:
+        path: CSV file
+
+    Returns:
+        Upload field of the export ('strong_file', 'nutrition_file' or
+        'weight_file'), or None if the header matches none of them
+    """
+    with open(path, 'rb') as f:
+        header = f.readline().rstrip(b'\r\n')
+    # A Strong export also has the measurement export's Date and Weight columns;
+    # UPLOAD_SCHEMAS lists Strong first, so the first match is the specific one
+    matches = matching_schemas(parse_header(header))
+    return matches[0] if matches else None
+
+
+def export_range(path: str) -> Tuple[Optional[date], Optional[date]]:
+    """
+    Date range in a MyFitnessPal export's file name
+
+    Args:
+        path: Export file, e.g. .../Nutrition-Summary-2025-04-15-to-2025-05-15.csv
+
+    Returns:
+        Tuple of (first day, last day), or (None, None) if the name has no range
+    """
+    match = MFP_EXPORT_NAME.match(os.path.basename(path))
+    if match is None:
+        return None, None
+    return date.fromisoformat(match.group(1)), date.fromisoformat(match.group(2))
+
+
+def discover_exports(directory: str) -> Dict[str, List[ExportFile]]:
+    """
+    Every Strong and MyFitnessPal export in a directory, grouped by kind
+
+    Files are recognized by their CSV headers. MyFitnessPal Exercise summaries
+    match none of the upload schemas and are not returned.
+
+    Args:
+        directory: Directory to search (not recursive)
+
+    Returns:
+        Dictionary of {upload field: exports ordered from oldest to most recent}
+    """
+    found: Dict[str, List[ExportFile]] = {}
+    for path in glob.glob(os.path.join(directory, '*.csv')):
+        kind = identify_export(path)
+        if kind is None:
+            continue
+        start, end = export_range(path)
+        found.setdefault(kind, []).append(ExportFile(path, kind, start, end, os.path.getmtime(path)))
+    for exports in found.values():
+        exports.sort(key=lambda export: export.priority)
+    return found
+
+
+def find_exports(directory: str) -> Dict[str, str]:
+    """
+    Identify the most recent Strong and MyFitnessPal export of each kind in a directory
+
+    When a directory holds several exports of one kind, the one covering the
+    latest day is used, as in ExportFile.priority.
+
+    Args:
+        directory: Directory to search (not recursive)
+
+    Returns:
+        Dictionary of {upload field: path} for the exports found
+    """
+    return {kind: exports[-1].path for kind, exports in discover_exports(directory).items()}
@@ -0,0 +1,120 @@
+import os
+from datetime import date, timedelta
+from typing import List, Dict, Optional, Tuple
+
+import parsers
+from data_models.nutrition_models import MealNutritionData, WeightData
+from ingest.discovery import ExportFile, discover_exports
+from server.validation import UPLOAD_SCHEMAS
+from utils.instrumentation import stage
+
+# Parser helper of each MyFitnessPal export kind; nutrition is kept per meal
+MERGE_PARSERS = {
+    'nutrition_file': 'parse_mfp_csv_meals',
+    'weight_file': 'parse_mfp_csv_weight',
+}
+
+# Below this much CSV in total, starting worker processes costs more than it saves
+PARALLEL_MIN_BYTES = 2 * 1024 * 1024
+
+
+def _parse_export(export: ExportFile) -> List:
+    return getattr(parsers, MERGE_PARSERS[export.kind])(export.path)
+
+
+def parse_exports(exports: List[ExportFile], workers: Optional[int] = None) -> List[List]:
+    """
+    Parse several MyFitnessPal exports, in worker processes when they are large
+
+    Args:
+        exports: Nutrition or measurement exports
+        workers: Number of processes; defaults to the CPU count, 1 parses in this process
+
+    Returns:
+        Parsed records of each export, in the order given
+    """
+    total_bytes = sum(os.path.getsize(export.path) for export in exports)
+    with stage('merge.parse', nbytes=total_bytes) as timing:
+        workers = min(workers or os.cpu_count() or 1, len(exports))
+        if workers <= 1 or total_bytes < PARALLEL_MIN_BYTES:
+            results = [_parse_export(export) for export in exports]
+        else:
+            from multiprocessing import Pool
+            # Resolve the parsers here so forked workers inherit them already imported
+            for kind in {export.kind for export in exports}:
+                getattr(parsers, MERGE_PARSERS[kind])
+            with Pool(processes=workers) as pool:
+                results = pool.map(_parse_export, exports)
+        timing.rows = sum(len(records) for records in results)
+    return results
+
+
+def merge_exports(exports: List[ExportFile], records: List[List]) -> List:
+    """
+    Merge the records of overlapping exports of one kind into a single timeline
+
+    Each day belongs to the most recent export covering it (the highest
+    ExportFile.priority), and only that export's records for the day are
+    kept, so a day corrected or cleared in a later export replaces the older
+    copies. Ownership is resolved through a date-keyed index in one pass
+    over the exports' days and records.
+
+    Args:
+        exports: Exports of one kind
+        records: Parsed records of each export, with a `date` attribute
+
+    Returns:
+        Records sorted by date
+    """
+    ranked = sorted(zip(exports, records), key=lambda item: item[0].priority)
+
+    with stage('merge.dedupe', rows=sum(len(export_records) for export_records in records)):
+        owner: Dict[date, int] = {}
+        for rank, (export, export_records) in enumerate(ranked):
+            start, end = _coverage(export, export_records)
+            if start is None:
+                continue
+            for offset in range((end - start).days + 1):
+                owner[start + timedelta(days=offset)] = rank
+
+        merged = [record for rank, (_, export_records) in enumerate(ranked)
+                  for record in export_records if owner[record.date] == rank]
+        merged.sort(key=lambda record: record.date)
+    return merged
+
+
+def _coverage(export: ExportFile, records: List) -> Tuple[Optional[date], Optional[date]]:
+    # The name's range, widened to any records outside it; without a name range, the records' own span
+    dates = [record.date for record in records]
+    if export.start is not None:
+        dates.extend((export.start, export.end))
+    if not dates:
+        return None, None
+    return min(dates), max(dates)
+
+
+def load_merged_exports(directory: str, workers: Optional[int] = None
+                        ) -> Tuple[List[MealNutritionData], List[WeightData]]:
+    """
+    Load every nutrition and measurement export in a directory as one timeline each
+
+    Args:
+        directory: Directory of (possibly overlapping) date-ranged MyFitnessPal exports
+        workers: Number of parser processes; defaults to the CPU count
+
+    Returns:
+        Tuple of (meals, weigh-ins), each sorted by date
+
+    Raises:
+        FileNotFoundError: If the directory has no nutrition or no measurement export
+    """
+    found = discover_exports(directory)
+    missing = [UPLOAD_SCHEMAS[kind][0] for kind in MERGE_PARSERS if not found.get(kind)]
+    if missing:
+        raise FileNotFoundError(f"{directory}: no {', '.join(missing)} found")
+
+    nutrition_exports, weight_exports = found['nutrition_file'], found['weight_file']
+    records = parse_exports(nutrition_exports + weight_exports, workers)
+    split = len(nutrition_exports)
+    return (merge_exports(nutrition_exports, records[:split]),
+            merge_exports(weight_exports, records[split:]))
@@ -0,0 +1,279 @@
+import io
+import os
+from dataclasses import dataclass
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+
+import analysis
+import parsers
+from data_models.frames import meals_to_frame, nutrition_to_frame, weights_to_frame, ANALYZER_NUTRITION_COLUMNS
+from ingest.discovery import ExportFile, discover_exports, export_range
+from ingest.merge import parse_exports, merge_exports
+from server.validation import UPLOAD_SCHEMAS
+from utils.instrumentation import stage
+from utils.lazy import lazy_import
+
+if TYPE_CHECKING:
+    from analysis.workout_analysis import WorkoutAnalyzer
+    from analysis.nutrition_analysis import NutritionAnalyzer
+
+pd = lazy_import('pandas')
+
+# Bytes before the parsed offset that must be unchanged for growth to count as an append
+FINGERPRINT_BYTES = 4096
+
+# Parser building each export's records; nutrition is kept per meal so appended rows can be merged
+EXPORT_PARSERS = {
+    'strong_file': 'StrongParser',
+    'nutrition_file': 'MFPMealParser',
+    'weight_file': 'MFPWeightParser',
+}
+
+
+@dataclass
+class WatchedFile:
+    """How far one export file has been parsed"""
+    path: str
+    kind: str
+    inode: int = 0
+    size: int = 0
+    mtime_ns: int = 0
+    offset: int = 0
+    header: bytes = b''
+    fingerprint: bytes = b''
+
+    def matches(self, stat: os.stat_result) -> bool:
+        return (stat.st_ino, stat.st_size, stat.st_mtime_ns) == (self.inode, self.size, self.mtime_ns)
+
+
+@dataclass
+class FileChange:
+    """One export update applied to the analyzers"""
+    path: str
+    kind: str
+    action: str
+    rows: int
+    bytes: int
+    seconds: float
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {
+            'file': self.path,
+            'export': self.kind,
+            'action': self.action,
+            'rows': self.rows,
+            'bytes': self.bytes,
+            'seconds': round(self.seconds, 6)
+        }
+
+
+class ExportWatcher:
+    """
+    Keeps a pair of analyzers current with a directory of exports as its files change
+
+    All MyFitnessPal exports of a kind are merged into one timeline (see
+    ingest.merge), and the most recent export of each kind is watched. Each
+    poll stats the watched files, and the directory to notice added or
+    removed exports. A file that only grew is treated as an append: just the
+    new complete rows are parsed and merged into the resident analyzers, so
+    the cost follows the size of the change rather than the history. A file
+    that was replaced, truncated or edited before its end is re-parsed,
+    together with the older exports of its kind, and replaces only its part
+    of the analysis.
+    """
+
+    def __init__(self, directory: str):
+        """
+        Parse the directory's exports and build the analyzers
+
+        Args:
+            directory: Directory holding a Strong, a nutrition and a measurement export
+
+        Raises:
+            FileNotFoundError: If one of the three exports is missing
+        """
+        self.directory = directory
+        self.files: Dict[str, WatchedFile] = {}
+        self.workout_analyzer: Optional['WorkoutAnalyzer'] = None
+        self.nutrition_analyzer: Optional['NutritionAnalyzer'] = None
+        self._directory_mtime_ns = os.stat(directory).st_mtime_ns
+
+        found = discover_exports(directory)
+        missing = [UPLOAD_SCHEMAS[kind][0] for kind in EXPORT_PARSERS if kind not in found]
+        if missing:
+            raise FileNotFoundError(f"{directory}: no {', '.join(missing)} found")
+
+        self._export_paths = {kind: {export.path for export in exports} for kind, exports in found.items()}
+        records = {}
+        for kind, exports in found.items():
+            self.files[kind] = WatchedFile(path=exports[-1].path, kind=kind)
+            records[kind] = self._load(self.files[kind], exports[:-1], final=True)[0]
+
+        meals = records['nutrition_file']
+        self.workout_analyzer = analysis.WorkoutAnalyzer(records['strong_file'])
+        self.nutrition_analyzer = analysis.NutritionAnalyzer(
+            parsers.meals_to_daily_totals(meals), records['weight_file'], meals)
+
+    def poll(self) -> List[FileChange]:
+        """
+        Apply every change made to the exports since the last poll
+
+        Returns:
+            List of FileChange, empty if nothing changed
+        """
+        changes = []
+        self._rediscover(changes)
+
+        for state in list(self.files.values()):
+            try:
+                stat = os.stat(state.path)
+            except FileNotFoundError:
+                # Mid-replace or deleted; keep the data until a file appears again
+                continue
+
+            if state.matches(stat):
+                if state.offset >= stat.st_size:
+                    continue
+                # The last row has no line break but the file stopped growing, so it is complete
+                changes.append(self._append(state, final=True))
+            elif stat.st_ino != state.inode or stat.st_size < state.offset or not self._unchanged_before(state):
+                changes.append(self._reload(state))
+            else:
+                changes.append(self._append(state, final=False))
+        return [change for change in changes if change.rows or change.action == 'reloaded']
+
+    def _rediscover(self, changes: List[FileChange]):
+        """Pick up exports added to or removed from the directory, e.g. a new MyFitnessPal date range"""
+        mtime_ns = os.stat(self.directory).st_mtime_ns
+        if mtime_ns == self._directory_mtime_ns:
+            return
+        self._directory_mtime_ns = mtime_ns
+
+        for kind, exports in discover_exports(self.directory).items():
+            paths = {export.path for export in exports}
+            if kind not in self.files or paths == self._export_paths[kind]:
+                continue
+            self._export_paths[kind] = paths
+            self.files[kind] = WatchedFile(path=exports[-1].path, kind=kind)
+            changes.append(self._reload(self.files[kind]))
+
+    def _unchanged_before(self, state: WatchedFile) -> bool:
+        """Whether the header and the bytes just before the parsed offset are as parsed"""
+        start = max(state.offset - len(state.fingerprint), 0)
+        with open(state.path, 'rb') as f:
+            header = f.read(len(state.header))
+            f.seek(start)
+            fingerprint = f.read(state.offset - start)
+        return header == state.header and fingerprint == state.fingerprint
+
+    def _append(self, state: WatchedFile, final: bool) -> FileChange:
+        """Parse the rows added after the offset and merge them into the analyzers"""
+        with stage(f"watch.append_{state.kind}") as timing:
+            records, rows, nbytes = self._parse_new_rows(state, final)
+            timing.rows, timing.nbytes = rows, nbytes
+            if records:
+                if state.kind == 'strong_file':
+                    self.workout_analyzer.upsert_workouts(records)
+                elif state.kind == 'nutrition_file':
+                    self.nutrition_analyzer.upsert_meals(self._add_logged_meals(records))
+                else:
+                    self.nutrition_analyzer.upsert_weights(records)
+        return FileChange(state.path, state.kind, 'appended', rows, nbytes, timing.seconds)
+
+    def _reload(self, state: WatchedFile) -> FileChange:
+        """Re-parse one export from the start and replace its part of the analysis"""
+        state.offset = 0
+        with stage(f"watch.reload_{state.kind}") as timing:
+            older = [export for export in discover_exports(self.directory).get(state.kind, [])
+                     if export.path != state.path]
+            records, rows, nbytes = self._load(state, older, final=False)
+            timing.rows, timing.nbytes = rows, nbytes
+            nutrition = self.nutrition_analyzer
+            if state.kind == 'strong_file':
+                self.workout_analyzer = analysis.WorkoutAnalyzer(records)
+            elif state.kind == 'nutrition_file':
+                daily = nutrition_to_frame(parsers.meals_to_daily_totals(records))
+                self.nutrition_analyzer = analysis.NutritionAnalyzer.from_frames(
+                    daily[ANALYZER_NUTRITION_COLUMNS], nutrition.weight_df, meals_to_frame(records))
+            else:
+                self.nutrition_analyzer = analysis.NutritionAnalyzer.from_frames(
+                    nutrition.nutrition_df, weights_to_frame(records), nutrition.meals_df)
+        return FileChange(state.path, state.kind, 'reloaded', rows, nbytes, timing.seconds)
+
+    def _load(self, state: WatchedFile, older: List[ExportFile], final: bool):
+        """
+        Parse a watched export from the start, merged with the older exports of its kind
+
+        The watched file is the most recent export, so it wins every day it
+        covers (see ingest.merge.merge_exports).
+
+        Returns:
+            Tuple of (records, rows parsed, bytes read)
+        """
+        records, rows, nbytes = self._parse_new_rows(state, final)
+        if state.kind == 'strong_file' or not older:
+            return records, rows, nbytes
+
+        latest = ExportFile(state.path, state.kind, *export_range(state.path), os.path.getmtime(state.path))
+        older_records = parse_exports(older)
+        rows += sum(len(export_records) for export_records in older_records)
+        nbytes += sum(os.path.getsize(export.path) for export in older)
+        return merge_exports(older + [latest], older_records + [records]), rows, nbytes
+
+    def _parse_new_rows(self, state: WatchedFile, final: bool):
+        """
+        Read and parse the complete rows after a file's offset and advance it
+
+        Args:
+            state: File to read; an offset of 0 reads the header first
+            final: Also take a last row that has no line break yet
+
+        Returns:
+            Tuple of (records, rows parsed, bytes read)
+        """
+        stat = os.stat(state.path)
+        with open(state.path, 'rb') as f:
+            if state.offset == 0:
+                state.header = f.readline()
+                state.offset = len(state.header)
+                state.fingerprint = state.header[-FINGERPRINT_BYTES:]
+            f.seek(state.offset)
+            data = f.read(max(stat.st_size - state.offset, 0))
+
+        # A row still being written is left for the next poll
+        end = len(data) if final else data.rfind(b'\n') + 1
+        data = data[:end]
+        state.inode, state.size, state.mtime_ns = stat.st_ino, stat.st_size, stat.st_mtime_ns
+        state.offset += end
+        state.fingerprint = (state.fingerprint + data)[-FINGERPRINT_BYTES:]
+
+        if not data.strip():
+            return [], 0, end
+        df = pd.read_csv(io.BytesIO(state.header + data))
+        parser = getattr(parsers, EXPORT_PARSERS[state.kind])()
+        return parser.parse_frame(df), len(df), end
+
+    def _add_logged_meals(self, meals: List) -> List:
+        """
+        Add the totals already parsed for the same dates and meals
+
+        An appended nutrition row is one more food in a meal, so it adds to the
+        meal instead of replacing it as a synced meal would.
+        """
+        meals_df = self.nutrition_analyzer.meals_df
+        if meals_df.empty:
+            return meals
+        start = int(meals_df['date'].searchsorted(min(meal.date for meal in meals), side='left'))
+        logged = {(row.date, row.meal): row for row in meals_df.iloc[start:].itertuples(index=False)}
+        for meal in meals:
+            prior = logged.get((meal.date, meal.meal))
+            if prior is None:
+                continue
+            meal.calories_kcal += prior.calories
+            meal.protein_g += prior.protein
+            meal.carbs_g += prior.carbs
+            meal.fat_g += prior.fat
+            meal.fiber_g = (meal.fiber_g or 0.0) + (prior.fiber or 0.0)
+            meal.sugar_g = (meal.sugar_g or 0.0) + (prior.sugar or 0.0)
+            meal.sodium_mg = (meal.sodium_mg or 0.0) + (prior.sodium or 0.0)
+            meal.cholesterol_mg = (meal.cholesterol_mg or 0.0) + (prior.cholesterol or 0.0)
+        return meals
@@ -2,190 +2,539 @@
 # Main script for fitness analysis tool
 
 import os
-import pandas as pd
-import numpy as np
+import sys
+import json
+import time
+import argparse
 import datetime
-from dataclasses import dataclass, field
-from typing import List, Optional, Dict, Any
+from typing import List, Optional, Dict, Any, TextIO, Tuple, TYPE_CHECKING
 
-# Import parsers
-from parsers.strong_parser import parse_strong_csv
-from parsers.mfp_parser import parse_mfp_csv_nutrition, parse_mfp_csv_weight
+# Parsers, analyzers and stores import pandas on first use, so --help and
+# argument errors return without loading it
+import parsers
+import analysis
+import storage
 
-# Import analysis modules
-from analysis.workout_analysis import WorkoutAnalyzer
-from analysis.nutrition_analysis import NutritionAnalyzer
-from analysis.insights import InsightGenerator
+from ingest.discovery import find_exports, identify_export
+from ingest.merge import load_merged_exports
+from server.validation import UPLOAD_SCHEMAS
+from utils.instrumentation import stage, start_trace, end_trace, summarize_stages
 
-# Define file paths
+if TYPE_CHECKING:
+    from analysis.workout_analysis import WorkoutAnalyzer
+    from analysis.nutrition_analysis import NutritionAnalyzer
+
+# Default input directory
 DATA_DIR = os.path.join(os.path.dirname(os.path.abspath(__file__)), "data")
-STRONG_CSV = os.path.join(DATA_DIR, "strong.csv")
-NUTRITION_CSV = os.path.join(DATA_DIR, "Nutrition-Summary-2025-04-15-to-2025-05-15.csv")
-EXERCISE_CSV = os.path.join(DATA_DIR, "Exercise-Summary-2025-04-15-to-2025-05-15.csv")
-MEASUREMENT_CSV = os.path.join(DATA_DIR, "Measurement-Summary-2025-04-15-to-2025-05-15.csv")
 
-def load_strong_data():
+# Profile values used when no argument overrides them
+DEFAULT_PROFILE = {
+    'height': 175,
+    'age': 30,
+    'sex': 'M',
+    'goal': 'muscle_gain'
+}
+
+FILE_KEYS = ('strong_file', 'nutrition_file', 'weight_file')
+
+# Number of exercises shown in the progress section
+PROGRESS_EXAMPLES = 3
+
+
+def resolve_inputs(args: argparse.Namespace) -> List[Dict[str, Any]]:
     """
-    Load and parse Strong workout data
+    Turn the command line into a list of analysis inputs
+
+    Each positional path is a directory of CSV exports, a directory saved by
+    storage.columnar, or a single CSV export. Explicit --strong, --nutrition
+    and --weight files form one more input, as does --history.
+
+    Returns:
+        List of {'name', and 'files' or 'dataset' or 'history'} dictionaries;
+        inputs from a directory of exports also have its 'directory'
     """
-    print("Loading Strong workout data...")
-    workout_data = parse_strong_csv(STRONG_CSV)
-    print(f"Loaded {len(workout_data)} workouts")
-    return workout_data
+    inputs = []
+    loose_files = {}
+
+    for path in args.inputs:
+        if os.path.isdir(path):
+            if {'sets', 'nutrition', 'weights'} <= set(storage.dataset_paths(path)):
+                inputs.append({'name': path, 'dataset': path})
+            else:
+                inputs.append({'name': path, 'files': find_exports(path), 'directory': path})
+        elif os.path.isfile(path):
+            kind = identify_export(path)
+            if kind is None:
+                raise ValueError(f"{path} is not a Strong or MyFitnessPal CSV export")
+            loose_files[kind] = path
+        else:
+            raise FileNotFoundError(f"No such file or directory: {path}")
+
+    for key, path in (('strong_file', args.strong), ('nutrition_file', args.nutrition),
+                      ('weight_file', args.weight)):
+        if path:
+            loose_files[key] = path
+    if loose_files:
+        inputs.append({'name': ', '.join(loose_files[key] for key in FILE_KEYS if key in loose_files),
+                       'files': loose_files})
+
+    if args.history:
+        if not os.path.isfile(args.history):
+            raise FileNotFoundError(f"No such history store: {args.history}")
+        inputs.append({'name': f"{args.history}:{args.user}", 'history': args.history})
+
+    if not inputs:
+        inputs.append({'name': DATA_DIR, 'files': find_exports(DATA_DIR), 'directory': DATA_DIR})
+    return inputs
 
-def load_nutrition_data():
+
+def load_input(source: Dict[str, Any], args: argparse.Namespace) -> Tuple['WorkoutAnalyzer', 'NutritionAnalyzer']:
     """
-    Load and parse MyFitnessPal nutrition data
+    Build the analyzers for one input
+
+    Returns:
+        Tuple of (WorkoutAnalyzer, NutritionAnalyzer)
     """
-    print("Loading nutrition data...")
-    nutrition_data = parse_mfp_csv_nutrition(NUTRITION_CSV)
-    print(f"Loaded data for {len(nutrition_data)} days")
-    return nutrition_data
+    if 'dataset' in source:
+        return storage.load_analyzers(source['dataset'])
+
+    if 'history' in source:
+        start = datetime.date.fromisoformat(args.start) if args.start else None
+        end = datetime.date.fromisoformat(args.end) if args.end else None
+        with storage.HistoryStore(source['history']) as store:
+            return (analysis.WorkoutAnalyzer.from_store(store, args.user, start, end),
+                    analysis.NutritionAnalyzer.from_store(store, args.user, start, end))
+
+    files = source['files']
+    missing = [UPLOAD_SCHEMAS[key][0] for key in FILE_KEYS if key not in files]
+    if missing:
+        raise FileNotFoundError(f"{source['name']}: no {', '.join(missing)} found")
+
+    workout_data = parsers.parse_strong_csv(files['strong_file'])
+    if 'directory' in source:
+        # A directory may hold many overlapping MyFitnessPal date ranges; merge them all
+        meal_data, weight_data = load_merged_exports(source['directory'], args.workers)
+        nutrition_data = parsers.meals_to_daily_totals(meal_data)
+    else:
+        nutrition_data = parsers.parse_mfp_csv_nutrition(files['nutrition_file'])
+        weight_data = parsers.parse_mfp_csv_weight(files['weight_file'])
+    return analysis.WorkoutAnalyzer(workout_data), analysis.NutritionAnalyzer(nutrition_data, weight_data)
+
 
-def load_weight_data():
+def summarize_data(workout_analyzer: 'WorkoutAnalyzer', nutrition_analyzer: 'NutritionAnalyzer') -> Dict[str, Any]:
     """
-    Load and parse MyFitnessPal weight data
+    Basic information about each dataset
+
+    Returns:
+        Dictionary with workout, nutrition and weight summaries (None when a dataset is empty)
     """
-    print("Loading weight data...")
-    weight_data = parse_mfp_csv_weight(MEASUREMENT_CSV)
-    print(f"Loaded {len(weight_data)} weight measurements")
-    return weight_data
+    sets_df = workout_analyzer.sets_df
+    nutrition_df = nutrition_analyzer.nutrition_df
+    weight_df = nutrition_analyzer.weight_df
+
+    summary = {'workouts': None, 'nutrition': None, 'weight': None}
+    if not sets_df.empty:
+        summary['workouts'] = {
+            'workouts': len(workout_analyzer.workouts_df),
+            'sets': len(sets_df),
+            'firstDate': str(sets_df['date'].iloc[0].date()),
+            'lastDate': str(sets_df['date'].iloc[-1].date()),
+            'exercises': int(sets_df['exercise_name'].nunique()),
+            'sampleExercises': list(workout_analyzer.exercises[:5])
+        }
+    if not nutrition_df.empty:
+        summary['nutrition'] = {
+            'days': len(nutrition_df),
+            'firstDate': str(nutrition_df['date'].iloc[0]),
+            'lastDate': str(nutrition_df['date'].iloc[-1]),
+            'avgCalories': round(float(nutrition_df['calories'].mean()), 1),
+            'avgProtein': round(float(nutrition_df['protein'].mean()), 1)
+        }
+    if not weight_df.empty:
+        first_weight = float(weight_df['weight'].iloc[0])
+        last_weight = float(weight_df['weight'].iloc[-1])
+        summary['weight'] = {
+            'entries': len(weight_df),
+            'firstDate': str(weight_df['date'].iloc[0]),
+            'lastDate': str(weight_df['date'].iloc[-1]),
+            'startingWeight': round(first_weight, 1),
+            'currentWeight': round(last_weight, 1),
+            'weightChange': round(last_weight - first_weight, 1)
+        }
+    return summary
+
 
-def explore_data():
+def exercise_progress(workout_analyzer: 'WorkoutAnalyzer', count: int = PROGRESS_EXAMPLES) -> List[Dict[str, Any]]:
     """
-    Print basic information about each dataset and perform some analysis
+    First and latest session of the first few exercises
+
+    Returns:
+        List of {'exercise', 'first', 'latest', 'estimated1rm'} dictionaries;
+        'first' and 'latest' are None when there is only one session
     """
-    print("\n=== Exploring Data ===\n")
-    
-    # Load the data
-    workout_data = load_strong_data()
-    nutrition_data = load_nutrition_data()
-    weight_data = load_weight_data()
-    
-    # Show some information about the loaded data
-    if workout_data:
-        print(f"\nFirst workout date: {workout_data[0].date}")
-        print(f"Last workout date: {workout_data[-1].date}")
-        
-        # Count unique exercises
-        all_exercises = set()
-        for workout in workout_data:
-            for exercise in workout.exercises:
-                all_exercises.add(exercise.name)
-        print(f"Total unique exercises: {len(all_exercises)}")
-        print("Sample exercises:", list(all_exercises)[:5])
-    
-    if nutrition_data:
-        print(f"\nFirst nutrition date: {nutrition_data[0].date}")
-        print(f"Last nutrition date: {nutrition_data[-1].date}")
-        
-        # Show average calorie and protein intake
-        total_calories = sum(n.calories_kcal for n in nutrition_data)
-        total_protein = sum(n.protein_g for n in nutrition_data)
-        avg_calories = total_calories / len(nutrition_data)
-        avg_protein = total_protein / len(nutrition_data)
-        print(f"Average daily calories: {avg_calories:.1f} kcal")
-        print(f"Average daily protein: {avg_protein:.1f} g")
-    
-    if weight_data:
-        print(f"\nFirst weight measurement date: {weight_data[0].date}")
-        print(f"Last weight measurement date: {weight_data[-1].date}")
-        
-        # Show weight change
-        first_weight = weight_data[0].weight_kg
-        last_weight = weight_data[-1].weight_kg
-        weight_change = last_weight - first_weight
-        print(f"Starting weight: {first_weight:.1f} kg")
-        print(f"Current weight: {last_weight:.1f} kg")
-        print(f"Weight change: {weight_change:.1f} kg")
-    
-    return workout_data, nutrition_data, weight_data
-
-def generate_insights(workout_data, nutrition_data, weight_data):
+    progress = []
+    for exercise_name in workout_analyzer.exercises[:count]:
+        progress_df = workout_analyzer.get_exercise_progress(exercise_name)
+        if progress_df.empty:
+            continue
+        entry = {'exercise': exercise_name, 'first': None, 'latest': None, 'estimated1rm': None}
+        if len(progress_df) > 1:
+            first_entry = progress_df.iloc[0]
+            last_entry = progress_df.iloc[-1]
+            entry['first'] = {'date': str(first_entry['date']), 'weight': float(first_entry['max_weight_kg']),
+                              'reps': int(first_entry['max_reps'])}
+            entry['latest'] = {'date': str(last_entry['date']), 'weight': float(last_entry['max_weight_kg']),
+                               'reps': int(last_entry['max_reps'])}
+            entry['estimated1rm'] = round(float(last_entry['estimated_1rm_kg']), 1)
+        progress.append(entry)
+    return progress
+
+
+def new_result(name: str, args: argparse.Namespace) -> Dict[str, Any]:
+    """Start the result dictionary of one input"""
+    profile = {'height': args.height, 'age': args.age, 'sex': args.sex, 'goal': args.goal}
+    return {'input': name, 'profile': profile}
+
+
+def analyze_loaded(result: Dict[str, Any], workout_analyzer: 'WorkoutAnalyzer',
+                   nutrition_analyzer: 'NutritionAnalyzer', args: argparse.Namespace):
+    """Add the summary, insights and exercise progress of loaded analyzers to a result"""
+    insight_generator = analysis.InsightGenerator.from_analyzers(workout_analyzer, nutrition_analyzer)
+    with stage('cli.analyze'):
+        result['summary'] = summarize_data(workout_analyzer, nutrition_analyzer)
+        result['insights'] = insight_generator.get_combined_insights(
+            height_cm=args.height,
+            age_years=args.age,
+            sex=args.sex,
+            goal=args.goal
+        )
+        result['exerciseProgress'] = exercise_progress(workout_analyzer)
+
+
+def analyze_input(source: Dict[str, Any], args: argparse.Namespace) -> Dict[str, Any]:
     """
-    Generate insights from the fitness data
+    Load one input and generate its summary, insights and exercise progress
+
+    Returns:
+        Result dictionary; 'error' is set instead of the analysis if loading failed
     """
-    print("\n=== Generating Insights ===\n")
-    
-    # Initialize the insight generator
-    insight_generator = InsightGenerator(workout_data, nutrition_data, weight_data)
-    
-    # User information (example values)
-    height_cm = 175
-    age_years = 30
-    sex = 'M'
-    goal = 'muscle_gain'  # 'muscle_gain', 'fat_loss', or 'maintenance'
-    
-    # Generate insights
-    insights = insight_generator.get_combined_insights(
-        height_cm=height_cm,
-        age_years=age_years,
-        sex=sex,
-        goal=goal
-    )
-    
-    # Display insights
-    print(f"Goal: {goal.replace('_', ' ').title()}")
-    
-    print("\nStats:")
-    stats = insights['stats']
+    result = new_result(source['name'], args)
+
+    token = start_trace() if args.timings else None
+    try:
+        with stage('cli.load'):
+            workout_analyzer, nutrition_analyzer = load_input(source, args)
+        analyze_loaded(result, workout_analyzer, nutrition_analyzer, args)
+    except (OSError, ValueError, KeyError) as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if token is not None:
+            result['timings'] = summarize_stages(end_trace(token))
+    return result
+
+
+def write_text(result: Dict[str, Any], output: TextIO):
+    """Print one result in the human-readable format"""
+    print(f"=== {result['input']} ===", file=output)
+    for change in result.get('changes', []):
+        print(f"{os.path.basename(change['file'])}: {change['action']}, {change['rows']} rows "
+              f"({change['seconds'] * 1000:.1f} ms)", file=output)
+    if 'refreshSeconds' in result:
+        print(f"Refreshed in {result['refreshSeconds'] * 1000:.1f} ms", file=output)
+    if 'error' in result:
+        print(f"Error: {result['error']}", file=output)
+        return
+
+    print("\n=== Exploring Data ===\n", file=output)
+    summary = result['summary']
+    workouts = summary['workouts']
+    if workouts:
+        print(f"Loaded {workouts['workouts']} workouts ({workouts['sets']} sets)", file=output)
+        print(f"First workout date: {workouts['firstDate']}", file=output)
+        print(f"Last workout date: {workouts['lastDate']}", file=output)
+        print(f"Total unique exercises: {workouts['exercises']}", file=output)
+        print("Sample exercises:", workouts['sampleExercises'], file=output)
+
+    nutrition = summary['nutrition']
+    if nutrition:
+        print(f"\nLoaded data for {nutrition['days']} days", file=output)
+        print(f"First nutrition date: {nutrition['firstDate']}", file=output)
+        print(f"Last nutrition date: {nutrition['lastDate']}", file=output)
+        print(f"Average daily calories: {nutrition['avgCalories']:.1f} kcal", file=output)
+        print(f"Average daily protein: {nutrition['avgProtein']:.1f} g", file=output)
+
+    weight = summary['weight']
+    if weight:
+        print(f"\nLoaded {weight['entries']} weight measurements", file=output)
+        print(f"First weight measurement date: {weight['firstDate']}", file=output)
+        print(f"Last weight measurement date: {weight['lastDate']}", file=output)
+        print(f"Starting weight: {weight['startingWeight']:.1f} kg", file=output)
+        print(f"Current weight: {weight['currentWeight']:.1f} kg", file=output)
+        print(f"Weight change: {weight['weightChange']:.1f} kg", file=output)
+
+    print("\n=== Generating Insights ===\n", file=output)
+    goal = result['profile']['goal']
+    print(f"Goal: {goal.replace('_', ' ').title()}", file=output)
+
+    print("\nStats:", file=output)
+    stats = result['insights']['stats']
     if stats['weight_change_kg'] is not None:
-        print(f"- Weight change (4 weeks): {stats['weight_change_kg']} kg")
-    
+        print(f"- Weight change (4 weeks): {stats['weight_change_kg']} kg", file=output)
     if stats['macro_ratios']:
         print(f"- Macronutrient ratios: Protein {stats['macro_ratios']['protein_pct']}%, "
               f"Carbs {stats['macro_ratios']['carbs_pct']}%, "
-              f"Fat {stats['macro_ratios']['fat_pct']}%")
-    
+              f"Fat {stats['macro_ratios']['fat_pct']}%", file=output)
     if stats['estimated_tdee']:
-        print(f"- Estimated TDEE: {stats['estimated_tdee']} kcal")
-    
+        print(f"- Estimated TDEE: {stats['estimated_tdee']} kcal", file=output)
     if stats['suggested_calorie_target']:
-        print(f"- Suggested calorie target: {stats['suggested_calorie_target']} kcal")
-    
-    print("\nRecommendations:")
-    for rec_type, recommendations in insights['recommendations'].items():
+        print(f"- Suggested calorie target: {stats['suggested_calorie_target']} kcal", file=output)
+
+    print("\nRecommendations:", file=output)
+    for rec_type, recommendations in result['insights']['recommendations'].items():
         if recommendations:
-            print(f"\n{rec_type.title()} Recommendations:")
+            print(f"\n{rec_type.title()} Recommendations:", file=output)
             for i, rec in enumerate(recommendations, 1):
-                print(f"{i}. [{rec['priority'].upper()}] {rec['message']}")
-    
-    # Exercise progress example
-    if workout_data:
-        print("\nExercise Progress Examples:")
-        # Find some common exercises to analyze
-        all_exercises = set()
-        for workout in workout_data:
-            for exercise in workout.exercises:
-                all_exercises.add(exercise.name)
-        
-        # Take the first few exercises as examples
-        example_exercises = list(all_exercises)[:3]
-        
-        workout_analyzer = WorkoutAnalyzer(workout_data)
-        for exercise_name in example_exercises:
-            progress_df = workout_analyzer.get_exercise_progress(exercise_name)
-            if not progress_df.empty:
-                print(f"\n{exercise_name} Progress:")
-                if len(progress_df) > 1:
-                    first_entry = progress_df.iloc[0]
-                    last_entry = progress_df.iloc[-1]
-                    print(f"- First recorded: {first_entry['date']} - {first_entry['max_weight_kg']} kg x {first_entry['max_reps']} reps")
-                    print(f"- Latest: {last_entry['date']} - {last_entry['max_weight_kg']} kg x {last_entry['max_reps']} reps")
-                    print(f"- 1RM estimate: {last_entry['estimated_1rm_kg']:.1f} kg")
-                else:
-                    print("- Insufficient data for progress analysis")
+                print(f"{i}. [{rec['priority'].upper()}] {rec['message']}", file=output)
 
-if __name__ == "__main__":
-    print("Fitness Analyzer - Data Exploration and Analysis")
-    
-    # Explore data
-    workout_data, nutrition_data, weight_data = explore_data()
-    
-    # Generate insights if data is available
-    if workout_data and nutrition_data and weight_data:
-        generate_insights(workout_data, nutrition_data, weight_data)
+    if result['exerciseProgress']:
+        print("\nExercise Progress Examples:", file=output)
+        for entry in result['exerciseProgress']:
+            print(f"\n{entry['exercise']} Progress:", file=output)
+            if entry['first'] is None:
+                print("- Insufficient data for progress analysis", file=output)
+                continue
+            first_entry, last_entry = entry['first'], entry['latest']
+            print(f"- First recorded: {first_entry['date']} - {first_entry['weight']} kg x "
+                  f"{first_entry['reps']} reps", file=output)
+            print(f"- Latest: {last_entry['date']} - {last_entry['weight']} kg x {last_entry['reps']} reps",
+                  file=output)
+            print(f"- 1RM estimate: {entry['estimated1rm']:.1f} kg", file=output)
+
+    if 'timings' in result:
+        print("\n=== Stage Timings ===\n", file=output)
+        write_timings(result['timings'], output)
+    print(file=output)
+
+
+def write_timings(timings: List[Dict[str, Any]], output: TextIO):
+    """Print a per-stage table of calls, wall time, CPU time and rows"""
+    print(f"{'stage':<36} {'calls':>6} {'wall ms':>10} {'cpu ms':>10} {'rows':>10}", file=output)
+    for total in timings:
+        rows = '' if total['rows'] is None else total['rows']
+        print(f"{total['stage']:<36} {total['calls']:>6} {total['seconds'] * 1000:>10.2f} "
+              f"{total['cpuSeconds'] * 1000:>10.2f} {rows:>10}", file=output)
+
+
+def run(inputs: List[Dict[str, Any]], args: argparse.Namespace, output: TextIO) -> int:
+    """
+    Analyze every input and write the results in the requested format
+
+    Returns:
+        Number of inputs that failed
+    """
+    results = []
+    failed = 0
+    for source in inputs:
+        result = analyze_input(source, args)
+        failed += 'error' in result
+        if args.format == 'json':
+            results.append(result)
+        else:
+            write_result(result, args.format, output)
+
+    if args.format == 'json':
+        document = results[0] if len(results) == 1 else results
+        output.write(json.dumps(document, default=str, indent=2) + '\n')
+    return failed
+
+
+def write_result(result: Dict[str, Any], output_format: str, output: TextIO):
+    """Write one result as text, a JSON document or a JSON line, and flush it"""
+    if output_format == 'text':
+        write_text(result, output)
+    elif output_format == 'jsonl':
+        output.write(json.dumps(result, default=str) + '\n')
     else:
-        print("\nNot enough data for comprehensive analysis.")
-        
-    print("\nAnalysis complete!")
\ No newline at end of file
+        output.write(json.dumps(result, default=str, indent=2) + '\n')
+    output.flush()
+
+
+def watch(source: Dict[str, Any], args: argparse.Namespace, output: TextIO) -> int:
+    """
+    Analyze a directory of exports, then re-analyze whenever its files change
+
+    Appended rows are parsed and merged on their own and a changed file is
+    re-parsed without the others (see ingest.watcher). Runs until interrupted.
+
+    Returns:
+        1 if the initial load failed, otherwise 0
+    """
+    from ingest.watcher import ExportWatcher
+
+    result = new_result(source['name'], args)
+    token = start_trace() if args.timings else None
+    try:
+        with stage('cli.load'):
+            watcher = ExportWatcher(source['name'])
+        analyze_loaded(result, watcher.workout_analyzer, watcher.nutrition_analyzer, args)
+    except (OSError, ValueError, KeyError) as e:
+        result['error'] = f"{type(e).__name__}: {e}"
+    finally:
+        if token is not None:
+            result['timings'] = summarize_stages(end_trace(token))
+    write_result(result, args.format, output)
+    if 'error' in result:
+        return 1
+
+    try:
+        while True:
+            time.sleep(args.interval)
+            started = time.perf_counter()
+            token = start_trace() if args.timings else None
+            changes = watcher.poll()
+            if not changes:
+                if token is not None:
+                    end_trace(token)
+                continue
+
+            result = new_result(source['name'], args)
+            result['changes'] = [change.to_dict() for change in changes]
+            try:
+                analyze_loaded(result, watcher.workout_analyzer, watcher.nutrition_analyzer, args)
+            except (ValueError, KeyError) as e:
+                result['error'] = f"{type(e).__name__}: {e}"
+            result['refreshSeconds'] = round(time.perf_counter() - started, 6)
+            if token is not None:
+                result['timings'] = summarize_stages(end_trace(token))
+            write_result(result, args.format, output)
+    except KeyboardInterrupt:
+        return 0
+
+
+def build_parser() -> argparse.ArgumentParser:
+    parser = argparse.ArgumentParser(
+        description="Analyze Strong and MyFitnessPal exports and print insights",
+        epilog="Without inputs, the exports in ./data are analyzed.")
+    parser.add_argument('inputs', nargs='*',
+                        help="Directories of CSV exports (one analysis each), directories saved by "
+                             "storage.columnar, or individual CSV exports")
+    parser.add_argument('--strong', help="Strong workout export")
+    parser.add_argument('--nutrition', help="MyFitnessPal nutrition export")
+    parser.add_argument('--weight', help="MyFitnessPal measurement export")
+    parser.add_argument('--workers', type=int, metavar='N',
+                        help="Processes parsing a directory's MyFitnessPal exports (default: CPU count)")
+
+    history = parser.add_argument_group('history store input')
+    history.add_argument('--history', metavar='DB', help="Analyze a user's history from a SQLite history store")
+    history.add_argument('--user', default='default', help="History store user (default: default)")
+    history.add_argument('--start', help="First date to read, YYYY-MM-DD")
+    history.add_argument('--end', help="Last date to read, YYYY-MM-DD")
+
+    output = parser.add_argument_group('output')
+    output.add_argument('-f', '--format', choices=('text', 'json', 'jsonl'), default='text',
+                        help="Output format (default: text); jsonl writes one line per input")
+    output.add_argument('-o', '--output', help="Output file (default: stdout)")
+
+    watching = parser.add_argument_group('watch mode')
+    watching.add_argument('-w', '--watch', action='store_true',
+                          help="Keep running and re-analyze one directory of CSV exports whenever a file "
+                               "changes; appended rows are parsed on their own")
+    watching.add_argument('--interval', type=float, default=1.0, metavar='SECONDS',
+                          help="Seconds between checks for changed files (default: 1)")
+
+    profile = parser.add_argument_group('profile')
+    profile.add_argument('--height', type=float, default=DEFAULT_PROFILE['height'], help="Height in cm")
+    profile.add_argument('--age', type=int, default=DEFAULT_PROFILE['age'], help="Age in years")
+    profile.add_argument('--sex', choices=('M', 'F'), default=DEFAULT_PROFILE['sex'])
+    profile.add_argument('--goal', choices=('muscle_gain', 'maintenance', 'fat_loss'),
+                         default=DEFAULT_PROFILE['goal'])
+
+    diagnostics = parser.add_argument_group('diagnostics (reported on stderr)')
+    diagnostics.add_argument('--profile', nargs='?', const='', metavar='FILE', dest='profile_file',
+                             help="Run under cProfile and print the top functions; "
+                                  "with FILE, also dump the stats for pstats/snakeviz")
+    diagnostics.add_argument('--profile-sort', default='cumulative',
+                             help="pstats sort key for the printed profile (default: cumulative)")
+    diagnostics.add_argument('--profile-limit', type=int, default=30,
+                             help="Number of functions to print (default: 30)")
+    diagnostics.add_argument('--timings', action='store_true',
+                             help="Report wall and CPU time per pipeline stage")
+    diagnostics.add_argument('--trace-memory', nargs='?', type=int, const=15, metavar='N',
+                             help="Trace allocations with tracemalloc and print the top N lines (default: 15)")
+    return parser
+
+
+def main(argv: Optional[List[str]] = None) -> int:
+    parser = build_parser()
+    args = parser.parse_args(argv)
+
+    try:
+        inputs = resolve_inputs(args)
+    except (OSError, ValueError) as e:
+        parser.error(str(e))
+    if args.watch and (len(inputs) != 1 or 'files' not in inputs[0] or not os.path.isdir(inputs[0]['name'])):
+        parser.error("--watch needs a single directory of CSV exports")
+
+    if args.trace_memory:
+        import tracemalloc
+        tracemalloc.start()
+
+    profiler = None
+    if args.profile_file is not None:
+        import cProfile
+        profiler = cProfile.Profile()
+        profiler.enable()
+
+    output = open(args.output, 'w') if args.output else sys.stdout
+    try:
+        if args.watch:
+            failed = watch(inputs[0], args, output)
+        else:
+            failed = run(inputs, args, output)
+    finally:
+        if profiler is not None:
+            profiler.disable()
+        if output is not sys.stdout:
+            output.close()
+
+    # Snapshot memory first so the profile report's own allocations are not counted
+    if args.trace_memory:
+        report_memory(args.trace_memory)
+    if profiler is not None:
+        report_profile(profiler, args.profile_file, args.profile_sort, args.profile_limit)
+
+    return 1 if failed else 0
+
+
+def report_profile(profiler, path: str, sort: str, limit: int):
+    """Print the top functions of a profile to stderr and optionally dump it to a file"""
+    import pstats
+    if path:
+        profiler.dump_stats(path)
+        print(f"Profile written to {path}", file=sys.stderr)
+    stats = pstats.Stats(profiler, stream=sys.stderr)
+    stats.strip_dirs().sort_stats(sort).print_stats(limit)
+
+
+def report_memory(limit: int):
+    """Print peak traced memory and the top allocation sites to stderr"""
+    import tracemalloc
+    current, peak = tracemalloc.get_traced_memory()
+    snapshot = tracemalloc.take_snapshot()
+    tracemalloc.stop()
+
+    snapshot = snapshot.filter_traces((
+        tracemalloc.Filter(False, tracemalloc.__file__),
+        tracemalloc.Filter(False, '*/cProfile.py'),
+        tracemalloc.Filter(False, '<frozen importlib._bootstrap*>'),
+    ))
+    print(f"\n=== Memory ===\n\nCurrent {current / 1024 / 1024:.1f} MiB, peak {peak / 1024 / 1024:.1f} MiB\n"
+          f"Top {limit} allocation sites:", file=sys.stderr)
+    for statistic in snapshot.statistics('lineno')[:limit]:
+        frame = statistic.traceback[0]
+        print(f"{statistic.size / 1024:>10.1f} KiB {statistic.count:>8} blocks  "
+              f"{frame.filename}:{frame.lineno}", file=sys.stderr)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,14 @@
+from utils.lazy import lazy_exports
+
+# The parsers need pandas, so they are imported on first access
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'StrongParser': 'parsers.strong_parser',
+    'MFPNutritionParser': 'parsers.mfp_parser',
+    'MFPMealParser': 'parsers.mfp_parser',
+    'MFPWeightParser': 'parsers.mfp_parser',
+    'parse_strong_csv': 'parsers.strong_parser',
+    'parse_mfp_csv_nutrition': 'parsers.mfp_parser',
+    'parse_mfp_csv_meals': 'parsers.mfp_parser',
+    'parse_mfp_csv_weight': 'parsers.mfp_parser',
+    'meals_to_daily_totals': 'parsers.mfp_parser',
+})
@@ -1,9 +1,50 @@
+import os
+import re
 import pandas as pd
 from datetime import datetime
 from typing import List, Dict, Optional
 
 from parsers.base_parser import BaseParser
-from data_models.nutrition_models import DailyNutritionData, WeightData
+from data_models.nutrition_models import DailyNutritionData, MealNutritionData, WeightData
+from utils.instrumentation import stage
+
+# Circumference columns kept from measurement exports, by WeightData field;
+# headers match case-insensitively, optionally followed by a unit
+CIRCUMFERENCE_COLUMNS = {
+    'waist_cm': ('waist',),
+    'neck_cm': ('neck',),
+    'hip_cm': ('hip', 'hips')
+}
+
+# Centimeters per unit of a circumference header such as 'Waist (in)'
+CIRCUMFERENCE_UNITS = {'': 1.0, 'cm': 1.0, 'centimeters': 1.0, 'in': 2.54, 'inches': 2.54}
+
+CIRCUMFERENCE_HEADER = re.compile(r'^\s*([a-z]+)\s*(?:\(([a-z]+)\))?\s*$', re.IGNORECASE)
+
+
+def find_circumference_columns(columns: List[str]) -> Dict[str, tuple]:
+    """
+    Locate the waist, neck and hip columns of a measurement export
+    
+    Args:
+        columns: Header of the export
+        
+    Returns:
+        Dictionary of {WeightData field: (column, centimeters per unit)} for the columns present
+    """
+    found = {}
+    for column in columns:
+        match = CIRCUMFERENCE_HEADER.match(str(column))
+        if match is None:
+            continue
+        name, unit = match.group(1).lower(), (match.group(2) or '').lower()
+        if unit not in CIRCUMFERENCE_UNITS:
+            continue
+        for field, names in CIRCUMFERENCE_COLUMNS.items():
+            if name in names and field not in found:
+                found[field] = (column, CIRCUMFERENCE_UNITS[unit])
+    return found
+
 
 class MFPNutritionParser(BaseParser[DailyNutritionData]):
     """
@@ -21,8 +62,27 @@ class MFPNutritionParser(BaseParser[DailyNutritionData]):
             List of DailyNutritionData objects
         """
         # Read the CSV file
-        df = pd.read_csv(file_path)
+        with stage('nutrition.read_csv', nbytes=os.path.getsize(file_path)) as timing:
+            df = pd.read_csv(file_path)
+            timing.rows = len(df)
         
+        return self.parse_frame(df)
+    
+    def parse_frame(self, df: pd.DataFrame) -> List[DailyNutritionData]:
+        """
+        Convert export rows that were already read, e.g. the tail appended to a watched file
+        
+        Args:
+            df: DataFrame with the export's columns; it is modified in place
+            
+        Returns:
+            List of DailyNutritionData objects
+        """
+        with stage('nutrition.build', rows=len(df)):
+            return self._build_days(df)
+    
+    def _build_days(self, df: pd.DataFrame) -> List[DailyNutritionData]:
+        """Sum the export's meal rows into DailyNutritionData objects"""
         # Convert date strings to datetime objects
         df['Date'] = pd.to_datetime(df['Date'])
         
@@ -76,6 +136,120 @@ class MFPNutritionParser(BaseParser[DailyNutritionData]):
         return result
 
 
+class MFPMealParser(BaseParser[MealNutritionData]):
+    """
+    Parser for MyFitnessPal nutrition data exports that keeps each meal separate
+    
+    Used where individual meals must be identifiable, e.g. to deduplicate
+    meals synced into an existing dataset.
+    """
+    
+    def parse(self, file_path: str) -> List[MealNutritionData]:
+        """
+        Parse MyFitnessPal nutrition CSV export and convert to MealNutritionData objects
+        
+        Args:
+            file_path: Path to the nutrition CSV export file
+            
+        Returns:
+            List of MealNutritionData objects, one per date and meal
+        """
+        # Read the CSV file
+        with stage('meals.read_csv', nbytes=os.path.getsize(file_path)) as timing:
+            df = pd.read_csv(file_path)
+            timing.rows = len(df)
+        
+        return self.parse_frame(df)
+    
+    def parse_frame(self, df: pd.DataFrame) -> List[MealNutritionData]:
+        """
+        Convert export rows that were already read, e.g. the tail appended to a watched file
+        
+        Args:
+            df: DataFrame with the export's columns; it is modified in place
+            
+        Returns:
+            List of MealNutritionData objects
+        """
+        with stage('meals.build', rows=len(df)):
+            return self._build_meals(df)
+    
+    def _build_meals(self, df: pd.DataFrame) -> List[MealNutritionData]:
+        """Sum the export's rows into one MealNutritionData per date and meal"""
+        # Convert date strings to datetime objects
+        df['Date'] = pd.to_datetime(df['Date'])
+        
+        meal_totals = {}
+        
+        for _, row in df.iterrows():
+            meal = row.get('Meal', None)
+            meal_key = (row['Date'].date(), str(meal) if pd.notna(meal) else 'Unspecified')
+            
+            if meal_key not in meal_totals:
+                meal_totals[meal_key] = MealNutritionData(
+                    date=meal_key[0],
+                    meal=meal_key[1],
+                    calories_kcal=0.0,
+                    protein_g=0.0,
+                    carbs_g=0.0,
+                    fat_g=0.0,
+                    fiber_g=0.0,
+                    sugar_g=0.0,
+                    sodium_mg=0.0,
+                    cholesterol_mg=0.0
+                )
+            
+            totals = meal_totals[meal_key]
+            totals.calories_kcal += float(row.get('Calories', 0) or 0)
+            totals.protein_g += float(row.get('Protein (g)', 0) or 0)
+            totals.carbs_g += float(row.get('Carbohydrates (g)', 0) or 0)
+            totals.fat_g += float(row.get('Fat (g)', 0) or 0)
+            totals.fiber_g += float(row.get('Fiber', 0) or 0)
+            totals.sugar_g += float(row.get('Sugar', 0) or 0)
+            totals.sodium_mg += float(row.get('Sodium (mg)', 0) or 0)
+            totals.cholesterol_mg += float(row.get('Cholesterol', 0) or 0)
+        
+        return list(meal_totals.values())
+
+
+def meals_to_daily_totals(meal_data: List[MealNutritionData]) -> List[DailyNutritionData]:
+    """
+    Sum meals into daily nutrition totals
+    
+    Args:
+        meal_data: List of MealNutritionData objects
+        
+    Returns:
+        List of DailyNutritionData objects, one per date, in order of first appearance
+    """
+    daily_totals = {}
+    for meal in meal_data:
+        if meal.date not in daily_totals:
+            daily_totals[meal.date] = DailyNutritionData(
+                date=meal.date,
+                calories_kcal=0.0,
+                protein_g=0.0,
+                carbs_g=0.0,
+                fat_g=0.0,
+                fiber_g=0.0,
+                sugar_g=0.0,
+                sodium_mg=0.0,
+                cholesterol_mg=0.0
+            )
+        
+        totals = daily_totals[meal.date]
+        totals.calories_kcal += meal.calories_kcal
+        totals.protein_g += meal.protein_g
+        totals.carbs_g += meal.carbs_g
+        totals.fat_g += meal.fat_g
+        totals.fiber_g += meal.fiber_g or 0.0
+        totals.sugar_g += meal.sugar_g or 0.0
+        totals.sodium_mg += meal.sodium_mg or 0.0
+        totals.cholesterol_mg += meal.cholesterol_mg or 0.0
+    
+    return list(daily_totals.values())
+
+
 class MFPWeightParser(BaseParser[WeightData]):
     """
     Parser for MyFitnessPal weight data exports
@@ -92,11 +266,33 @@ class MFPWeightParser(BaseParser[WeightData]):
             List of WeightData objects
         """
         # Read the CSV file
-        df = pd.read_csv(file_path)
+        with stage('weight.read_csv', nbytes=os.path.getsize(file_path)) as timing:
+            df = pd.read_csv(file_path)
+            timing.rows = len(df)
         
+        return self.parse_frame(df)
+    
+    def parse_frame(self, df: pd.DataFrame) -> List[WeightData]:
+        """
+        Convert export rows that were already read, e.g. the tail appended to a watched file
+        
+        Args:
+            df: DataFrame with the export's columns; it is modified in place
+            
+        Returns:
+            List of WeightData objects
+        """
+        with stage('weight.build', rows=len(df)):
+            return self._build_entries(df)
+    
+    def _build_entries(self, df: pd.DataFrame) -> List[WeightData]:
+        """Convert the export's rows into WeightData objects"""
         # Convert date strings to datetime objects
         df['Date'] = pd.to_datetime(df['Date'])
         
+        # Waist, neck and hip columns are only present when the user logs them
+        circumferences = find_circumference_columns(list(df.columns))
+        
         # Convert the rows to WeightData objects
         result = []
         for _, row in df.iterrows():
@@ -113,6 +309,9 @@ class MFPWeightParser(BaseParser[WeightData]):
                 weight_kg=weight_kg,
                 body_fat_percentage=body_fat
             )
+            for field, (column, scale) in circumferences.items():
+                if pd.notna(row[column]):
+                    setattr(weight_data, field, float(row[column]) * scale)
             result.append(weight_data)
         
         return result
@@ -132,6 +331,20 @@ def parse_mfp_csv_nutrition(file_path: str) -> List[DailyNutritionData]:
     return parser.parse(file_path)
 
 
+def parse_mfp_csv_meals(file_path: str) -> List[MealNutritionData]:
+    """
+    Helper function to parse MyFitnessPal nutrition CSV export into meals
+    
+    Args:
+        file_path: Path to the nutrition CSV export file
+        
+    Returns:
+        List of MealNutritionData objects
+    """
+    parser = MFPMealParser()
+    return parser.parse(file_path)
+
+
 def parse_mfp_csv_weight(file_path: str) -> List[WeightData]:
     """
     Helper function to parse MyFitnessPal weight CSV export
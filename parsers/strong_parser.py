@@ -1,9 +1,13 @@
+import os
 import pandas as pd
 from datetime import datetime
 from typing import List, Dict, Set
 
 from parsers.base_parser import BaseParser
 from data_models.workout_models import WorkoutData, ExerciseData, SetData
+from data_models.frames import canonical_exercise_names
+from utils.exercise_names import default_index
+from utils.instrumentation import stage
 
 class StrongParser(BaseParser[WorkoutData]):
     """
@@ -21,11 +25,46 @@ class StrongParser(BaseParser[WorkoutData]):
             List of WorkoutData objects
         """
         # Read the CSV file
-        df = pd.read_csv(file_path)
+        with stage('strong.read_csv', nbytes=os.path.getsize(file_path)) as timing:
+            df = pd.read_csv(file_path)
+            timing.rows = len(df)
         
+        return self.parse_frame(df)
+    
+    def parse_frame(self, df: pd.DataFrame) -> List[WorkoutData]:
+        """
+        Convert export rows that were already read, e.g. the tail appended to a watched file
+        
+        Args:
+            df: DataFrame with the export's columns; it is modified in place
+            
+        Returns:
+            List of WorkoutData objects
+        """
+        with stage('strong.build', rows=len(df)):
+            workouts = self._build_workouts(df)
+        default_index().save()
+        return workouts
+    
+    def _build_workouts(self, df: pd.DataFrame) -> List[WorkoutData]:
+        """Group the export's rows into WorkoutData objects"""
         # Convert date strings to datetime objects
         df['Date'] = pd.to_datetime(df['Date'])
         
+        # Warm-up, drop and failure sets are exported with a letter instead of a number
+        if 'Set Order' in df.columns:
+            raw_order = df['Set Order']
+            df['Set Order'] = pd.to_numeric(raw_order, errors='coerce')
+            letters = raw_order.where(df['Set Order'].isna() & raw_order.notna())
+            df['Set Type'] = letters.astype(str).str.strip().str.upper().where(letters.notna())
+        
+        # Resolve each distinct exercise name once and use the canonical spelling throughout,
+        # except where two names logged in one workout would become the same exercise
+        matches = default_index().resolve_many(df['Exercise Name'].unique())
+        categories = {name: match.category for raw, match in matches.items() for name in (raw, match.name)}
+        df['Exercise Name'] = canonical_exercise_names(df['Exercise Name'],
+                                                       [df['Date'].dt.normalize(), df['Workout Name']])
+        
         # Group by date and workout name
         workouts = {}
         workout_exercises = {}
@@ -50,7 +89,7 @@ class StrongParser(BaseParser[WorkoutData]):
             if exercise_name not in workout_exercises[workout_key]:
                 workout_exercises[workout_key].add(exercise_name)
                 workouts[workout_key].exercises.append(
-                    ExerciseData(name=exercise_name)
+                    ExerciseData(name=exercise_name, category=categories.get(exercise_name))
                 )
             
             # Create and add the set data
@@ -67,13 +106,21 @@ class StrongParser(BaseParser[WorkoutData]):
             seconds = row.get('Seconds', None)
             seconds = int(seconds) if pd.notna(seconds) else None
             
+            set_order = row.get('Set Order', None)
+            set_order = int(set_order) if pd.notna(set_order) else None
+            
+            set_type = row.get('Set Type', None)
+            set_type = set_type if isinstance(set_type, str) and set_type else None
+            
             set_data = SetData(
                 exercise_name=exercise_name,
                 weight_kg=weight,
                 reps=reps,
                 distance_km=distance,
                 duration_seconds=seconds,
-                is_completed=True  # Assume completed since it's in the export
+                is_completed=True,  # Assume completed since it's in the export
+                set_order=set_order,
+                set_type=set_type
             )
             
             workouts[workout_key].sets.append(set_data)
@@ -0,0 +1,145 @@
+import os
+import json
+import time
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Dict, Any, Optional, Tuple
+
+
+def digest_uploads(files, field_names, preferences: Dict[str, Any],
+                   chunk_size: int = 1 << 20) -> str:
+    """
+    Compute a cache key from uploaded files and normalized preferences
+
+    The file streams are read in chunks and rewound so they can still be saved.
+
+    Args:
+        files: The request's uploaded files
+        field_names: Upload fields to include, in a fixed order
+        preferences: Normalized preferences that affect the analysis
+        chunk_size: Read size in bytes
+
+    Returns:
+        Hex digest identifying the request's inputs
+    """
+    digest = hashlib.sha256()
+    for field in field_names:
+        stream = files[field].stream
+        digest.update(field.encode())
+        while True:
+            chunk = stream.read(chunk_size)
+            if not chunk:
+                break
+            digest.update(chunk)
+        stream.seek(0)
+        digest.update(b'\0')
+
+    digest.update(json.dumps(preferences, sort_keys=True).encode())
+    return digest.hexdigest()
+
+
+class ResponseCache:
+    """
+    In-process LRU cache of serialized responses with TTL expiry
+
+    If `disk_dir` is set, entries are also written there and memory misses
+    fall back to the disk tier, so cached responses survive restarts and are
+    shared between worker processes.
+    """
+
+    def __init__(self, max_entries: int = 128, ttl_seconds: float = 3600,
+                 disk_dir: Optional[str] = None):
+        """
+        Initialize the cache
+
+        Args:
+            max_entries: Maximum number of in-memory entries
+            ttl_seconds: Seconds before an entry expires
+            disk_dir: Optional directory for the on-disk tier
+        """
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.disk_dir = disk_dir
+        self._entries: 'OrderedDict[str, Tuple[float, bytes]]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.stats = {'hits': 0, 'disk_hits': 0, 'misses': 0}
+
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key: str) -> str:
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, key: str) -> Optional[bytes]:
+        """
+        Look up a cached response
+
+        Args:
+            key: Cache key
+
+        Returns:
+            The cached body, or None on a miss
+        """
+        now = time.time()
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is not None:
+                stored_at, body = entry
+                if now - stored_at <= self.ttl_seconds:
+                    self._entries.move_to_end(key)
+                    self.stats['hits'] += 1
+                    return body
+                del self._entries[key]
+
+        body = self._read_disk(key, now)
+        with self._lock:
+            if body is None:
+                self.stats['misses'] += 1
+                return None
+            self.stats['disk_hits'] += 1
+        self._store_memory(key, body, now)
+        return body
+
+    def _read_disk(self, key: str, now: float) -> Optional[bytes]:
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if now - os.path.getmtime(path) > self.ttl_seconds:
+                os.unlink(path)
+                return None
+            with open(path, 'rb') as f:
+                return f.read()
+        except OSError:
+            return None
+
+    def set(self, key: str, body: bytes):
+        """
+        Store a response
+
+        Args:
+            key: Cache key
+            body: Serialized response body
+        """
+        now = time.time()
+        self._store_memory(key, body, now)
+
+        if self.disk_dir:
+            # Write atomically so concurrent readers never see a partial file
+            temp_path = f"{self._disk_path(key)}.{os.getpid()}.{threading.get_ident()}.tmp"
+            with open(temp_path, 'wb') as f:
+                f.write(body)
+            os.replace(temp_path, self._disk_path(key))
+
+    def _store_memory(self, key: str, body: bytes, stored_at: float):
+        with self._lock:
+            self._entries[key] = (stored_at, body)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def clear(self):
+        """Drop every in-memory entry (the disk tier is left alone)"""
+        with self._lock:
+            self._entries.clear()
@@ -0,0 +1,212 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict, deque
+from concurrent.futures import ThreadPoolExecutor
+from typing import Dict, Any, Optional, Callable
+
+
+class QueueFullError(Exception):
+    """Raised when a job is submitted while the queue is at capacity"""
+    pass
+
+
+class Job:
+    """
+    A background analysis job and its lifecycle timestamps
+    """
+
+    def __init__(self, job_id: str):
+        self.id = job_id
+        self.status = 'queued'
+        self.submitted_at = time.time()
+        self.started_at: Optional[float] = None
+        self.finished_at: Optional[float] = None
+        self.result: Any = None
+        self.error: Optional[str] = None
+        self.done = threading.Event()
+
+    @property
+    def duration_seconds(self) -> Optional[float]:
+        if self.started_at is None or self.finished_at is None:
+            return None
+        return self.finished_at - self.started_at
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Serialize the job for the status endpoint"""
+        data = {
+            'jobId': self.id,
+            'status': self.status,
+            'submittedAt': self.submitted_at,
+            'startedAt': self.started_at,
+            'finishedAt': self.finished_at,
+            'durationSeconds': self.duration_seconds
+        }
+        if self.status == 'succeeded':
+            data['result'] = self.result
+        elif self.status == 'failed':
+            data['error'] = self.error
+        return data
+
+
+class JobManager:
+    """
+    Runs jobs on a bounded thread pool with admission control
+
+    At most `max_workers` jobs run at once and at most `max_queue` more wait
+    for a worker; further submissions are rejected with QueueFullError.
+    Finished jobs are kept for `retention_seconds` so clients can poll them.
+    """
+
+    def __init__(self, max_workers: int = 2, max_queue: int = 16,
+                 retention_seconds: float = 3600, duration_window: int = 1000):
+        """
+        Initialize the worker pool
+
+        Args:
+            max_workers: Number of jobs that may run concurrently
+            max_queue: Number of jobs that may wait for a worker
+            retention_seconds: How long finished jobs stay available
+            duration_window: Number of recent jobs kept for duration statistics
+        """
+        self.max_workers = max_workers
+        self.max_queue = max_queue
+        self.retention_seconds = retention_seconds
+
+        self._executor = ThreadPoolExecutor(max_workers=max_workers,
+                                            thread_name_prefix='analysis-job')
+        self._lock = threading.Lock()
+        self._jobs: 'OrderedDict[str, Job]' = OrderedDict()
+        self._queued = 0
+        self._running = 0
+        self._counters = {'submitted': 0, 'succeeded': 0, 'failed': 0, 'rejected': 0}
+        self._durations = deque(maxlen=duration_window)
+        self._wait_times = deque(maxlen=duration_window)
+
+    def is_full(self) -> bool:
+        """Whether a new job would currently be rejected"""
+        with self._lock:
+            return self._queued + self._running >= self.max_workers + self.max_queue
+
+    def submit(self, fn: Callable[..., Any], *args, **kwargs) -> Job:
+        """
+        Queue a job
+
+        Args:
+            fn: Callable producing the job's result
+            *args, **kwargs: Arguments for fn
+
+        Returns:
+            The queued Job
+
+        Raises:
+            QueueFullError: If the queue is at capacity
+        """
+        with self._lock:
+            self._expire_finished()
+            if self._queued + self._running >= self.max_workers + self.max_queue:
+                self._counters['rejected'] += 1
+                raise QueueFullError("Analysis queue is full")
+
+            job = Job(uuid.uuid4().hex)
+            self._jobs[job.id] = job
+            self._queued += 1
+            self._counters['submitted'] += 1
+
+        self._executor.submit(self._run, job, fn, args, kwargs)
+        return job
+
+    def _run(self, job: Job, fn: Callable[..., Any], args, kwargs):
+        with self._lock:
+            self._queued -= 1
+            self._running += 1
+            job.status = 'running'
+            job.started_at = time.time()
+            self._wait_times.append(job.started_at - job.submitted_at)
+
+        try:
+            result = fn(*args, **kwargs)
+            status, error = 'succeeded', None
+        except Exception as e:
+            result, status, error = None, 'failed', str(e)
+
+        with self._lock:
+            self._running -= 1
+            job.result = result
+            job.error = error
+            job.status = status
+            job.finished_at = time.time()
+            self._counters[status] += 1
+            self._durations.append(job.duration_seconds)
+        job.done.set()
+
+    def _expire_finished(self):
+        # Jobs are ordered by submission, so stop at the first one still in its retention window
+        cutoff = time.time() - self.retention_seconds
+        for job_id in list(self._jobs):
+            job = self._jobs[job_id]
+            if job.submitted_at >= cutoff:
+                break
+            if job.done.is_set() and job.finished_at < cutoff:
+                del self._jobs[job_id]
+
+    def get(self, job_id: str) -> Optional[Job]:
+        """Look up a job by id"""
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def wait(self, job_id: str, timeout: float) -> Optional[Job]:
+        """
+        Look up a job, blocking up to `timeout` seconds for it to finish
+
+        Args:
+            job_id: Job id
+            timeout: Maximum number of seconds to wait
+
+        Returns:
+            The Job (finished or not), or None if unknown
+        """
+        job = self.get(job_id)
+        if job is not None:
+            job.done.wait(timeout)
+        return job
+
+    def metrics(self) -> Dict[str, Any]:
+        """
+        Snapshot of queue depth, concurrency and recent job durations
+
+        Returns:
+            Dictionary of metrics
+        """
+        with self._lock:
+            durations = sorted(self._durations)
+            wait_times = sorted(self._wait_times)
+            return {
+                'queueDepth': self._queued,
+                'running': self._running,
+                'maxWorkers': self.max_workers,
+                'maxQueue': self.max_queue,
+                'jobs': dict(self._counters),
+                'durationSeconds': _summarize(durations),
+                'queueWaitSeconds': _summarize(wait_times)
+            }
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting jobs and optionally wait for running ones"""
+        self._executor.shutdown(wait=wait)
+
+
+def _summarize(sorted_values) -> Dict[str, Optional[float]]:
+    if not sorted_values:
+        return {'count': 0, 'mean': None, 'p50': None, 'p95': None, 'max': None}
+
+    def percentile(p):
+        return sorted_values[min(len(sorted_values) - 1, int(p * len(sorted_values)))]
+
+    return {
+        'count': len(sorted_values),
+        'mean': sum(sorted_values) / len(sorted_values),
+        'p50': percentile(0.50),
+        'p95': percentile(0.95),
+        'max': sorted_values[-1]
+    }
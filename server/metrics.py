@@ -0,0 +1,216 @@
+import bisect
+import threading
+from typing import List, Dict, Any, Optional, Tuple
+
+from utils.instrumentation import StageRecord
+
+# Latency histogram bucket upper bounds, in seconds
+DEFAULT_BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0)
+
+
+class Histogram:
+    """
+    Cumulative-bucket latency histogram in the Prometheus layout
+    """
+
+    def __init__(self, buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize an empty histogram
+
+        Args:
+            buckets: Sorted bucket upper bounds
+        """
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # The last slot is the +Inf bucket
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        """Add one observation"""
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+    def cumulative_counts(self) -> List[Tuple[str, int]]:
+        """Bucket counts as (le, cumulative count) pairs, ending with +Inf"""
+        bounds = [_format_value(bound) for bound in self.buckets] + ['+Inf']
+        result = []
+        total = 0
+        for bound, count in zip(bounds, self.counts):
+            total += count
+            result.append((bound, total))
+        return result
+
+
+class MetricsRegistry:
+    """
+    Collects stage and request latencies and renders them in the Prometheus text format
+
+    Register `observe_stage` with utils.instrumentation.add_listener to receive
+    every timed stage.
+    """
+
+    def __init__(self, namespace: str = 'synergyfit', buckets: Tuple[float, ...] = DEFAULT_BUCKETS):
+        """
+        Initialize an empty registry
+
+        Args:
+            namespace: Prefix of every metric name
+            buckets: Latency histogram bucket upper bounds in seconds
+        """
+        self.namespace = namespace
+        self.buckets = buckets
+        self._lock = threading.Lock()
+        self._stage_seconds: Dict[str, Histogram] = {}
+        self._stage_rows: Dict[str, int] = {}
+        self._stage_bytes: Dict[str, int] = {}
+        self._request_seconds: Dict[Tuple[str, str], Histogram] = {}
+        self._request_counts: Dict[Tuple[str, str, str], int] = {}
+
+    def observe_stage(self, stage_record: StageRecord):
+        """
+        Record a finished pipeline stage
+
+        Args:
+            stage_record: StageRecord from utils.instrumentation
+        """
+        name = stage_record.name
+        with self._lock:
+            histogram = self._stage_seconds.get(name)
+            if histogram is None:
+                histogram = self._stage_seconds[name] = Histogram(self.buckets)
+            histogram.observe(stage_record.seconds)
+            if stage_record.rows is not None:
+                self._stage_rows[name] = self._stage_rows.get(name, 0) + stage_record.rows
+            if stage_record.nbytes is not None:
+                self._stage_bytes[name] = self._stage_bytes.get(name, 0) + stage_record.nbytes
+
+    def observe_request(self, endpoint: str, method: str, status: int, seconds: float):
+        """
+        Record a finished HTTP request
+
+        Args:
+            endpoint: URL rule of the matched route
+            method: HTTP method
+            status: Response status code
+            seconds: Time spent handling the request
+        """
+        with self._lock:
+            key = (endpoint, method)
+            histogram = self._request_seconds.get(key)
+            if histogram is None:
+                histogram = self._request_seconds[key] = Histogram(self.buckets)
+            histogram.observe(seconds)
+            count_key = (endpoint, method, str(status))
+            self._request_counts[count_key] = self._request_counts.get(count_key, 0) + 1
+
+    def render(self, job_metrics: Optional[Dict[str, Any]] = None,
+               cache_stats: Optional[Dict[str, int]] = None,
+               dataset_stats: Optional[Dict[str, Any]] = None) -> str:
+        """
+        Render all metrics in the Prometheus text exposition format
+
+        Args:
+            job_metrics: Optional JobManager.metrics() snapshot
+            cache_stats: Optional ResponseCache.stats counters
+            dataset_stats: Optional DatasetStore.stats() snapshot
+
+        Returns:
+            Exposition text
+        """
+        ns = self.namespace
+        lines: List[str] = []
+
+        with self._lock:
+            _histogram_lines(lines, f"{ns}_stage_duration_seconds",
+                             'Time spent in each analysis pipeline stage',
+                             {(('stage', name),): hist for name, hist in self._stage_seconds.items()})
+            _counter_lines(lines, f"{ns}_stage_rows_total", 'Rows processed by each stage',
+                           {(('stage', name),): value for name, value in self._stage_rows.items()})
+            _counter_lines(lines, f"{ns}_stage_bytes_total", 'Bytes processed by each stage',
+                           {(('stage', name),): value for name, value in self._stage_bytes.items()})
+            _histogram_lines(lines, f"{ns}_http_request_duration_seconds",
+                             'Time spent handling HTTP requests',
+                             {(('endpoint', endpoint), ('method', method)): hist
+                              for (endpoint, method), hist in self._request_seconds.items()})
+            _counter_lines(lines, f"{ns}_http_requests_total", 'HTTP requests by response status',
+                           {(('endpoint', endpoint), ('method', method), ('status', status)): value
+                            for (endpoint, method, status), value in self._request_counts.items()})
+
+        if job_metrics is not None:
+            _gauge_lines(lines, f"{ns}_job_queue_depth", 'Analysis jobs waiting to run',
+                         {(): job_metrics['queueDepth']})
+            _gauge_lines(lines, f"{ns}_jobs_running", 'Analysis jobs currently running',
+                         {(): job_metrics['running']})
+            _counter_lines(lines, f"{ns}_jobs_total", 'Analysis jobs by outcome',
+                           {(('status', status),): value for status, value in job_metrics['jobs'].items()})
+            _summary_lines(lines, f"{ns}_job_duration_seconds",
+                           'Run time of recent analysis jobs', job_metrics['durationSeconds'])
+            _summary_lines(lines, f"{ns}_job_queue_wait_seconds",
+                           'Queue wait of recent analysis jobs', job_metrics['queueWaitSeconds'])
+
+        if cache_stats is not None:
+            _counter_lines(lines, f"{ns}_response_cache_lookups_total", 'Response cache lookups by result',
+                           {(('result', result),): value for result, value in cache_stats.items()})
+
+        if dataset_stats is not None:
+            _gauge_lines(lines, f"{ns}_datasets_resident", 'Resident datasets',
+                         {(): dataset_stats['datasets']})
+            _gauge_lines(lines, f"{ns}_datasets_bytes", 'Estimated size of resident datasets',
+                         {(): dataset_stats['totalBytes']})
+            _counter_lines(lines, f"{ns}_dataset_evictions_total", 'Datasets evicted or expired',
+                           {(): dataset_stats['evictions']})
+
+        return '\n'.join(lines) + '\n'
+
+
+def _format_value(value: float) -> str:
+    if value == int(value):
+        return f"{value:.1f}"
+    return repr(float(value))
+
+
+def _format_labels(labels, extra: Tuple[Tuple[str, str], ...] = ()) -> str:
+    pairs = tuple(labels) + extra
+    if not pairs:
+        return ''
+    escaped = (str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+               for _, value in pairs)
+    return '{' + ','.join(f'{key}="{value}"' for (key, _), value in zip(pairs, escaped)) + '}'
+
+
+def _header(lines: List[str], name: str, help_text: str, metric_type: str):
+    lines.append(f"# HELP {name} {help_text}")
+    lines.append(f"# TYPE {name} {metric_type}")
+
+
+def _counter_lines(lines: List[str], name: str, help_text: str, series: Dict[tuple, float]):
+    _header(lines, name, help_text, 'counter')
+    for labels, value in sorted(series.items()):
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+
+def _gauge_lines(lines: List[str], name: str, help_text: str, series: Dict[tuple, float]):
+    _header(lines, name, help_text, 'gauge')
+    for labels, value in sorted(series.items()):
+        lines.append(f"{name}{_format_labels(labels)} {value}")
+
+
+def _histogram_lines(lines: List[str], name: str, help_text: str, series: Dict[tuple, Histogram]):
+    _header(lines, name, help_text, 'histogram')
+    for labels, histogram in sorted(series.items(), key=lambda item: item[0]):
+        for bound, count in histogram.cumulative_counts():
+            lines.append(f"{name}_bucket{_format_labels(labels, (('le', bound),))} {count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {histogram.sum!r}")
+        lines.append(f"{name}_count{_format_labels(labels)} {histogram.count}")
+
+
+def _summary_lines(lines: List[str], name: str, help_text: str, summary: Dict[str, Optional[float]]):
+    _header(lines, name, help_text, 'summary')
+    for quantile, key in (('0.5', 'p50'), ('0.95', 'p95')):
+        value = summary[key]
+        lines.append(f"{name}{_format_labels((), (('quantile', quantile),))} "
+                     f"{'NaN' if value is None else repr(float(value))}")
+    total = (summary['mean'] or 0.0) * summary['count']
+    lines.append(f"{name}_sum {total!r}")
+    lines.append(f"{name}_count {summary['count']}")
@@ -0,0 +1,102 @@
+import gzip
+import json
+import datetime
+from typing import Any, Optional, Tuple
+
+from utils.instrumentation import stage
+from utils.lazy import lazy_import
+
+np = lazy_import('numpy')
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# Bodies smaller than this are sent uncompressed
+MIN_COMPRESS_BYTES = 1024
+
+
+def _default(obj: Any) -> Any:
+    """Fallback conversion for values the JSON encoders do not handle natively"""
+    if isinstance(obj, np.generic):
+        return obj.item()
+    if isinstance(obj, np.ndarray):
+        return obj.tolist()
+    if isinstance(obj, (datetime.date, datetime.datetime)):
+        return obj.isoformat()
+    raise TypeError(f"Object of type {type(obj).__name__} is not JSON serializable")
+
+
+def dumps(payload: Any) -> bytes:
+    """
+    Serialize a payload to compact JSON bytes with sorted keys
+
+    Uses orjson when it is installed and the standard library otherwise.
+
+    Args:
+        payload: JSON-compatible object (numpy scalars and arrays are allowed)
+
+    Returns:
+        UTF-8 encoded JSON
+    """
+    with stage('serialize') as timing:
+        if orjson is not None:
+            body = orjson.dumps(payload, default=_default,
+                                option=orjson.OPT_SORT_KEYS | orjson.OPT_SERIALIZE_NUMPY)
+        else:
+            body = json.dumps(payload, default=_default, sort_keys=True,
+                              separators=(',', ':')).encode()
+        timing.nbytes = len(body)
+    return body
+
+
+def negotiate_encoding(accept_encoding: Optional[str]) -> Optional[str]:
+    """
+    Pick a response encoding from an Accept-Encoding header
+
+    Args:
+        accept_encoding: Raw Accept-Encoding header value
+
+    Returns:
+        'br', 'gzip' or None
+    """
+    if not accept_encoding:
+        return None
+
+    accepted = set()
+    for part in accept_encoding.split(','):
+        coding, _, params = part.strip().partition(';')
+        if params.replace(' ', '') in ('q=0', 'q=0.0', 'q=0.00', 'q=0.000'):
+            continue
+        accepted.add(coding.strip().lower())
+
+    if brotli is not None and 'br' in accepted:
+        return 'br'
+    if 'gzip' in accepted or '*' in accepted:
+        return 'gzip'
+    return None
+
+
+def compress(body: bytes, encoding: Optional[str]) -> Tuple[bytes, Optional[str]]:
+    """
+    Compress a body with the negotiated encoding
+
+    Args:
+        body: Uncompressed body
+        encoding: 'br', 'gzip' or None
+
+    Returns:
+        Tuple of (body, applied encoding or None if sent as-is)
+    """
+    if encoding is None or len(body) < MIN_COMPRESS_BYTES:
+        return body, None
+    with stage('compress', nbytes=len(body)):
+        if encoding == 'br':
+            return brotli.compress(body, quality=5), 'br'
+        return gzip.compress(body, compresslevel=6), 'gzip'
@@ -0,0 +1,255 @@
+import time
+import uuid
+import threading
+from collections import OrderedDict
+from typing import List, Dict, Any, Optional, TYPE_CHECKING
+
+import analysis
+from data_models.workout_models import WorkoutData
+from data_models.nutrition_models import MealNutritionData, WeightData
+
+if TYPE_CHECKING:
+    from analysis.workout_analysis import WorkoutAnalyzer
+    from analysis.nutrition_analysis import NutritionAnalyzer
+
+# Rough in-memory cost of one parsed dataclass record (set, day or weigh-in)
+RECORD_OVERHEAD_BYTES = 400
+
+
+class Dataset:
+    """
+    A parsed upload kept resident so it can answer many queries
+    """
+
+    def __init__(self, workout_analyzer: 'WorkoutAnalyzer', nutrition_analyzer: 'NutritionAnalyzer',
+                 user_id: Optional[str] = None):
+        """
+        Initialize with the analyzers built from one upload
+
+        Args:
+            workout_analyzer: WorkoutAnalyzer for the dataset's workouts
+            nutrition_analyzer: NutritionAnalyzer for the dataset's nutrition and weight
+            user_id: History store user the dataset was loaded from, if any
+        """
+        self.id = uuid.uuid4().hex
+        self.user_id = user_id
+        self.workout_analyzer = workout_analyzer
+        self.nutrition_analyzer = nutrition_analyzer
+        self.insight_generator = analysis.InsightGenerator.from_analyzers(workout_analyzer, nutrition_analyzer)
+        # Resident datasets answer many period queries, so materialize the rollups up front
+        workout_analyzer.build_rollups()
+        nutrition_analyzer.build_rollups()
+        self.created_at = time.time()
+        self.last_access = self.created_at
+        self.updated_at = self.created_at
+        self.version = 1
+        self.size_bytes = self.estimate_size()
+        self._sync_lock = threading.Lock()
+
+    def estimate_size(self) -> int:
+        """
+        Estimate the dataset's memory footprint in bytes
+
+        Returns:
+            Deep size of the analyzers' DataFrames plus an allowance for parsed records
+        """
+        frames = [
+            self.workout_analyzer.sets_df,
+            self.workout_analyzer.sessions_df,
+            self.workout_analyzer.workouts_df,
+            self.nutrition_analyzer.nutrition_df,
+            self.nutrition_analyzer.meals_df,
+            self.nutrition_analyzer.weight_df
+        ]
+        frames.extend(table.frame for tables in self.workout_analyzer.rollups.values()
+                      for table in tables.values() if table.is_built)
+        frames.extend(table.frame for tables in (self.nutrition_analyzer.nutrition_rollups,
+                                                 self.nutrition_analyzer.weight_rollups)
+                      for table in tables.values() if table.is_built)
+        frame_bytes = sum(int(df.memory_usage(deep=True).sum()) for df in frames)
+        records = (len(self.workout_analyzer.sets_df) +
+                   len(self.nutrition_analyzer.nutrition_data) +
+                   len(self.nutrition_analyzer.weight_data))
+        return frame_bytes + records * RECORD_OVERHEAD_BYTES
+
+    def sync(self, workout_data: List[WorkoutData], meal_data: List[MealNutritionData],
+             weight_data: List[WeightData]) -> Dict[str, Any]:
+        """
+        Merge new or corrected records into the dataset
+
+        Args:
+            workout_data: Workouts with new sets
+            meal_data: New meals
+            weight_data: New weigh-ins
+
+        Returns:
+            Counts of received and replaced records per kind
+        """
+        with self._sync_lock:
+            result = {
+                'workouts': self.workout_analyzer.upsert_workouts(workout_data),
+                'nutrition': self.nutrition_analyzer.upsert_meals(meal_data),
+                'weight': self.nutrition_analyzer.upsert_weights(weight_data)
+            }
+            self.version += 1
+            self.updated_at = time.time()
+            self.size_bytes = self.estimate_size()
+        return result
+
+    def describe(self) -> Dict[str, Any]:
+        """Summarize the dataset for API responses"""
+        sets_df = self.workout_analyzer.sets_df
+        weight_df = self.nutrition_analyzer.weight_df
+        nutrition_df = self.nutrition_analyzer.nutrition_df
+
+        def date_range(dates):
+            if len(dates) == 0:
+                return None
+            return {'start': str(min(dates)), 'end': str(max(dates))}
+
+        return {
+            'datasetId': self.id,
+            'userId': self.user_id,
+            'createdAt': self.created_at,
+            'updatedAt': self.updated_at,
+            'version': self.version,
+            'sizeBytes': self.size_bytes,
+            'workouts': len(self.workout_analyzer.workouts_df),
+            'sets': len(sets_df),
+            'exercises': len(self.workout_analyzer.exercises),
+            'nutritionDays': len(nutrition_df),
+            'weightEntries': len(weight_df),
+            'workoutDates': date_range(sets_df['date'].dt.date) if not sets_df.empty else None,
+            'nutritionDates': date_range(nutrition_df['date']) if not nutrition_df.empty else None,
+            'weightDates': date_range(weight_df['date']) if not weight_df.empty else None
+        }
+
+
+class DatasetStore:
+    """
+    Memory-bounded, LRU-evicted store of resident datasets keyed by dataset id
+    """
+
+    def __init__(self, max_bytes: int = 512 * 1024 * 1024, ttl_seconds: Optional[float] = None):
+        """
+        Initialize the store
+
+        Args:
+            max_bytes: Total estimated size of resident datasets
+            ttl_seconds: Optional idle time after which a dataset is dropped
+        """
+        self.max_bytes = max_bytes
+        self.ttl_seconds = ttl_seconds
+        self._datasets: 'OrderedDict[str, Dataset]' = OrderedDict()
+        self._lock = threading.Lock()
+        self.total_bytes = 0
+        self.evictions = 0
+
+    def add(self, dataset: Dataset) -> str:
+        """
+        Make a dataset resident, evicting least recently used ones to stay within budget
+
+        Args:
+            dataset: Dataset to store
+
+        Returns:
+            The dataset id
+
+        Raises:
+            MemoryError: If the dataset alone exceeds the store's budget
+        """
+        if dataset.size_bytes > self.max_bytes:
+            raise MemoryError(f"Dataset needs ~{dataset.size_bytes} bytes, "
+                              f"more than the store's {self.max_bytes} byte budget")
+
+        with self._lock:
+            self._datasets[dataset.id] = dataset
+            self.total_bytes += dataset.size_bytes
+            self._evict()
+        return dataset.id
+
+    def _evict(self):
+        now = time.time()
+        for dataset_id in list(self._datasets):
+            dataset = self._datasets[dataset_id]
+            idle_expired = self.ttl_seconds is not None and now - dataset.last_access > self.ttl_seconds
+            if self.total_bytes <= self.max_bytes and not idle_expired:
+                continue
+            self._drop(dataset_id)
+            self.evictions += 1
+
+    def _drop(self, dataset_id: str):
+        dataset = self._datasets.pop(dataset_id)
+        self.total_bytes -= dataset.size_bytes
+
+    def resize(self, dataset_id: str, old_size_bytes: int):
+        """
+        Account for a dataset whose size changed, evicting others if the budget is exceeded
+
+        Args:
+            dataset_id: Dataset id
+            old_size_bytes: The dataset's size before the change
+
+        Raises:
+            MemoryError: If the dataset alone now exceeds the store's budget; it is dropped
+        """
+        with self._lock:
+            dataset = self._datasets.get(dataset_id)
+            if dataset is None:
+                return
+            self.total_bytes += dataset.size_bytes - old_size_bytes
+            if dataset.size_bytes > self.max_bytes:
+                self._drop(dataset_id)
+                self.evictions += 1
+                raise MemoryError(f"Dataset grew to ~{dataset.size_bytes} bytes, "
+                                  f"more than the store's {self.max_bytes} byte budget")
+            self._datasets.move_to_end(dataset_id)
+            self._evict()
+
+    def get(self, dataset_id: str) -> Optional[Dataset]:
+        """
+        Look up a dataset and mark it as recently used
+
+        Args:
+            dataset_id: Dataset id
+
+        Returns:
+            The Dataset, or None if unknown or evicted
+        """
+        with self._lock:
+            dataset = self._datasets.get(dataset_id)
+            if dataset is None:
+                return None
+            if self.ttl_seconds is not None and time.time() - dataset.last_access > self.ttl_seconds:
+                self._drop(dataset_id)
+                self.evictions += 1
+                return None
+            dataset.last_access = time.time()
+            self._datasets.move_to_end(dataset_id)
+            return dataset
+
+    def remove(self, dataset_id: str) -> bool:
+        """
+        Drop a dataset
+
+        Args:
+            dataset_id: Dataset id
+
+        Returns:
+            True if the dataset was resident
+        """
+        with self._lock:
+            if dataset_id not in self._datasets:
+                return False
+            self._drop(dataset_id)
+            return True
+
+    def stats(self) -> Dict[str, Any]:
+        """Snapshot of the store's occupancy"""
+        with self._lock:
+            return {
+                'datasets': len(self._datasets),
+                'totalBytes': self.total_bytes,
+                'maxBytes': self.max_bytes,
+                'evictions': self.evictions
+            }
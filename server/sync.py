@@ -0,0 +1,167 @@
+from dataclasses import dataclass, field
+from datetime import date
+from typing import List, Dict, Any, Optional
+
+import parsers
+from data_models.workout_models import WorkoutData, ExerciseData, SetData
+from data_models.nutrition_models import MealNutritionData, WeightData
+from server.validation import UploadValidationError
+from utils.exercise_names import default_index
+from utils.lazy import lazy_import
+
+pd = lazy_import('pandas')
+
+
+@dataclass
+class SyncDelta:
+    """New records to merge into a resident dataset"""
+    workouts: List[WorkoutData] = field(default_factory=list)
+    meals: List[MealNutritionData] = field(default_factory=list)
+    weights: List[WeightData] = field(default_factory=list)
+
+    def is_empty(self) -> bool:
+        return not (self.workouts or self.meals or self.weights)
+
+
+def load_sync_files(paths: Dict[str, str]) -> SyncDelta:
+    """
+    Parse delta CSVs in the same formats as the full exports
+
+    Args:
+        paths: {upload field: saved file path} for the fields that were sent
+
+    Returns:
+        SyncDelta
+    """
+    delta = SyncDelta()
+    if 'strong_file' in paths:
+        delta.workouts = parsers.parse_strong_csv(paths['strong_file'])
+    if 'nutrition_file' in paths:
+        delta.meals = parsers.parse_mfp_csv_meals(paths['nutrition_file'])
+    if 'weight_file' in paths:
+        delta.weights = parsers.parse_mfp_csv_weight(paths['weight_file'])
+    return delta
+
+
+def parse_sync_json(body: Dict[str, Any]) -> SyncDelta:
+    """
+    Convert a JSON delta into records
+
+    The body may hold any of:
+
+        {"sets":    [{"date", "workoutName", "exerciseName", "setOrder",
+                      "weight", "reps", "distance", "seconds"}],
+         "meals":   [{"date", "meal", "calories", "protein", "carbs", "fat",
+                      "fiber", "sugar", "sodium", "cholesterol"}],
+         "weights": [{"date", "weight", "bodyFat"}]}
+
+    A set's "setOrder" is its number, or a letter such as "W" for warm-up,
+    "D" for drop and "F" for failure sets, as in Strong exports.
+
+    Args:
+        body: Parsed JSON request body
+
+    Returns:
+        SyncDelta
+
+    Raises:
+        UploadValidationError: If a record is missing a required field or has a bad value
+    """
+    if not isinstance(body, dict):
+        raise UploadValidationError('Sync body must be a JSON object')
+
+    delta = SyncDelta()
+    try:
+        delta.workouts = _workouts_from_sets(body.get('sets') or [])
+        default_index().save()
+        delta.meals = [
+            MealNutritionData(
+                date=_parse_date(record['date']),
+                meal=str(record['meal']),
+                calories_kcal=_number(record.get('calories')),
+                protein_g=_number(record.get('protein')),
+                carbs_g=_number(record.get('carbs')),
+                fat_g=_number(record.get('fat')),
+                fiber_g=_number(record.get('fiber')),
+                sugar_g=_number(record.get('sugar')),
+                sodium_mg=_number(record.get('sodium')),
+                cholesterol_mg=_number(record.get('cholesterol'))
+            )
+            for record in body.get('meals') or []
+        ]
+        delta.weights = [
+            WeightData(
+                date=_parse_date(record['date']),
+                weight_kg=float(record['weight']),
+                body_fat_percentage=_optional_number(record.get('bodyFat')),
+                waist_cm=_optional_number(record.get('waist')),
+                neck_cm=_optional_number(record.get('neck')),
+                hip_cm=_optional_number(record.get('hip'))
+            )
+            for record in body.get('weights') or []
+        ]
+    except KeyError as e:
+        raise UploadValidationError(f"Sync record is missing the {e.args[0]!r} field")
+    except (TypeError, ValueError) as e:
+        raise UploadValidationError(f"Invalid sync record: {e}")
+    return delta
+
+
+def _workouts_from_sets(records: List[Dict[str, Any]]) -> List[WorkoutData]:
+    from data_models.frames import canonical_exercise_names
+
+    workouts: Dict[tuple, WorkoutData] = {}
+    dates = [_parse_date(record['date']) for record in records]
+    routine_names = [record.get('workoutName') for record in records]
+    raw_names = pd.Series([str(record['exerciseName']) for record in records], dtype=object)
+    workout_keys = [pd.Series(dates, dtype=object), pd.Series(routine_names, dtype=object)]
+    names = canonical_exercise_names(raw_names, workout_keys)
+
+    for record, workout_date, routine_name, raw_name, exercise_name in zip(
+            records, dates, routine_names, raw_names, names):
+        match = default_index().resolve(raw_name)
+
+        key = (workout_date, routine_name)
+        workout = workouts.get(key)
+        if workout is None:
+            workout = workouts[key] = WorkoutData(date=workout_date, routine_name=routine_name)
+        if all(exercise.name != exercise_name for exercise in workout.exercises):
+            workout.exercises.append(ExerciseData(name=exercise_name, category=match.category))
+
+        set_order, set_type = _set_order(record.get('setOrder'))
+        workout.sets.append(SetData(
+            exercise_name=exercise_name,
+            weight_kg=_optional_number(record.get('weight')),
+            reps=_optional_int(record.get('reps')),
+            distance_km=_optional_number(record.get('distance')),
+            duration_seconds=_optional_int(record.get('seconds')),
+            set_order=set_order,
+            set_type=set_type
+        ))
+    return list(workouts.values())
+
+
+def _parse_date(value) -> date:
+    # Accepts dates and Strong-style timestamps such as '2025-05-01 07:30:00'
+    return pd.Timestamp(value).date()
+
+
+def _set_order(value):
+    # (number, None) for numbered sets, (None, letter) for warm-up, drop and failure sets
+    if value is None or value == '':
+        return None, None
+    if isinstance(value, str) and not value.strip().lstrip('-').isdigit():
+        return None, value.strip().upper()
+    return int(value), None
+
+
+def _number(value) -> float:
+    return float(value or 0)
+
+
+def _optional_number(value) -> Optional[float]:
+    return None if value is None else float(value)
+
+
+def _optional_int(value) -> Optional[int]:
+    return None if value is None else int(value)
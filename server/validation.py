@@ -0,0 +1,177 @@
+import csv
+import tempfile
+from typing import List, Dict, Optional, Tuple
+
+# Columns each upload must have, as read by the parsers
+UPLOAD_SCHEMAS = {
+    'strong_file': ('Strong workout export', ('Date', 'Workout Name', 'Exercise Name')),
+    'nutrition_file': ('MyFitnessPal nutrition export', ('Date', 'Calories')),
+    'weight_file': ('MyFitnessPal measurement export', ('Date', 'Weight'))
+}
+
+# Longest header row accepted before the upload is treated as malformed
+MAX_HEADER_BYTES = 64 * 1024
+
+# Uploads up to this size are buffered in memory, larger ones spill to disk
+SPOOL_BYTES = 512 * 1024
+
+
+class UploadValidationError(Exception):
+    """
+    Raised when an upload is rejected; carries the HTTP status to respond with
+    """
+
+    def __init__(self, message: str, status_code: int = 422, field: Optional[str] = None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.field = field
+
+    def to_dict(self) -> Dict[str, str]:
+        body = {'error': str(self)}
+        if self.field:
+            body['field'] = self.field
+        return body
+
+
+def parse_header(line: bytes) -> List[str]:
+    """
+    Split a CSV header row into column names
+
+    Args:
+        line: Header row bytes, without the line terminator
+
+    Returns:
+        Column names with surrounding whitespace removed
+    """
+    text = line.decode('utf-8-sig', errors='replace').rstrip('\r')
+    row = next(csv.reader([text]), [])
+    return [column.strip() for column in row]
+
+
+def matching_schemas(columns: List[str]) -> List[str]:
+    """
+    Upload fields whose required columns all appear in a header
+
+    Args:
+        columns: Header column names
+
+    Returns:
+        Matching keys of UPLOAD_SCHEMAS
+    """
+    present = set(columns)
+    return [field for field, (_, required) in UPLOAD_SCHEMAS.items()
+            if all(column in present for column in required)]
+
+
+class ValidatingUploadStream:
+    """
+    Writable upload buffer that validates a CSV upload while it is received
+
+    The form parser writes each chunk of the file as it arrives. The header row
+    is checked against the known export schemas as soon as it is complete, and
+    byte and row limits are enforced per chunk, so a bad upload is rejected
+    after reading only as much of it as needed.
+    """
+
+    def __init__(self, max_bytes: Optional[int] = None, max_rows: Optional[int] = None,
+                 filename: Optional[str] = None):
+        """
+        Initialize an empty upload buffer
+
+        Args:
+            max_bytes: Maximum size of the file
+            max_rows: Maximum number of data rows (lines after the header)
+            filename: Client-side file name, used in error messages
+        """
+        self.max_bytes = max_bytes
+        self.max_rows = max_rows
+        self.filename = filename
+        self.bytes_received = 0
+        self.lines = 0
+        self.columns: Optional[List[str]] = None
+        self.schemas: List[str] = []
+        self._header = bytearray()
+        self._file = tempfile.SpooledTemporaryFile(max_size=SPOOL_BYTES, mode='w+b')
+
+    @property
+    def rows(self) -> int:
+        """Data rows received so far; a quoted value spanning lines counts once per line"""
+        return max(self.lines - 1, 0)
+
+    def write(self, data: bytes) -> int:
+        """
+        Validate and store a chunk of the upload
+
+        Raises:
+            UploadValidationError: 413 if a limit is exceeded, 422 if the header is not a known export
+        """
+        self.bytes_received += len(data)
+        if self.max_bytes is not None and self.bytes_received > self.max_bytes:
+            raise UploadValidationError(
+                f"{self._label()} is larger than the {self.max_bytes} byte limit", 413)
+
+        if self.columns is None:
+            self._read_header(data)
+
+        self.lines += data.count(b'\n')
+        if self.max_rows is not None and self.rows > self.max_rows:
+            raise UploadValidationError(
+                f"{self._label()} has more than the {self.max_rows} row limit", 413)
+
+        return self._file.write(data)
+
+    def _read_header(self, data: bytes):
+        newline = data.find(b'\n')
+        self._header += data if newline < 0 else data[:newline]
+        if newline < 0:
+            if len(self._header) > MAX_HEADER_BYTES:
+                raise UploadValidationError(f"{self._label()} has no CSV header row")
+            return
+
+        self.columns = parse_header(bytes(self._header))
+        self.schemas = matching_schemas(self.columns)
+        if not self.schemas:
+            raise UploadValidationError(
+                f"{self._label()} is not a Strong or MyFitnessPal CSV export "
+                f"(header: {', '.join(self.columns[:12]) or 'empty'})")
+
+    def finish(self):
+        """Parse the header of an upload that has no line break after it"""
+        if self.columns is None and self._header:
+            self._read_header(b'\n')
+
+    def _label(self) -> str:
+        return f"Upload '{self.filename}'" if self.filename else 'Upload'
+
+    def __getattr__(self, name):
+        # read, seek, tell, close, ... come from the underlying buffer
+        return getattr(self._file, name)
+
+
+def check_upload(field: str, stream) -> Tuple[int, int]:
+    """
+    Check that a validated upload was sent in the right field
+
+    Args:
+        field: Form field the file was uploaded as
+        stream: The upload's stream
+
+    Returns:
+        Tuple of (bytes, data rows) received
+
+    Raises:
+        UploadValidationError: 422 if the file is empty or is a different kind of export
+    """
+    if not isinstance(stream, ValidatingUploadStream):
+        return 0, 0
+
+    stream.finish()
+    description, required = UPLOAD_SCHEMAS[field]
+    if stream.columns is None:
+        raise UploadValidationError(f"{field} is empty; expected a {description}", field=field)
+    if field not in stream.schemas:
+        missing = [column for column in required if column not in stream.columns]
+        raise UploadValidationError(
+            f"{field} does not look like a {description}; missing columns: {', '.join(missing)}",
+            field=field)
+    return stream.bytes_received, stream.rows
@@ -1,13 +1,23 @@
 #!/bin/bash
 # Script to start both frontend and backend servers
+#
+# Usage: ./start-app.sh [dev|prod]
+#   dev  (default) Flask debug server and Next.js dev server
+#   prod           Gunicorn workers (see gunicorn.conf.py) and a production Next.js build
 
-echo "Starting SynergyFit Insights application..."
+MODE="${1:-dev}"
+
+echo "Starting SynergyFit Insights application ($MODE mode)..."
 
 # Start Flask backend server
 echo "Starting Flask backend server..."
 cd "$(dirname "$0")"
 python3 -m pip install -r requirements.txt
-python3 app.py &
+if [ "$MODE" = "prod" ]; then
+    python3 -m gunicorn -c gunicorn.conf.py wsgi:application &
+else
+    python3 app.py &
+fi
 BACKEND_PID=$!
 
 # Wait a bit for backend to start
@@ -17,18 +27,24 @@ sleep 2
 echo "Starting Next.js frontend..."
 cd "$(dirname "$0")/synergyfit-insights-frontend"
 npm install
-npm run dev &
+if [ "$MODE" = "prod" ]; then
+    npm run build && npm start &
+else
+    npm run dev &
+fi
 FRONTEND_PID=$!
 
 # Function to handle exit
 function cleanup() {
     echo "Shutting down servers..."
-    kill $BACKEND_PID $FRONTEND_PID 2>/dev/null
+    # SIGTERM lets Gunicorn finish in-flight requests before its workers exit
+    kill -TERM $BACKEND_PID $FRONTEND_PID 2>/dev/null
+    wait $BACKEND_PID 2>/dev/null
     exit 0
 }
 
-# Register the cleanup function for when the script receives SIGINT
-trap cleanup SIGINT
+# Register the cleanup function for when the script receives SIGINT or SIGTERM
+trap cleanup SIGINT SIGTERM
 
 echo -e "\n============================================"
 echo "SynergyFit Insights is now running!"
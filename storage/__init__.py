@@ -0,0 +1,12 @@
+from utils.lazy import lazy_exports
+
+# The stores need pandas (and pyarrow for columnar files), so they are imported on first access
+__getattr__, __dir__ = lazy_exports(__name__, {
+    'HistoryStore': 'storage.history_store',
+    'import_exports': 'storage.history_store',
+    'save_dataset': 'storage.columnar',
+    'save_analyzers': 'storage.columnar',
+    'load_dataset': 'storage.columnar',
+    'load_analyzers': 'storage.columnar',
+    'dataset_paths': 'storage.columnar',
+})
@@ -0,0 +1,345 @@
+import os
+from typing import List, Dict, Optional, Tuple
+
+import pandas as pd
+
+from data_models.workout_models import WorkoutData
+from data_models.nutrition_models import DailyNutritionData, MealNutritionData, WeightData
+from data_models.frames import (workouts_to_frame, meals_to_frame, nutrition_to_frame, weights_to_frame,
+                                frame_to_workouts, frame_to_nutrition, frame_to_weights,
+                                canonical_exercise_names, MEAL_COLUMNS, NUTRITION_COLUMNS, WEIGHT_COLUMNS)
+from utils.exercise_names import CATALOGUE_VERSION
+from utils.instrumentation import stage
+from utils.lazy import lazy_import, is_available
+
+# Imported on first use, so locating a saved dataset or reading CSVs never pays for pyarrow
+pa = lazy_import('pyarrow')
+pq = lazy_import('pyarrow.parquet')
+
+# Bumped whenever a column is added, removed or changes type
+SCHEMA_VERSION = '3'
+
+# Versions this code reads. Columns added since a file was written load as missing values
+READABLE_VERSIONS = ('1', '2', '3')
+
+# Column types of each table kind; ints are nullable, dates are calendar days
+TABLE_FIELDS = {
+    'sets': [
+        ('date', 'date32'),
+        ('routine_name', 'string'),
+        ('exercise_name', 'string'),
+        ('set_order', 'int32'),
+        ('weight_kg', 'float64'),
+        ('reps', 'int32'),
+        ('distance_km', 'float64'),
+        ('duration_seconds', 'int32'),
+        ('set_type', 'string'),
+    ],
+    'meals': [('date', 'date32'), ('meal', 'string')] + [(name, 'float64') for name in MEAL_COLUMNS[2:]],
+    'nutrition': [('date', 'date32')] + [(name, 'float64') for name in NUTRITION_COLUMNS[1:]],
+    'weights': [('date', 'date32')] + [(name, 'float64') for name in WEIGHT_COLUMNS[1:]],
+}
+
+# File names of a saved dataset directory, without extension
+DATASET_FILES = ('sets', 'nutrition', 'weights', 'meals')
+
+FORMAT_EXTENSIONS = {'parquet': '.parquet', 'arrow': '.arrow'}
+EXTENSION_FORMATS = {'.parquet': 'parquet', '.pq': 'parquet',
+                     '.arrow': 'arrow', '.feather': 'arrow', '.ipc': 'arrow'}
+
+KIND_METADATA_KEY = b'synergyfit.kind'
+VERSION_METADATA_KEY = b'synergyfit.schema_version'
+
+# Exercise catalogue the names in a sets file were resolved against; files
+# without it, or from another catalogue, have their names resolved on read
+CATALOGUE_METADATA_KEY = b'synergyfit.exercise_catalogue'
+
+
+def _require_pyarrow():
+    if not is_available('pyarrow'):
+        raise ImportError("Parquet and Arrow files need pyarrow; install it with 'pip install pyarrow'")
+
+
+def table_schema(kind: str):
+    """
+    Arrow schema of a table kind, tagged with its kind and schema version
+
+    Args:
+        kind: One of TABLE_FIELDS
+
+    Returns:
+        pyarrow.Schema
+    """
+    _require_pyarrow()
+    if kind not in TABLE_FIELDS:
+        raise ValueError(f"Unknown table kind {kind!r}; expected one of {', '.join(TABLE_FIELDS)}")
+    fields = [pa.field(name, getattr(pa, type_name)()) for name, type_name in TABLE_FIELDS[kind]]
+    metadata = {KIND_METADATA_KEY: kind.encode(), VERSION_METADATA_KEY: SCHEMA_VERSION.encode()}
+    if kind == 'sets':
+        metadata[CATALOGUE_METADATA_KEY] = CATALOGUE_VERSION.encode()
+    return pa.schema(fields, metadata=metadata)
+
+
+def file_format(path: str) -> str:
+    """
+    File format implied by a path's extension
+
+    Args:
+        path: File path ending in .parquet/.pq or .arrow/.feather/.ipc
+
+    Returns:
+        'parquet' or 'arrow'
+    """
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in EXTENSION_FORMATS:
+        raise ValueError(f"Cannot tell the format of {path}; use a "
+                         f"{', '.join(EXTENSION_FORMATS)} extension")
+    return EXTENSION_FORMATS[extension]
+
+
+def write_frame(df: pd.DataFrame, path: str, kind: str) -> int:
+    """
+    Write a frame in the stable schema of its kind
+
+    Arrow IPC files are written uncompressed so they can be memory-mapped
+    and read without copying; Parquet files are compressed and smaller.
+
+    Args:
+        df: Frame with the kind's columns (sets_df, meals_df, a daily
+            nutrition frame or weight_df)
+        path: Destination .parquet or .arrow file
+        kind: 'sets', 'meals', 'nutrition' or 'weights'
+
+    Returns:
+        Number of rows written
+    """
+    schema = table_schema(kind)
+    file_type = file_format(path)
+
+    with stage(f"columnar.write_{kind}", rows=len(df)):
+        columns = df.reindex(columns=schema.names)
+        if kind == 'sets':
+            columns = columns.assign(date=columns['date'].dt.date)
+        arrays = [pa.array(columns[field.name], type=field.type, from_pandas=True) for field in schema]
+        table = pa.Table.from_arrays(arrays, schema=schema)
+
+        if file_type == 'parquet':
+            pq.write_table(table, path)
+        else:
+            with pa.OSFile(path, 'wb') as sink, pa.ipc.new_file(sink, schema) as writer:
+                writer.write_table(table)
+    return len(df)
+
+
+def read_frame(path: str, kind: str, columns: Optional[List[str]] = None) -> pd.DataFrame:
+    """
+    Read a file written by write_frame back into the analyzers' frame layout
+
+    Arrow IPC files are memory-mapped, so numeric columns are not copied
+    until they are modified. Parquet files are read through a memory map and
+    only the requested columns are decoded.
+
+    Args:
+        path: .parquet or .arrow file
+        kind: Expected table kind
+        columns: Optional subset of columns to load; 'date' is always included
+
+    Returns:
+        DataFrame sorted by date as written; 'sets' dates are datetime64 like
+        workouts_to_frame's, other dates are datetime.date objects. Exercise
+        names resolved against an older catalogue are resolved again
+
+    Raises:
+        ValueError: If the file holds a different table kind or a schema version
+            this code cannot read
+    """
+    _require_pyarrow()
+    if columns is not None and 'date' not in columns:
+        columns = ['date'] + list(columns)
+
+    with stage(f"columnar.read_{kind}", nbytes=os.path.getsize(path)) as timing:
+        if file_format(path) == 'parquet':
+            stored = pq.read_schema(path, memory_map=True)
+            _check_metadata(stored, path, kind)
+            present = None if columns is None else [name for name in columns if name in stored.names]
+            table = pq.read_table(path, columns=present, memory_map=True)
+        else:
+            table = pa.ipc.open_file(pa.memory_map(path, 'r')).read_all()
+            stored = table.schema
+            _check_metadata(stored, path, kind)
+            if columns is not None:
+                table = table.select([name for name in columns if name in table.schema.names])
+        timing.rows = table.num_rows
+        table = _add_missing_fields(table, kind, columns)
+
+        if kind == 'sets':
+            # Cast in Arrow so pandas receives datetime64 values without a per-row conversion
+            position = table.schema.get_field_index('date')
+            table = table.set_column(position, 'date', table.column('date').cast(pa.timestamp('s')))
+        df = table.to_pandas(split_blocks=True)
+
+        # Nullable int columns come back as floats, as in the analyzers' frames
+        for name, type_name in TABLE_FIELDS[kind]:
+            if type_name == 'int32' and name in df:
+                df[name] = df[name].astype(float)
+        if 'set_type' in df:
+            # Mostly missing, so kept as objects with None like workouts_to_frame's
+            df['set_type'] = df['set_type'].astype(object).where(df['set_type'].notna(), None)
+        catalogue = (stored.metadata or {}).get(CATALOGUE_METADATA_KEY, b'').decode()
+        if kind == 'sets' and 'exercise_name' in df and catalogue != CATALOGUE_VERSION:
+            workout_keys = [df[name] for name in ('date', 'routine_name') if name in df]
+            df['exercise_name'] = canonical_exercise_names(df['exercise_name'], workout_keys)
+    return df
+
+
+def _check_metadata(schema, path: str, kind: str):
+    metadata = schema.metadata or {}
+    stored_kind = metadata.get(KIND_METADATA_KEY, b'').decode()
+    stored_version = metadata.get(VERSION_METADATA_KEY, b'').decode()
+    if stored_kind != kind:
+        raise ValueError(f"{path} holds {stored_kind or 'unknown'} data, not {kind}")
+    if stored_version not in READABLE_VERSIONS:
+        raise ValueError(f"{path} uses schema version {stored_version or 'unknown'}; "
+                         f"this version reads {', '.join(READABLE_VERSIONS)}")
+
+
+def _add_missing_fields(table, kind: str, columns: Optional[List[str]]):
+    """Append the kind's columns that a file from an older schema version lacks, as nulls"""
+    for name, type_name in TABLE_FIELDS[kind]:
+        if name not in table.schema.names and (columns is None or name in columns):
+            table = table.append_column(pa.field(name, getattr(pa, type_name)()),
+                                        pa.nulls(table.num_rows, getattr(pa, type_name)()))
+    return table
+
+
+def dataset_paths(directory: str) -> Dict[str, str]:
+    """
+    Files of a saved dataset directory that exist
+
+    Args:
+        directory: Directory written by save_dataset or save_analyzers
+
+    Returns:
+        Dictionary of {table kind: path}
+    """
+    paths = {}
+    for kind in DATASET_FILES:
+        for extension in EXTENSION_FORMATS:
+            path = os.path.join(directory, kind + extension)
+            if os.path.exists(path):
+                paths[kind] = path
+                break
+    return paths
+
+
+def save_dataset(directory: str, workout_data: List[WorkoutData],
+                 nutrition_data: List[DailyNutritionData], weight_data: List[WeightData],
+                 meal_data: Optional[List[MealNutritionData]] = None,
+                 file_type: str = 'parquet') -> Dict[str, str]:
+    """
+    Save parsed records as one file per table kind
+
+    Args:
+        directory: Destination directory, created if needed
+        workout_data: List of WorkoutData objects
+        nutrition_data: List of DailyNutritionData objects
+        weight_data: List of WeightData objects
+        meal_data: Optional per-meal breakdown of nutrition_data
+        file_type: 'parquet' or 'arrow'
+
+    Returns:
+        Dictionary of {table kind: path written}
+    """
+    frames = {
+        'sets': workouts_to_frame(sorted(workout_data, key=lambda x: x.date)),
+        'nutrition': nutrition_to_frame(nutrition_data),
+        'weights': weights_to_frame(weight_data)
+    }
+    if meal_data is not None:
+        frames['meals'] = meals_to_frame(meal_data)
+    return _save_frames(directory, frames, file_type)
+
+
+def save_analyzers(directory: str, workout_analyzer, nutrition_analyzer,
+                   file_type: str = 'parquet') -> Dict[str, str]:
+    """
+    Save the current frames of a pair of analyzers, including synced changes
+
+    Args:
+        directory: Destination directory, created if needed
+        workout_analyzer: WorkoutAnalyzer instance
+        nutrition_analyzer: NutritionAnalyzer instance
+        file_type: 'parquet' or 'arrow'
+
+    Returns:
+        Dictionary of {table kind: path written}
+    """
+    frames = {
+        'sets': workout_analyzer.sets_df,
+        'nutrition': nutrition_analyzer.nutrition_df,
+        'weights': nutrition_analyzer.weight_df
+    }
+    if not nutrition_analyzer.meals_df.empty:
+        frames['meals'] = nutrition_analyzer.meals_df
+    return _save_frames(directory, frames, file_type)
+
+
+def _save_frames(directory: str, frames: Dict[str, pd.DataFrame], file_type: str) -> Dict[str, str]:
+    if file_type not in FORMAT_EXTENSIONS:
+        raise ValueError(f"Unknown file type {file_type!r}; expected one of {', '.join(FORMAT_EXTENSIONS)}")
+    os.makedirs(directory, exist_ok=True)
+
+    paths = {}
+    for kind, df in frames.items():
+        # Replace files of the other format so dataset_paths finds only the new ones
+        for extension in EXTENSION_FORMATS:
+            stale = os.path.join(directory, kind + extension)
+            if os.path.exists(stale):
+                os.remove(stale)
+        paths[kind] = os.path.join(directory, kind + FORMAT_EXTENSIONS[file_type])
+        write_frame(df, paths[kind], kind)
+    return paths
+
+
+def load_dataset(directory: str) -> Tuple[List[WorkoutData], List[DailyNutritionData], List[WeightData]]:
+    """
+    Load a saved dataset back into parsed records
+
+    Args:
+        directory: Directory written by save_dataset or save_analyzers
+
+    Returns:
+        Tuple of (workouts, daily nutrition, weigh-ins)
+    """
+    paths = _required_paths(directory)
+    return (frame_to_workouts(read_frame(paths['sets'], 'sets')),
+            frame_to_nutrition(read_frame(paths['nutrition'], 'nutrition')),
+            frame_to_weights(read_frame(paths['weights'], 'weights')))
+
+
+def load_analyzers(directory: str, keep_meals: bool = False):
+    """
+    Build analyzers straight from a saved dataset, without creating records
+
+    Args:
+        directory: Directory written by save_dataset or save_analyzers
+        keep_meals: Also load the per-meal table, needed to sync meals later
+
+    Returns:
+        Tuple of (WorkoutAnalyzer, NutritionAnalyzer)
+    """
+    from analysis.workout_analysis import WorkoutAnalyzer
+    from analysis.nutrition_analysis import NutritionAnalyzer
+
+    paths = _required_paths(directory)
+    meals_path = paths.get('meals') if keep_meals else None
+    return (WorkoutAnalyzer.from_file(paths['sets']),
+            NutritionAnalyzer.from_files(paths['nutrition'], paths['weights'], meals_path))
+
+
+def _required_paths(directory: str) -> Dict[str, str]:
+    paths = dataset_paths(directory)
+    missing = [kind for kind in ('sets', 'nutrition', 'weights') if kind not in paths]
+    if missing:
+        raise FileNotFoundError(f"{directory} has no {', '.join(missing)} file")
+    return paths
@@ -0,0 +1,432 @@
+import sqlite3
+import threading
+from datetime import date
+from typing import List, Dict, Any, Optional, Iterable
+
+import pandas as pd
+
+from data_models.workout_models import WorkoutData
+from data_models.nutrition_models import DailyNutritionData, MealNutritionData, WeightData
+from data_models.frames import workouts_to_frame, set_labels, canonical_exercise_names, SET_COLUMNS
+from utils.exercise_names import default_index
+
+DEFAULT_USER = 'default'
+
+# Dates are stored as ISO 'YYYY-MM-DD' text, which sorts chronologically.
+# Every primary key starts with (user_id, date), so it doubles as the date index.
+# Sets are keyed on their label (data_models.frames.set_labels): the set number,
+# or e.g. 'W1' for the first warm-up, so unnumbered sets never collide with numbered ones.
+SETS_TABLE = """
+CREATE TABLE IF NOT EXISTS sets (
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    routine_name TEXT NOT NULL,
+    exercise_name TEXT NOT NULL,
+    set_label TEXT NOT NULL,
+    set_order INTEGER,
+    set_type TEXT,
+    weight_kg REAL,
+    reps REAL,
+    distance_km REAL,
+    duration_seconds REAL,
+    position INTEGER NOT NULL DEFAULT 0,
+    PRIMARY KEY (user_id, date, routine_name, exercise_name, set_label)
+) WITHOUT ROWID"""
+
+SETS_INDEX = 'CREATE INDEX IF NOT EXISTS sets_exercise_date ON sets (user_id, exercise_name, date)'
+
+SCHEMA = SETS_TABLE + ';\n' + SETS_INDEX + """;
+
+CREATE TABLE IF NOT EXISTS meals (
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    meal TEXT NOT NULL,
+    calories REAL, protein REAL, carbs REAL, fat REAL,
+    fiber REAL, sugar REAL, sodium REAL, cholesterol REAL,
+    PRIMARY KEY (user_id, date, meal)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS nutrition_days (
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    calories REAL, protein REAL, carbs REAL, fat REAL,
+    fiber REAL, sugar REAL, sodium REAL, cholesterol REAL,
+    PRIMARY KEY (user_id, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS weights (
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    weight_kg REAL NOT NULL,
+    body_fat REAL,
+    waist_cm REAL,
+    neck_cm REAL,
+    hip_cm REAL,
+    PRIMARY KEY (user_id, date)
+) WITHOUT ROWID;
+"""
+
+# Columns added to tables after they were first released; older databases gain them when opened
+ADDED_COLUMNS = {
+    'weights': [('waist_cm', 'REAL'), ('neck_cm', 'REAL'), ('hip_cm', 'REAL')],
+}
+
+NUTRIENT_COLUMNS = ['calories', 'protein', 'carbs', 'fat', 'fiber', 'sugar', 'sodium', 'cholesterol']
+
+# Largest number of values bound into one IN (...) clause
+MAX_IN_VALUES = 500
+
+
+class HistoryStore:
+    """
+    Persistent per-user history of sets, meals, daily nutrition and weigh-ins in SQLite
+
+    Analyzers can be built from date-range queries against the store (see
+    WorkoutAnalyzer.from_store and NutritionAnalyzer.from_store), so a short
+    dashboard window reads only the rows it needs instead of a full export.
+    """
+
+    def __init__(self, path: str):
+        """
+        Open or create a store
+
+        Args:
+            path: SQLite database file, or ':memory:'
+        """
+        self.path = path
+        self._lock = threading.Lock()
+        self._conn = sqlite3.connect(path, check_same_thread=False)
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        self._conn.executescript(SCHEMA)
+        self._add_missing_columns()
+        self._label_sets()
+
+    def _add_missing_columns(self):
+        with self._lock, self._conn:
+            for table, columns in ADDED_COLUMNS.items():
+                present = {row[1] for row in self._conn.execute(f'PRAGMA table_info({table})')}
+                for name, type_name in columns:
+                    if name not in present:
+                        self._conn.execute(f'ALTER TABLE {table} ADD COLUMN {name} {type_name}')
+
+    def _label_sets(self):
+        """Rebuild a sets table keyed on set order, from before sets had labels"""
+        with self._lock:
+            present = {row[1] for row in self._conn.execute('PRAGMA table_info(sets)')}
+            if 'set_label' in present:
+                return
+            with self._conn:
+                self._conn.execute('BEGIN')
+                self._conn.execute('DROP INDEX IF EXISTS sets_exercise_date')
+                self._conn.execute('ALTER TABLE sets RENAME TO sets_by_order')
+                self._conn.execute(SETS_TABLE)
+                # Unnumbered sets were stored with made-up numbers, so every stored set is taken as numbered
+                self._conn.execute(
+                    'INSERT INTO sets (user_id, date, routine_name, exercise_name, set_label, set_order, '
+                    'weight_kg, reps, distance_km, duration_seconds, position) '
+                    'SELECT user_id, date, routine_name, exercise_name, CAST(set_order AS TEXT), set_order, '
+                    'weight_kg, reps, distance_km, duration_seconds, position FROM sets_by_order')
+                self._conn.execute('DROP TABLE sets_by_order')
+                self._conn.execute(SETS_INDEX)
+
+    def close(self):
+        """Close the database connection"""
+        with self._lock:
+            self._conn.close()
+
+    def __enter__(self) -> 'HistoryStore':
+        return self
+
+    def __exit__(self, exc_type, exc, tb):
+        self.close()
+
+    # Writing
+
+    def write_workouts(self, workout_data: List[WorkoutData], user_id: str = DEFAULT_USER) -> int:
+        """
+        Insert or replace sets, keyed on (date, workout, exercise, set label)
+
+        Sets without a set order (warm-up, drop and failure sets) are labelled
+        by their type and position among the sets of that type, e.g. 'W1', so
+        re-importing the same export is idempotent.
+
+        Args:
+            workout_data: List of WorkoutData objects
+            user_id: Owner of the records
+
+        Returns:
+            Number of sets stored
+        """
+        return self.write_sets_frame(workouts_to_frame(workout_data), user_id)
+
+    def write_sets_frame(self, sets_df: pd.DataFrame, user_id: str = DEFAULT_USER) -> int:
+        """
+        Insert or replace sets from a per-set DataFrame laid out like workouts_to_frame's
+
+        Args:
+            sets_df: Per-set DataFrame
+            user_id: Owner of the records
+
+        Returns:
+            Number of sets stored; a set repeated within sets_df is stored once
+        """
+        if sets_df.empty:
+            return 0
+
+        df = sets_df.assign(routine_name=sets_df['routine_name'].fillna(''),
+                            set_label=set_labels(sets_df))
+        if 'set_type' not in df:
+            df['set_type'] = None
+        df['date'] = df['date'].dt.strftime('%Y-%m-%d')
+        # Order of the set within its day in the source, so reads return sets in file order
+        df['position'] = df.groupby('date', sort=False).cumcount()
+        df = df.drop_duplicates(['date', 'routine_name', 'exercise_name', 'set_label'], keep='last')
+
+        columns = ['set_label'] + SET_COLUMNS + ['position']
+        rows = df[columns].astype(object).where(df[columns].notna(), None)
+        with self._lock, self._conn:
+            self._conn.executemany(
+                f"INSERT OR REPLACE INTO sets (user_id, {', '.join(columns)}) "
+                f"VALUES ({', '.join('?' * (len(columns) + 1))})",
+                ((user_id, *row) for row in rows.itertuples(index=False, name=None))
+            )
+        return len(df)
+
+    def write_meals(self, meal_data: List[MealNutritionData], user_id: str = DEFAULT_USER) -> int:
+        """
+        Insert or replace meals keyed on (date, meal) and recompute the affected daily totals
+
+        Args:
+            meal_data: List of MealNutritionData objects
+            user_id: Owner of the records
+
+        Returns:
+            Number of meals written
+        """
+        if not meal_data:
+            return 0
+
+        rows = [
+            (user_id, meal.date.isoformat(), meal.meal, meal.calories_kcal, meal.protein_g,
+             meal.carbs_g, meal.fat_g, meal.fiber_g, meal.sugar_g, meal.sodium_mg, meal.cholesterol_mg)
+            for meal in meal_data
+        ]
+        dates = sorted({row[1] for row in rows})
+        sums = ', '.join(f'SUM({column})' for column in NUTRIENT_COLUMNS)
+
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO meals (user_id, date, meal, calories, protein, carbs, fat, '
+                'fiber, sugar, sodium, cholesterol) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+            for chunk in _chunks(dates, MAX_IN_VALUES):
+                placeholders = ', '.join('?' * len(chunk))
+                self._conn.execute(
+                    f'INSERT OR REPLACE INTO nutrition_days SELECT user_id, date, {sums} FROM meals '
+                    f'WHERE user_id = ? AND date IN ({placeholders}) GROUP BY user_id, date',
+                    (user_id, *chunk))
+        return len(rows)
+
+    def write_nutrition(self, nutrition_data: List[DailyNutritionData], user_id: str = DEFAULT_USER) -> int:
+        """
+        Insert or replace daily nutrition totals for data without a per-meal breakdown
+
+        Args:
+            nutrition_data: List of DailyNutritionData objects
+            user_id: Owner of the records
+
+        Returns:
+            Number of days written
+        """
+        rows = [
+            (user_id, day.date.isoformat(), day.calories_kcal, day.protein_g, day.carbs_g, day.fat_g,
+             day.fiber_g, day.sugar_g, day.sodium_mg, day.cholesterol_mg)
+            for day in nutrition_data
+        ]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO nutrition_days (user_id, date, calories, protein, carbs, fat, '
+                'fiber, sugar, sodium, cholesterol) VALUES (?, ?, ?, ?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    def write_weights(self, weight_data: List[WeightData], user_id: str = DEFAULT_USER) -> int:
+        """
+        Insert or replace weigh-ins, one per date
+
+        Args:
+            weight_data: List of WeightData objects
+            user_id: Owner of the records
+
+        Returns:
+            Number of weigh-ins written
+        """
+        rows = [(user_id, entry.date.isoformat(), entry.weight_kg, entry.body_fat_percentage,
+                 entry.waist_cm, entry.neck_cm, entry.hip_cm)
+                for entry in weight_data]
+        with self._lock, self._conn:
+            self._conn.executemany(
+                'INSERT OR REPLACE INTO weights (user_id, date, weight_kg, body_fat, waist_cm, neck_cm, hip_cm) '
+                'VALUES (?, ?, ?, ?, ?, ?, ?)', rows)
+        return len(rows)
+
+    # Reading
+
+    def read_sets(self, user_id: str = DEFAULT_USER, start: Optional[date] = None,
+                  end: Optional[date] = None, exercises: Optional[Iterable[str]] = None) -> pd.DataFrame:
+        """
+        Read sets in a date range, optionally for some exercises only
+
+        Names are stored as they were resolved when written and resolved
+        again here, so sets stored before a catalogue change join the same
+        exercise as newer ones.
+
+        Args:
+            user_id: Owner of the records
+            start: First date to include
+            end: Last date to include
+            exercises: Exercise names to include, as spelled by the user or
+                canonical; uses the (exercise, date) index
+
+        Returns:
+            Per-set DataFrame laid out like workouts_to_frame's, sorted by date
+        """
+        where, params = _range_clause(user_id, start, end)
+        if exercises is not None:
+            stored_names = self._stored_exercise_names(user_id, exercises)
+            if not stored_names:
+                return workouts_to_frame([])
+            where += f" AND exercise_name IN ({', '.join('?' * len(stored_names))})"
+            params += stored_names
+
+        df = self._query(f"SELECT {', '.join(SET_COLUMNS)} FROM sets WHERE {where} "
+                         f"ORDER BY date, position", params)
+        df['date'] = pd.to_datetime(df['date'])
+        df['routine_name'] = df['routine_name'].replace('', None)
+        for name in ('set_order', 'weight_kg', 'reps', 'distance_km', 'duration_seconds'):
+            df[name] = pd.to_numeric(df[name], errors='coerce').astype(float)
+        df['set_type'] = df['set_type'].astype(object).where(df['set_type'].notna(), None)
+        df['exercise_name'] = canonical_exercise_names(df['exercise_name'], [df['date'], df['routine_name']])
+        return df
+
+    def _stored_exercise_names(self, user_id: str, exercises: Iterable[str]) -> List[str]:
+        """Stored spellings of the user's exercises that are, or resolve to, one of exercises"""
+        index = default_index()
+        wanted = set()
+        for name in exercises:
+            wanted.update((name, index.resolve(name).name))
+        with self._lock:
+            stored = [name for (name,) in self._conn.execute(
+                'SELECT DISTINCT exercise_name FROM sets WHERE user_id = ?', (user_id,))]
+        return [name for name in stored if name in wanted or index.resolve(name).name in wanted]
+
+    def read_nutrition(self, user_id: str = DEFAULT_USER, start: Optional[date] = None,
+                       end: Optional[date] = None) -> pd.DataFrame:
+        """
+        Read daily nutrition totals in a date range
+
+        Returns:
+            DataFrame laid out like NutritionAnalyzer.nutrition_df, sorted by date
+        """
+        where, params = _range_clause(user_id, start, end)
+        df = self._query(f"SELECT date, calories, protein, carbs, fat, fiber, sugar FROM nutrition_days "
+                         f"WHERE {where} ORDER BY date", params)
+        df['date'] = pd.to_datetime(df['date']).dt.date
+        return df
+
+    def read_meals(self, user_id: str = DEFAULT_USER, start: Optional[date] = None,
+                   end: Optional[date] = None) -> pd.DataFrame:
+        """
+        Read meals in a date range
+
+        Returns:
+            DataFrame with data_models.frames.MEAL_COLUMNS, sorted by date
+        """
+        where, params = _range_clause(user_id, start, end)
+        df = self._query(f"SELECT date, meal, {', '.join(NUTRIENT_COLUMNS)} FROM meals "
+                         f"WHERE {where} ORDER BY date, meal", params)
+        df['date'] = pd.to_datetime(df['date']).dt.date
+        return df
+
+    def read_weights(self, user_id: str = DEFAULT_USER, start: Optional[date] = None,
+                     end: Optional[date] = None) -> pd.DataFrame:
+        """
+        Read weigh-ins in a date range
+
+        Returns:
+            DataFrame laid out like NutritionAnalyzer.weight_df, sorted by date
+        """
+        where, params = _range_clause(user_id, start, end)
+        df = self._query(f"SELECT date, weight_kg AS weight, body_fat, waist_cm AS waist, neck_cm AS neck, "
+                         f"hip_cm AS hip FROM weights "
+                         f"WHERE {where} ORDER BY date", params)
+        df['date'] = pd.to_datetime(df['date']).dt.date
+        return df
+
+    def summary(self, user_id: str = DEFAULT_USER) -> Dict[str, Any]:
+        """
+        Record counts and date ranges stored for a user
+
+        Returns:
+            {'sets'|'meals'|'nutritionDays'|'weights': {'count', 'start', 'end'}}
+        """
+        result = {}
+        for key, table in (('sets', 'sets'), ('meals', 'meals'),
+                           ('nutritionDays', 'nutrition_days'), ('weights', 'weights')):
+            with self._lock:
+                count, first, last = self._conn.execute(
+                    f'SELECT COUNT(*), MIN(date), MAX(date) FROM {table} WHERE user_id = ?',
+                    (user_id,)).fetchone()
+            result[key] = {'count': count, 'start': first, 'end': last}
+        return result
+
+    def _query(self, sql: str, params: List[Any]) -> pd.DataFrame:
+        with self._lock:
+            cursor = self._conn.execute(sql, params)
+            columns = [description[0] for description in cursor.description]
+            return pd.DataFrame.from_records(cursor.fetchall(), columns=columns)
+
+
+def import_exports(store: HistoryStore, strong_path: Optional[str] = None,
+                   nutrition_path: Optional[str] = None, weight_path: Optional[str] = None,
+                   user_id: str = DEFAULT_USER) -> Dict[str, int]:
+    """
+    Parse exports and merge them into a store
+
+    Args:
+        store: Destination HistoryStore
+        strong_path: Optional Strong CSV export
+        nutrition_path: Optional MyFitnessPal nutrition CSV export
+        weight_path: Optional MyFitnessPal measurement CSV export
+        user_id: Owner of the records
+
+    Returns:
+        Number of sets, meals and weigh-ins written
+    """
+    from parsers.strong_parser import parse_strong_csv
+    from parsers.mfp_parser import parse_mfp_csv_meals, parse_mfp_csv_weight
+
+    counts = {'sets': 0, 'meals': 0, 'weights': 0}
+    if strong_path:
+        counts['sets'] = store.write_workouts(parse_strong_csv(strong_path), user_id)
+    if nutrition_path:
+        counts['meals'] = store.write_meals(parse_mfp_csv_meals(nutrition_path), user_id)
+    if weight_path:
+        counts['weights'] = store.write_weights(parse_mfp_csv_weight(weight_path), user_id)
+    return counts
+
+
+def _range_clause(user_id: str, start: Optional[date], end: Optional[date]):
+    where = 'user_id = ?'
+    params: List[Any] = [user_id]
+    if start is not None:
+        where += ' AND date >= ?'
+        params.append(start.isoformat())
+    if end is not None:
+        where += ' AND date <= ?'
+        params.append(end.isoformat())
+    return where, params
+
+
+def _chunks(values: List[Any], size: int):
+    for i in range(0, len(values), size):
+        yield values[i:i + size]
@@ -21,7 +21,8 @@ export default function Home() {
     height: 175,
     age: 30,
     sex: 'M',
-    activityMultiplier: 1.55
+    activityMultiplier: 1.55,
+    maxChartPoints: 500
   });
   
   // API hook for analysis
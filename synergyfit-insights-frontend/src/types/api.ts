@@ -8,6 +8,11 @@ export interface UserPreferences {
   age: number;
   sex: 'M' | 'F';
   activityMultiplier: number;
+  // Ask the backend to downsample chart series to about this many points
+  maxChartPoints?: number;
+  chartDownsampling?: 'lttb' | 'minmax';
+  chartLayout?: 'rows' | 'columnar';
+  chartDateFormat?: 'iso' | 'epochDays';
 }
 
 // Chart data point interface
@@ -0,0 +1,109 @@
+import numpy as np
+
+
+def lttb_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    Select points with the Largest-Triangle-Three-Buckets algorithm
+
+    The first and last points are always kept. The points in between are split
+    into n_out - 2 buckets, and each bucket keeps the point forming the
+    largest triangle with the previously kept point and the average of the
+    next bucket. Every bucket is scored with array operations, so the Python
+    loop runs once per output point, not once per input point.
+
+    Args:
+        x: Monotonic x values (e.g. day numbers)
+        y: y values
+        n_out: Number of points to keep
+
+    Returns:
+        Sorted array of indices into x/y
+    """
+    x = np.asarray(x, dtype=float)
+    y = np.asarray(y, dtype=float)
+    n = len(x)
+    if n_out >= n or n_out <= 0:
+        return np.arange(n)
+    if n_out < 3:
+        return np.array([0, n - 1])[:n_out]
+
+    # Bucket boundaries over the interior points 1..n-2
+    edges = np.floor(np.linspace(1, n - 1, n_out - 1)).astype(int)
+    starts, ends = edges[:-1], edges[1:]
+
+    # Average of each bucket, used as the third triangle vertex for the bucket before it
+    counts = np.maximum(ends - starts, 1)
+    x_sums = np.add.reduceat(x[:n - 1], starts)
+    y_sums = np.add.reduceat(y[:n - 1], starts)
+    avg_x = np.append(x_sums / counts, x[-1])[1:]
+    avg_y = np.append(y_sums / counts, y[-1])[1:]
+
+    selected = np.empty(n_out, dtype=int)
+    selected[0] = 0
+    selected[-1] = n - 1
+    previous = 0
+    for bucket, (start, end) in enumerate(zip(starts, ends)):
+        bx = x[start:end]
+        by = y[start:end]
+        # Twice the triangle area; the constant factor does not change the argmax
+        areas = np.abs((x[previous] - avg_x[bucket]) * (by - y[previous]) -
+                       (x[previous] - bx) * (avg_y[bucket] - y[previous]))
+        previous = start + int(np.argmax(areas))
+        selected[bucket + 1] = previous
+
+    return selected
+
+
+def minmax_indices(x, y, n_out: int) -> np.ndarray:
+    """
+    Keep the minimum and maximum of each bucket
+
+    Splits the series into n_out // 2 equal-count buckets. Fully vectorized.
+
+    Args:
+        x: Monotonic x values
+        y: y values
+        n_out: Approximate number of points to keep
+
+    Returns:
+        Sorted array of unique indices into x/y
+    """
+    y = np.asarray(y, dtype=float)
+    n = len(y)
+    if n_out >= n or n_out <= 0:
+        return np.arange(n)
+
+    n_buckets = max(1, n_out // 2)
+    bucket = (np.arange(n) * n_buckets) // n
+
+    # Sorting by (bucket, y) puts each bucket's minimum first and maximum last
+    order = np.lexsort((y, bucket))
+    boundaries = np.flatnonzero(np.diff(bucket[order])) + 1
+    first = np.concatenate([[0], boundaries])
+    last = np.concatenate([boundaries - 1, [n - 1]])
+
+    return np.unique(np.concatenate([order[first], order[last]]))
+
+
+DOWNSAMPLERS = {
+    'lttb': lttb_indices,
+    'minmax': minmax_indices
+}
+
+
+def downsample_indices(x, y, n_out: int, method: str = 'lttb') -> np.ndarray:
+    """
+    Pick which points of a series to keep for charting
+
+    Args:
+        x: Monotonic x values
+        y: y values
+        n_out: Target number of points
+        method: 'lttb' or 'minmax'
+
+    Returns:
+        Sorted array of indices into x/y
+    """
+    if method not in DOWNSAMPLERS:
+        raise ValueError(f"Unknown downsampling method '{method}'")
+    return DOWNSAMPLERS[method](x, y, n_out)
@@ -0,0 +1,470 @@
+import os
+import re
+import json
+import hashlib
+import tempfile
+import threading
+from collections import Counter, OrderedDict
+from dataclasses import dataclass
+from typing import List, Dict, Optional, Iterable, Tuple
+
+# Known movements by Strong body-part category: {category: {canonical name: aliases}}.
+# Canonical names follow Strong's spelling, so its built-in exercises keep their names:
+# a built-in is never an alias of another movement. Aliases are other spellings of one
+# lift, even with the equipment removed ('Dumbbell Press' leaves 'press'), so bare words
+# shared by several lifts (press, curl, dip, kickback) and generic names of a lift with
+# several variants ('leg curl', 'dumbbell row') are not aliases.
+MOVEMENTS = {
+    'Chest': {
+        'Bench Press': ('bench', 'flat bench press', 'flat bench'),
+        'Incline Bench Press': ('incline bench', 'incline press'),
+        'Decline Bench Press': ('decline bench', 'decline press'),
+        'Chest Fly': ('fly', 'flye', 'flies', 'chest flye', 'chest flies', 'pec fly', 'flat fly'),
+        'Incline Chest Fly': ('incline fly', 'incline flye'),
+        'Chest Press': (),
+        'Cable Crossover': ('crossover', 'cable cross over'),
+        'Pec Deck': ('pec dec', 'butterfly'),
+        'Push Up': ('pushup', 'press up'),
+        'Chest Dip': ('parallel bar dip',),
+        'Floor Press': (),
+        'Pullover': ('pull over',),
+    },
+    'Back': {
+        'Deadlift': ('conventional deadlift', 'dl'),
+        'Rack Pull': (),
+        'Bent Over Row': ('barbell row', 'bent row', 'bb row', 'bent over barbell row'),
+        'Pendlay Row': (),
+        'T Bar Row': ('tbar row',),
+        'Seated Row': ('cable row', 'seated cable row'),
+        'Bent Over One Arm Row': ('one arm row', 'single arm row'),
+        'Inverted Row': ('australian pull up', 'body row'),
+        'Lat Pulldown': ('pulldown', 'lat pull down'),
+        'Pull Up': ('pullup', 'pull ups'),
+        'Chin Up': ('chinup', 'chin'),
+        'Shrug': ('shrugs',),
+        'Back Extension': ('hyperextension', 'back hyperextension'),
+    },
+    'Shoulders': {
+        'Overhead Press': ('ohp', 'military press', 'standing press'),
+        'Seated Overhead Press': ('seated military press',),
+        'Shoulder Press': (),
+        'Seated Shoulder Press': (),
+        'Arnold Press': (),
+        'Push Press': (),
+        'Lateral Raise': ('side raise', 'side lateral raise', 'lat raise', 'lateral raises'),
+        'Front Raise': (),
+        'Reverse Fly': ('reverse flye', 'rear delt raise'),
+        'Rear Delt Fly': ('rear fly', 'rear delt flye'),
+        'Face Pull': ('facepull',),
+        'Upright Row': (),
+    },
+    'Arms': {
+        'Bicep Curl': ('biceps curl', 'standing curl'),
+        'Hammer Curl': (),
+        'Preacher Curl': (),
+        'Concentration Curl': (),
+        'Incline Curl': ('incline bicep curl', 'incline dumbbell curl'),
+        'Reverse Curl': (),
+        'Wrist Curl': (),
+        'Triceps Extension': ('tricep extension', 'overhead triceps extension', 'overhead tricep extension'),
+        'Skullcrusher': ('skull crusher', 'lying triceps extension', 'lying tricep extension'),
+        'Triceps Pushdown': ('tricep pushdown', 'pushdown', 'push down'),
+        'Triceps Rope Pushdown': ('tricep rope pushdown', 'rope pushdown'),
+        'Triceps Dip': ('tricep dip', 'bench dip'),
+        'Close Grip Bench Press': ('close grip bench', 'cgbp'),
+        'Triceps Kickback': ('tricep kickback',),
+    },
+    'Legs': {
+        'Squat': ('back squat', 'high bar squat', 'low bar squat'),
+        'Front Squat': (),
+        'Box Squat': (),
+        'Goblet Squat': (),
+        'Hack Squat': (),
+        'Bulgarian Split Squat': ('bss', 'rear foot elevated split squat'),
+        'Split Squat': (),
+        'Lunge': ('lunges', 'forward lunge'),
+        'Walking Lunge': (),
+        'Reverse Lunge': (),
+        'Leg Press': (),
+        'Leg Extension': ('quad extension',),
+        'Leg Curl': ('hamstring curl',),
+        'Lying Leg Curl': ('prone leg curl',),
+        'Seated Leg Curl': (),
+        'Calf Raise': (),
+        'Standing Calf Raise': (),
+        'Seated Calf Raise': (),
+        'Romanian Deadlift': ('rdl', 'romanian dl'),
+        'Stiff Leg Deadlift': ('stiff legged deadlift', 'sldl'),
+        'Sumo Deadlift': (),
+        'Good Morning': (),
+        'Hip Thrust': ('barbell hip thrust',),
+        'Glute Bridge': ('hip bridge',),
+        'Glute Kickback': (),
+        'Hip Abductor': ('abductor', 'hip abduction'),
+        'Hip Adductor': ('adductor', 'hip adduction'),
+        'Step Up': ('stepup', 'step ups'),
+    },
+    'Core': {
+        'Crunch': ('crunches', 'ab crunch'),
+        'Cable Crunch': ('kneeling cable crunch',),
+        'Sit Up': ('situp', 'sit ups'),
+        'Plank': (),
+        'Side Plank': (),
+        'Russian Twist': (),
+        'Hanging Leg Raise': (),
+        'Hanging Knee Raise': (),
+        'Leg Raise': ('lying leg raise',),
+        'Ab Wheel': ('ab rollout', 'ab wheel rollout', 'ab roller'),
+        'Mountain Climber': (),
+        'Cable Woodchop': ('woodchop', 'wood chop'),
+    },
+    'Full Body': {
+        'Farmers Walk': ('farmer walk', 'farmers carry', 'farmer carry'),
+        'Kettlebell Swing': ('kb swing',),
+        'Burpee': (),
+        'Thruster': (),
+        'Turkish Get Up': ('turkish getup', 'tgu'),
+    },
+    'Olympic': {
+        'Clean': ('squat clean',),
+        'Power Clean': (),
+        'Hang Clean': (),
+        'Clean and Jerk': ('clean jerk',),
+        'Snatch': ('squat snatch',),
+        'Power Snatch': (),
+        'Hang Snatch': (),
+    },
+    'Cardio': {
+        'Running': ('run', 'jog', 'jogging'),
+        'Walking': ('walk',),
+        'Cycling': ('bike', 'biking', 'cycle'),
+        'Rowing': ('rower', 'erg', 'row erg'),
+        'Elliptical Trainer': ('elliptical', 'cross trainer'),
+        'Stair Climber': ('stairmaster', 'stair master', 'stairs'),
+        'Swimming': ('swim',),
+        'Jump Rope': ('skipping', 'skipping rope'),
+        'Hiking': ('hike',),
+    },
+}
+
+# Equipment qualifiers, by the name shown in parentheses after the movement
+EQUIPMENT = {
+    'Barbell': ('barbell', 'bb'),
+    'Dumbbell': ('dumbbell', 'db'),
+    'Machine': ('machine',),
+    'Cable': ('cable',),
+    'Smith Machine': ('smith machine', 'smith'),
+    'Kettlebell': ('kettlebell', 'kb'),
+    'Band': ('band', 'resistance band'),
+    'Bodyweight': ('bodyweight', 'body weight', 'bw'),
+    'Weighted': ('weighted',),
+    'Assisted': ('assisted',),
+    'EZ Bar': ('ez bar', 'ezbar', 'ez curl bar'),
+    'Trap Bar': ('trap bar', 'hex bar'),
+}
+
+# Smallest trigram similarity (Dice coefficient) accepted as a fuzzy match
+FUZZY_THRESHOLD = 0.75
+
+# A fuzzy match must beat the runner-up by this much, or the name is left as it is
+FUZZY_MARGIN = 0.05
+
+# Shorter movement keys are only matched exactly
+FUZZY_MIN_LENGTH = 5
+
+# Most raw names (and custom exercises) remembered; the least recently used are dropped,
+# so a long-running server does not keep every name any user has uploaded
+MAX_MEMO_NAMES = int(os.environ.get('SYNERGYFIT_EXERCISE_MEMO_SIZE', 20000))
+
+# Identifies the catalogue a memo was built against; memos from other catalogues are discarded
+CATALOGUE_VERSION = hashlib.sha1(json.dumps(
+    [MOVEMENTS, EQUIPMENT, FUZZY_THRESHOLD, FUZZY_MARGIN, FUZZY_MIN_LENGTH], sort_keys=True
+).encode()).hexdigest()[:12]
+
+QUALIFIER = re.compile(r'\(([^()]*)\)')
+TOKEN = re.compile(r'[a-z0-9]+')
+
+
+@dataclass(frozen=True)
+class ExerciseMatch:
+    """Canonical identity of a raw exercise name"""
+    exercise_id: str
+    name: str
+    category: Optional[str]
+    method: str               # 'exact', 'fuzzy' or 'custom' (not in the catalogue)
+
+
+def tokenize(text: str) -> List[str]:
+    """
+    Lowercase word tokens of a name, with plurals reduced to the singular
+
+    Args:
+        text: Exercise name or part of one
+
+    Returns:
+        List of tokens, e.g. ['bicep', 'curl'] for 'Biceps Curls'
+    """
+    text = text.lower().replace('&', ' and ').replace("'", '')
+    return [_singular(token) for token in TOKEN.findall(text)]
+
+
+def _singular(token: str) -> str:
+    if len(token) <= 3 or token.endswith('ss'):
+        return token
+    if token.endswith(('sses', 'ches', 'shes', 'xes')):
+        return token[:-2]
+    return token[:-1] if token.endswith('s') else token
+
+
+def _slug(tokens: Iterable[str]) -> str:
+    return '-'.join(tokens)
+
+
+def _trigrams(key: str) -> set:
+    padded = f"  {key} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+def _exact_keys(tokens: List[str]) -> Tuple[str, str]:
+    # Word order and spacing vary ('press bench', 'pullup' vs 'pull up'), so
+    # names are looked up by their sorted words and by their letters run together
+    return ' '.join(sorted(tokens)), ''.join(tokens)
+
+
+class ExerciseNameIndex:
+    """
+    Maps raw exercise names to canonical names, ids and body-part categories
+
+    A name is split into its movement and an equipment qualifier, either in
+    parentheses ('Bench Press (Barbell)') or inline ('barbell bench press').
+    The movement is looked up in precomputed token and run-together keys of
+    every catalogue name and alias, then, failing that, among the catalogue
+    keys sharing the most character trigrams with it. Names matching nothing
+    are kept as first seen, and later spellings with the same tokens map to
+    that first spelling.
+
+    Raw names are resolved once; the MAX_MEMO_NAMES most recently used
+    results are memoized and, with a cache path, persisted as JSON so later
+    processes skip the lookups.
+    """
+
+    def __init__(self, cache_path: Optional[str] = None):
+        """
+        Build the lookup tables and load the persisted memo
+
+        Args:
+            cache_path: Optional JSON file holding resolved names across runs
+        """
+        self.cache_path = cache_path
+        self.stats = {'hits': 0, 'exact': 0, 'fuzzy': 0, 'custom': 0}
+        self._lock = threading.Lock()
+        self._memo: 'OrderedDict[str, ExerciseMatch]' = OrderedDict()
+        self._custom: 'OrderedDict[str, ExerciseMatch]' = OrderedDict()
+        self._dirty = False
+
+        self._movements: Dict[str, Tuple[str, str]] = {}   # movement id -> (name, category)
+        self._exact: Dict[str, str] = {}                   # exact key -> movement id
+        self._fuzzy_keys: Dict[str, Tuple[str, int]] = {}  # run-together key -> (movement id, trigram count)
+        self._trigram_index: Dict[str, List[str]] = {}     # trigram -> run-together keys containing it
+        self._equipment: Dict[Tuple[str, ...], str] = {}   # equipment tokens -> equipment name
+        self._build_tables()
+
+        if cache_path:
+            self._load()
+
+    def _build_tables(self):
+        for equipment, aliases in EQUIPMENT.items():
+            for alias in (equipment,) + aliases:
+                self._equipment[tuple(tokenize(alias))] = equipment
+
+        for category, movements in MOVEMENTS.items():
+            for name, aliases in movements.items():
+                movement_id = _slug(tokenize(name))
+                self._movements[movement_id] = (name, category)
+                for alias in (name,) + aliases:
+                    tokens = tokenize(alias)
+                    for key in _exact_keys(tokens):
+                        self._exact.setdefault(key, movement_id)
+                    compact = ''.join(tokens)
+                    if len(compact) >= FUZZY_MIN_LENGTH and compact not in self._fuzzy_keys:
+                        trigrams = _trigrams(compact)
+                        self._fuzzy_keys[compact] = (movement_id, len(trigrams))
+                        for trigram in trigrams:
+                            self._trigram_index.setdefault(trigram, []).append(compact)
+
+    def resolve(self, raw_name: str) -> ExerciseMatch:
+        """
+        Canonical identity of one raw name
+
+        Args:
+            raw_name: Exercise name as exported or synced
+
+        Returns:
+            ExerciseMatch
+        """
+        with self._lock:
+            match = self._memo.get(raw_name)
+            if match is not None:
+                self._memo.move_to_end(raw_name)
+                self.stats['hits'] += 1
+                return match
+
+            match = self._lookup(raw_name)
+            _remember(self._memo, raw_name, match)
+            self.stats[match.method] += 1
+            self._dirty = True
+        return match
+
+    def resolve_many(self, raw_names: Iterable[str]) -> Dict[str, ExerciseMatch]:
+        """
+        Canonical identities of several raw names
+
+        Args:
+            raw_names: Names, e.g. the distinct values of an export's exercise column
+
+        Returns:
+            Dictionary of {raw name: ExerciseMatch} for the names that are strings
+        """
+        return {name: self.resolve(name) for name in raw_names if isinstance(name, str)}
+
+    def _lookup(self, raw_name: str) -> ExerciseMatch:
+        qualifiers = [part.strip() for part in QUALIFIER.findall(raw_name) if part.strip()]
+        tokens = tokenize(QUALIFIER.sub(' ', raw_name))
+
+        equipment, tokens = self._take_equipment(tokens)
+        if equipment is None and len(qualifiers) == 1:
+            equipment = self._equipment.get(tuple(tokenize(qualifiers[0])))
+            if equipment is not None:
+                qualifiers = []
+        # Qualifiers that are not equipment ('Cable - Straight Bar', 'Indoor') are kept as written
+        qualifier = equipment or ' - '.join(qualifiers) or None
+
+        movement_id = self._exact.get(_exact_keys(tokens)[0]) or self._exact.get(_exact_keys(tokens)[1])
+        method = 'exact'
+        if movement_id is None:
+            movement_id = self._fuzzy(''.join(tokens))
+            method = 'fuzzy'
+        if movement_id is None:
+            return self._custom_match(raw_name, tokens, qualifier)
+
+        name, category = self._movements[movement_id]
+        if qualifier:
+            name = f"{name} ({qualifier})"
+            movement_id = f"{movement_id}:{_slug(tokenize(qualifier))}"
+        return ExerciseMatch(movement_id, name, category, method)
+
+    def _take_equipment(self, tokens: List[str]) -> Tuple[Optional[str], List[str]]:
+        """Remove the first equipment alias found inline, longest aliases first"""
+        # Movements named after their equipment ('Cable Crunch', 'Kettlebell Swing') keep it
+        if any(key in self._exact for key in _exact_keys(tokens)):
+            return None, tokens
+        for length in (3, 2, 1):
+            for start in range(len(tokens) - length + 1):
+                equipment = self._equipment.get(tuple(tokens[start:start + length]))
+                if equipment is not None and len(tokens) > length:
+                    return equipment, tokens[:start] + tokens[start + length:]
+        return None, tokens
+
+    def _fuzzy(self, key: str) -> Optional[str]:
+        """Catalogue movement whose key shares the most trigrams with this one, if close enough"""
+        if len(key) < FUZZY_MIN_LENGTH:
+            return None
+        trigrams = _trigrams(key)
+        shared = Counter(candidate for trigram in trigrams for candidate in self._trigram_index.get(trigram, ()))
+        scores: Dict[str, float] = {}
+        for candidate, count in shared.items():
+            movement_id, size = self._fuzzy_keys[candidate]
+            scores[movement_id] = max(scores.get(movement_id, 0.0), 2 * count / (len(trigrams) + size))
+        ranked = sorted(scores.values(), reverse=True)
+        if not ranked or ranked[0] < FUZZY_THRESHOLD:
+            return None
+        if len(ranked) > 1 and ranked[0] - ranked[1] < FUZZY_MARGIN:
+            return None
+        return max(scores, key=scores.get)
+
+    def _custom_match(self, raw_name: str, tokens: List[str], qualifier: Optional[str]) -> ExerciseMatch:
+        exercise_id = f"custom:{_slug(sorted(tokens))}"
+        if qualifier:
+            exercise_id += f":{_slug(tokenize(qualifier))}"
+        match = self._custom.get(exercise_id)
+        if match is None:
+            match = ExerciseMatch(exercise_id, raw_name.strip(), None, 'custom')
+        _remember(self._custom, exercise_id, match)
+        return match
+
+    def _load(self):
+        try:
+            with open(self.cache_path) as f:
+                stored = json.load(f)
+        except (FileNotFoundError, ValueError):
+            return
+        if stored.get('version') != CATALOGUE_VERSION:
+            return
+        # Saved least recently used first, so the newest entries are kept
+        for raw_name, fields in list(stored.get('names', {}).items())[-MAX_MEMO_NAMES:]:
+            match = ExerciseMatch(*fields)
+            _remember(self._memo, raw_name, match)
+            if match.method == 'custom' and match.exercise_id not in self._custom:
+                _remember(self._custom, match.exercise_id, match)
+
+    def save(self) -> bool:
+        """
+        Write the memo to the cache file if names were resolved since the last save
+
+        Entries written meanwhile by other processes are kept, up to
+        MAX_MEMO_NAMES in all, most recently used first to be kept. The file
+        is replaced atomically, so readers never see a partial memo.
+
+        Returns:
+            True if the file was written
+        """
+        if not self.cache_path or not self._dirty:
+            return False
+        with self._lock:
+            names = {raw_name: [match.exercise_id, match.name, match.category, match.method]
+                     for raw_name, match in self._memo.items()}
+            self._dirty = False
+
+        try:
+            with open(self.cache_path) as f:
+                stored = json.load(f)
+            if stored.get('version') == CATALOGUE_VERSION:
+                names = {**{raw_name: fields for raw_name, fields in stored.get('names', {}).items()
+                            if raw_name not in names}, **names}
+        except (FileNotFoundError, ValueError):
+            pass
+        names = dict(list(names.items())[-MAX_MEMO_NAMES:])
+
+        directory = os.path.dirname(os.path.abspath(self.cache_path))
+        os.makedirs(directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=directory, suffix='.tmp')
+        with os.fdopen(fd, 'w') as f:
+            json.dump({'version': CATALOGUE_VERSION, 'names': names}, f)
+        os.replace(temp_path, self.cache_path)
+        return True
+
+
+def _remember(memo: 'OrderedDict[str, ExerciseMatch]', key: str, match: ExerciseMatch):
+    """Store a match as most recently used, dropping the least recently used beyond MAX_MEMO_NAMES"""
+    memo[key] = match
+    memo.move_to_end(key)
+    if len(memo) > MAX_MEMO_NAMES:
+        memo.popitem(last=False)
+
+
+_default_index: Optional[ExerciseNameIndex] = None
+_default_lock = threading.Lock()
+
+
+def default_index() -> ExerciseNameIndex:
+    """
+    Process-wide index shared by the parsers and sync
+
+    Its memo is persisted to the file named by SYNERGYFIT_EXERCISE_CACHE, if set.
+    """
+    global _default_index
+    if _default_index is None:
+        with _default_lock:
+            if _default_index is None:
+                _default_index = ExerciseNameIndex(os.environ.get('SYNERGYFIT_EXERCISE_CACHE') or None)
+    return _default_index
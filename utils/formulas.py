@@ -49,6 +49,32 @@ def calculate_tdee(bmr: float, activity_multiplier: float) -> float:
     return bmr * activity_multiplier
 
 
+# Default daily calorie adjustment relative to TDEE for each goal
+GOAL_CALORIE_ADJUSTMENTS = {
+    'muscle_gain': 300,   # Slight surplus
+    'fat_loss': -500,     # Moderate deficit
+    'maintenance': 0
+}
+
+
+def calculate_calorie_target(tdee: float, goal: str, minimum_calories: Optional[float] = None) -> float:
+    """
+    Calculate a daily calorie target for a goal
+
+    Args:
+        tdee: Total Daily Energy Expenditure in calories per day
+        goal: Fitness goal - 'muscle_gain', 'fat_loss', or 'maintenance'
+        minimum_calories: Optional floor for the target
+
+    Returns:
+        Calorie target in calories per day (unknown goals are treated as maintenance)
+    """
+    target = tdee + GOAL_CALORIE_ADJUSTMENTS.get(goal, 0)
+    if minimum_calories is not None:
+        target = max(target, minimum_calories)
+    return target
+
+
 def estimate_one_rep_max(weight_kg: float, reps: int) -> float:
     """
     Estimate One Rep Max (1RM) using Epley formula
@@ -67,6 +93,33 @@ def estimate_one_rep_max(weight_kg: float, reps: int) -> float:
     return weight_kg * (1 + (reps / 30))
 
 
+def estimate_one_rep_max_array(weight_kg, reps):
+    """
+    Vectorized version of estimate_one_rep_max for arrays or Series
+
+    Args:
+        weight_kg: Array of weights lifted in kilograms
+        reps: Array of repetitions performed
+
+    Returns:
+        Array of estimated 1RM values in kilograms
+    """
+    import numpy as np
+
+    weight_kg = np.asarray(weight_kg, dtype=float)
+    reps = np.asarray(reps, dtype=float)
+    return np.where(reps == 1, weight_kg, weight_kg * (1 + (reps / 30)))
+
+
+# US Navy circumference method with measurements in centimeters:
+# body fat % = 495 / (a - b * log10(girth) + c * log10(height)) - 450,
+# where girth is waist - neck for men and waist + hip - neck for women
+NAVY_COEFFICIENTS = {
+    'M': (1.0324, 0.19077, 0.15456),
+    'F': (1.29579, 0.35004, 0.22100)
+}
+
+
 def calculate_body_fat_percentage(weight_kg: float, waist_cm: float, neck_cm: float, 
                                  height_cm: float, sex: str, hip_cm: Optional[float] = None) -> float:
     """
@@ -83,14 +136,56 @@ def calculate_body_fat_percentage(weight_kg: float, waist_cm: float, neck_cm: fl
     Returns:
         Body fat percentage (0-100)
     """
-    if sex.upper() == 'M':
-        # Men: Body Fat % = 495 / (1.0324 - 0.19077 * log10(waist - neck) + 0.15456 * log10(height)) - 450
-        log10_term = (waist_cm - neck_cm) / height_cm
-        body_fat = 86.010 * (log10(waist_cm - neck_cm)) - 70.041 * log10(height_cm) + 36.76
-    else:  # Female
-        if hip_cm is None:
-            raise ValueError("Hip circumference is required for female body fat calculation")
-        # Women: Body Fat % = 495 / (1.29579 - 0.35004 * log10(waist + hip - neck) + 0.22100 * log10(height)) - 450
-        body_fat = 163.205 * log10(waist_cm + hip_cm - neck_cm) - 97.684 * log10(height_cm) - 104.912
+    if sex.upper() != 'M' and hip_cm is None:
+        raise ValueError("Hip circumference is required for female body fat calculation")
+    a, b, c = NAVY_COEFFICIENTS['M' if sex.upper() == 'M' else 'F']
+    girth = waist_cm - neck_cm if sex.upper() == 'M' else waist_cm + hip_cm - neck_cm
+    body_fat = 495 / (a - b * log10(girth) + c * log10(height_cm)) - 450
     
-    return max(0.0, min(body_fat, 100.0))  # Ensure result is within 0-100%
\ No newline at end of file
+    return max(0.0, min(body_fat, 100.0))  # Ensure result is within 0-100%
+
+
+def calculate_body_fat_percentage_array(waist_cm, neck_cm, height_cm: float, sex: str, hip_cm=None):
+    """
+    Vectorized version of calculate_body_fat_percentage for arrays or Series
+
+    Args:
+        waist_cm: Array of waist circumferences in centimeters
+        neck_cm: Array of neck circumferences in centimeters
+        height_cm: Height in centimeters
+        sex: 'M' for male, 'F' for female
+        hip_cm: Array of hip circumferences in centimeters (only needed for females)
+
+    Returns:
+        Array of body fat percentages (0-100); NaN where a measurement is
+        missing or the girth is not positive
+    """
+    import numpy as np
+
+    waist_cm = np.asarray(waist_cm, dtype=float)
+    neck_cm = np.asarray(neck_cm, dtype=float)
+    if sex.upper() == 'M':
+        a, b, c = NAVY_COEFFICIENTS['M']
+        girth = waist_cm - neck_cm
+    else:
+        a, b, c = NAVY_COEFFICIENTS['F']
+        hip_cm = np.full_like(waist_cm, np.nan) if hip_cm is None else np.asarray(hip_cm, dtype=float)
+        girth = waist_cm + hip_cm - neck_cm
+
+    with np.errstate(divide='ignore', invalid='ignore'):
+        body_fat = 495 / (a - b * np.log10(np.where(girth > 0, girth, np.nan)) + c * np.log10(height_cm)) - 450
+    return np.clip(body_fat, 0.0, 100.0)
+
+
+def calculate_lean_body_mass(weight_kg: float, body_fat_percentage: float) -> float:
+    """
+    Lean body mass from weight and body fat percentage
+
+    Args:
+        weight_kg: Weight in kilograms
+        body_fat_percentage: Body fat percentage (0-100)
+
+    Returns:
+        Lean body mass in kilograms
+    """
+    return weight_kg * (1 - body_fat_percentage / 100)
@@ -0,0 +1,198 @@
+import time
+import functools
+import threading
+import contextvars
+from typing import List, Dict, Any, Optional, Callable
+
+
+class StageRecord:
+    """
+    Wall and CPU time of one pipeline stage, with the rows and bytes it processed
+
+    CPU time is the process's, so it includes other threads running at the same time.
+    """
+
+    __slots__ = ('name', 'seconds', 'cpu_seconds', 'rows', 'nbytes')
+
+    def __init__(self, name: str, rows: Optional[int] = None, nbytes: Optional[int] = None):
+        self.name = name
+        self.seconds = 0.0
+        self.cpu_seconds = 0.0
+        self.rows = rows
+        self.nbytes = nbytes
+
+    def to_dict(self) -> Dict[str, Any]:
+        return {'stage': self.name, 'seconds': self.seconds, 'cpuSeconds': self.cpu_seconds,
+                'rows': self.rows, 'bytes': self.nbytes}
+
+
+# Stage records of the trace active in the current context (request, job or CLI run)
+_current_trace: contextvars.ContextVar = contextvars.ContextVar('synergyfit_trace', default=None)
+
+# Callbacks that receive every finished stage, traced or not
+_listeners: List[Callable[[StageRecord], None]] = []
+_listeners_lock = threading.Lock()
+
+
+def add_listener(callback: Callable[[StageRecord], None]):
+    """
+    Register a callback invoked with every finished StageRecord
+
+    Args:
+        callback: Function taking a StageRecord; it must be cheap and must not raise
+    """
+    with _listeners_lock:
+        if callback not in _listeners:
+            _listeners.append(callback)
+
+
+def remove_listener(callback: Callable[[StageRecord], None]):
+    """Unregister a callback added with add_listener"""
+    with _listeners_lock:
+        if callback in _listeners:
+            _listeners.remove(callback)
+
+
+def start_trace() -> contextvars.Token:
+    """
+    Start collecting stage records for the current context
+
+    Returns:
+        Token to pass to end_trace
+    """
+    return _current_trace.set([])
+
+
+def end_trace(token: contextvars.Token) -> List[StageRecord]:
+    """
+    Stop collecting and return the stages recorded since start_trace
+
+    Args:
+        token: Token returned by start_trace
+
+    Returns:
+        List of StageRecords in completion order
+    """
+    records = _current_trace.get() or []
+    _current_trace.reset(token)
+    return records
+
+
+def current_trace() -> Optional[List[StageRecord]]:
+    """Stage records of the active trace, or None outside a trace"""
+    return _current_trace.get()
+
+
+def record(stage_record: StageRecord):
+    """
+    Publish a finished stage to the active trace and the listeners
+
+    Args:
+        stage_record: Finished StageRecord
+    """
+    trace = _current_trace.get()
+    if trace is not None:
+        trace.append(stage_record)
+    for callback in _listeners:
+        callback(stage_record)
+
+
+class stage:
+    """
+    Context manager timing a block as a named stage
+
+    The yielded StageRecord's `rows` and `nbytes` can be filled in inside the
+    block once they are known:
+
+        with stage('strong.read_csv', nbytes=size) as timing:
+            df = pd.read_csv(path)
+            timing.rows = len(df)
+    """
+
+    __slots__ = ('record', '_start', '_cpu_start')
+
+    def __init__(self, name: str, rows: Optional[int] = None, nbytes: Optional[int] = None):
+        self.record = StageRecord(name, rows, nbytes)
+        self._start = 0.0
+        self._cpu_start = 0.0
+
+    def __enter__(self) -> StageRecord:
+        self._cpu_start = time.process_time()
+        self._start = time.perf_counter()
+        return self.record
+
+    def __exit__(self, exc_type, exc, tb):
+        self.record.seconds = time.perf_counter() - self._start
+        self.record.cpu_seconds = time.process_time() - self._cpu_start
+        record(self.record)
+        return False
+
+
+def timed(name: str, rows: Optional[Callable[[Any], Optional[int]]] = None):
+    """
+    Decorator timing every call of a function as a named stage
+
+    Args:
+        name: Stage name
+        rows: Optional function mapping the return value to a row count
+
+    Returns:
+        Decorator
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        def wrapper(*args, **kwargs):
+            with stage(name) as timing:
+                result = func(*args, **kwargs)
+                if rows is not None:
+                    timing.rows = rows(result)
+            return result
+        return wrapper
+    return decorator
+
+
+def summarize_stages(records: List[StageRecord]) -> List[Dict[str, Any]]:
+    """
+    Total the records of each stage name
+
+    Args:
+        records: Stage records, e.g. from end_trace
+
+    Returns:
+        One dictionary per stage name with calls, seconds, cpuSeconds, rows
+        and bytes, in order of first completion
+    """
+    totals: Dict[str, Dict[str, Any]] = {}
+    for stage_record in records:
+        total = totals.get(stage_record.name)
+        if total is None:
+            total = totals[stage_record.name] = {'stage': stage_record.name, 'calls': 0, 'seconds': 0.0,
+                                                 'cpuSeconds': 0.0, 'rows': None, 'bytes': None}
+        total['calls'] += 1
+        total['seconds'] += stage_record.seconds
+        total['cpuSeconds'] += stage_record.cpu_seconds
+        if stage_record.rows is not None:
+            total['rows'] = (total['rows'] or 0) + stage_record.rows
+        if stage_record.nbytes is not None:
+            total['bytes'] = (total['bytes'] or 0) + stage_record.nbytes
+    return list(totals.values())
+
+
+def server_timing_header(records: List[StageRecord], limit: int = 32) -> str:
+    """
+    Format stage records as a Server-Timing header value
+
+    Repeated stages (e.g. one per target exercise) are summed into one entry.
+
+    Args:
+        records: Stage records of one request
+        limit: Maximum number of entries
+
+    Returns:
+        Header value such as 'strong.read_csv;dur=12.3, insights.combined;dur=4.1'
+    """
+    totals: Dict[str, float] = {}
+    for stage_record in records:
+        totals[stage_record.name] = totals.get(stage_record.name, 0.0) + stage_record.seconds
+    return ', '.join(f"{name};dur={seconds * 1000:.1f}"
+                     for name, seconds in list(totals.items())[:limit])
@@ -0,0 +1,107 @@
+import sys
+import importlib
+import importlib.util
+from typing import List, Dict, Callable, Tuple
+
+
+class LazyModule:
+    """
+    Stand-in for a module that is imported on first attribute access
+
+    Lets a module name pandas, numpy, pyarrow or a heavy sibling module at
+    the top of the file while paying for the import only in the code paths
+    that use it:
+
+        pd = lazy_import('pandas')
+
+        def load(path):
+            return pd.read_csv(path)   # pandas is imported here, once
+
+    Names used in annotations evaluated at definition time (e.g. a return
+    type of pd.DataFrame) trigger the import, so modules that do that keep
+    a plain import.
+    """
+
+    def __init__(self, name: str):
+        self.__dict__['_name'] = name
+        self.__dict__['_module'] = None
+
+    def _load(self):
+        module = self.__dict__['_module']
+        if module is None:
+            module = importlib.import_module(self.__dict__['_name'])
+            self.__dict__['_module'] = module
+        return module
+
+    def __getattr__(self, attr: str):
+        return getattr(self._load(), attr)
+
+    def __setattr__(self, attr: str, value):
+        setattr(self._load(), attr, value)
+
+    def __dir__(self) -> List[str]:
+        return dir(self._load())
+
+    def __repr__(self) -> str:
+        state = 'loaded' if self.__dict__['_module'] is not None else 'not loaded'
+        return f"<lazy module {self.__dict__['_name']!r} ({state})>"
+
+
+def lazy_import(name: str) -> LazyModule:
+    """
+    Module proxy that imports `name` on first use
+
+    Args:
+        name: Absolute module name, e.g. 'pandas' or 'analysis.workout_analysis'
+
+    Returns:
+        LazyModule
+    """
+    module = sys.modules.get(name)
+    return module if module is not None else LazyModule(name)
+
+
+def is_available(name: str) -> bool:
+    """
+    Whether an optional top-level package is installed, without importing it
+
+    Args:
+        name: Top-level package name, e.g. 'pyarrow'
+
+    Returns:
+        True if the package can be imported
+    """
+    return name in sys.modules or importlib.util.find_spec(name) is not None
+
+
+def lazy_exports(package: str, exports: Dict[str, str]) -> Tuple[Callable, Callable]:
+    """
+    Module-level __getattr__ and __dir__ (PEP 562) re-exporting names from submodules
+
+    A package __init__ can then offer `from analysis import WorkoutAnalyzer`
+    without importing every submodule, and pandas with them, when the
+    package itself is imported:
+
+        __getattr__, __dir__ = lazy_exports(__name__, {
+            'WorkoutAnalyzer': 'analysis.workout_analysis',
+        })
+
+    Args:
+        package: The package's __name__
+        exports: {exported name: submodule that defines it}
+
+    Returns:
+        Tuple of (__getattr__, __dir__) functions for the package namespace
+    """
+    def __getattr__(name: str):
+        if name not in exports:
+            raise AttributeError(f"module {package!r} has no attribute {name!r}")
+        value = getattr(importlib.import_module(exports[name]), name)
+        # Cache on the package so later lookups skip __getattr__
+        setattr(sys.modules[package], name, value)
+        return value
+
+    def __dir__() -> List[str]:
+        return sorted(set(vars(sys.modules[package])) | set(exports))
+
+    return __getattr__, __dir__
@@ -0,0 +1,21 @@
+#!/usr/bin/env python3
+# WSGI entry point for production serving of the SynergyFit Insights API
+#
+#   gunicorn -c gunicorn.conf.py wsgi:application     (Linux/macOS)
+#   python wsgi.py                                     (waitress, e.g. on Windows)
+
+import os
+import multiprocessing
+
+from app import create_app
+
+application = create_app()
+
+
+if __name__ == '__main__':
+    from waitress import serve
+
+    serve(application,
+          host=os.environ.get('SYNERGYFIT_HOST', '0.0.0.0'),
+          port=int(os.environ.get('SYNERGYFIT_PORT', 5000)),
+          threads=int(os.environ.get('SYNERGYFIT_THREADS', multiprocessing.cpu_count() * 2)))